@@ -1,7 +1,7 @@
 from invenio_jobs.jobs import JobType, PredefinedArgsSchema
-from marshmallow import fields
+from marshmallow import fields, validate
 
-from cca.tasks import test_task
+from cca.tasks import migrate_id_map, sync_groups_task, test_task
 
 
 class TestJobArgsSchema(PredefinedArgsSchema):
@@ -45,3 +45,214 @@ class TestJob(JobType):
             "dry_run": kwargs.get("dry_run", False),
             "msg": kwargs.get("msg", ""),
         }
+
+
+class MigrationJobArgsSchema(PredefinedArgsSchema):
+    chunk_size = fields.Integer(
+        allow_none=True,
+        dump_default=100,
+        load_default=100,
+        metadata={
+            "description": "Number of records each worker task processes.",
+            "title": "Chunk size",
+        },
+        required=False,
+    )
+    dry_run = fields.Boolean(
+        allow_none=True,
+        dump_default=False,
+        load_default=False,
+        metadata={
+            "description": "If true, only log the amount of pending work.",
+            "title": "Dry Run",
+        },
+        required=False,
+    )
+    map_file = fields.String(
+        metadata={
+            "description": "Path to the id-map, readable by every worker.",
+            "title": "ID map file",
+        },
+        required=True,
+    )
+
+
+class AddEditorsJobArgsSchema(MigrationJobArgsSchema):
+    job_arg_schema = fields.String(
+        dump_default="AddEditorsJobArgsSchema",
+        load_default="AddEditorsJobArgsSchema",
+        metadata={"type": "hidden"},
+    )
+    permission = fields.String(
+        allow_none=True,
+        dump_default="manage",
+        load_default="manage",
+        metadata={
+            "description": "Permission level to grant: view, preview, edit, or manage.",
+            "title": "Permission",
+        },
+        required=False,
+        validate=validate.OneOf(["view", "preview", "edit", "manage"]),
+    )
+
+
+class SetOwnersJobArgsSchema(MigrationJobArgsSchema):
+    index_records = fields.Boolean(
+        allow_none=True,
+        dump_default=True,
+        load_default=True,
+        metadata={
+            "description": "If false, changed records are not reindexed.",
+            "title": "Index records",
+        },
+        required=False,
+    )
+    job_arg_schema = fields.String(
+        dump_default="SetOwnersJobArgsSchema",
+        load_default="SetOwnersJobArgsSchema",
+        metadata={"type": "hidden"},
+    )
+
+
+class AddEditorsJob(JobType):
+    id: str = "add_editors"
+    title: str = "Add Editors"
+    description: str = (
+        "Add the pending collaborators in a migration id-map as editors of "
+        "their records, in chunks spread across Celery workers."
+    )
+    task = migrate_id_map
+    arguments_schema = AddEditorsJobArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        return {
+            "since": since,
+            "kind": "collaborators",
+            "map_file": kwargs["map_file"],
+            "chunk_size": kwargs.get("chunk_size") or 100,
+            "dry_run": kwargs.get("dry_run", False),
+            "permission": kwargs.get("permission") or "manage",
+        }
+
+
+class SetOwnersJob(JobType):
+    id: str = "set_owners"
+    title: str = "Set Owners"
+    description: str = (
+        "Set the pending owners in a migration id-map, in chunks spread across "
+        "Celery workers."
+    )
+    task = migrate_id_map
+    arguments_schema = SetOwnersJobArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        index_records: bool | None = kwargs.get("index_records")
+        return {
+            "since": since,
+            "kind": "owners",
+            "map_file": kwargs["map_file"],
+            "chunk_size": kwargs.get("chunk_size") or 100,
+            "dry_run": kwargs.get("dry_run", False),
+            "index_records": index_records is not False,
+        }
+
+
+class GroupsSyncJobArgsSchema(PredefinedArgsSchema):
+    create_groups = fields.Boolean(
+        allow_none=True,
+        dump_default=True,
+        load_default=True,
+        metadata={
+            "description": "Create missing groups before adding members.",
+            "title": "Create groups",
+        },
+        required=False,
+    )
+    dry_run = fields.Boolean(
+        allow_none=True,
+        dump_default=False,
+        load_default=False,
+        metadata={
+            "description": "If true, only log how many memberships would change.",
+            "title": "Dry Run",
+        },
+        required=False,
+    )
+    employees = fields.Boolean(
+        allow_none=True,
+        dump_default=True,
+        load_default=True,
+        metadata={
+            "description": "Sync the employee report into the faculty groups.",
+            "title": "Employees",
+        },
+        required=False,
+    )
+    full = fields.Boolean(
+        allow_none=True,
+        dump_default=False,
+        load_default=False,
+        metadata={
+            "description": "Sync every person, not only those whose data changed.",
+            "title": "Full sync",
+        },
+        required=False,
+    )
+    job_arg_schema = fields.String(
+        dump_default="GroupsSyncJobArgsSchema",
+        load_default="GroupsSyncJobArgsSchema",
+        metadata={"type": "hidden"},
+    )
+    reindex = fields.Boolean(
+        allow_none=True,
+        dump_default=True,
+        load_default=True,
+        metadata={
+            "description": "If false, changed groups are not reindexed.",
+            "title": "Reindex groups",
+        },
+        required=False,
+    )
+    state_file = fields.String(
+        metadata={
+            "description": "Path to the sync state, readable and writable by every worker.",
+            "title": "State file",
+        },
+        required=True,
+    )
+    students = fields.Boolean(
+        allow_none=True,
+        dump_default=True,
+        load_default=True,
+        metadata={
+            "description": "Sync the student report into the majors groups.",
+            "title": "Students",
+        },
+        required=False,
+    )
+
+
+class GroupsSyncJob(JobType):
+    id: str = "groups_sync"
+    title: str = "Groups Sync"
+    description: str = (
+        "Sync the people whose Workday data changed since the last run into the "
+        "program faculty and majors groups."
+    )
+    task = sync_groups_task
+    arguments_schema = GroupsSyncJobArgsSchema
+
+    @classmethod
+    def build_task_arguments(cls, job_obj, since=None, **kwargs):
+        return {
+            "since": since,
+            "state_file": kwargs["state_file"],
+            "employees": kwargs.get("employees") is not False,
+            "students": kwargs.get("students") is not False,
+            "create_groups": kwargs.get("create_groups") is not False,
+            "full": kwargs.get("full", False),
+            "dry_run": kwargs.get("dry_run", False),
+            "reindex": kwargs.get("reindex") is not False,
+        }
@@ -1,5 +1,6 @@
 """Add a user as an editor (manager) to a record."""
 
+from collections.abc import Iterable
 from os import environ
 from typing import Any
 
@@ -8,54 +9,302 @@ from flask.cli import with_appcontext
 from invenio_access.permissions import system_identity
 from invenio_accounts.proxies import current_accounts as accounts
 from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_rdm_records.proxies import current_rdm_records_service as records
+from invenio_records_resources.services.uow import UnitOfWork
 
+from cca.scripts.batch_utils import (
+    CHUNK_SIZE,
+    BatchProgress,
+    ResolvedUser,
+    UserResolver,
+    batched,
+    echo_lines,
+    run_ordered,
+    start_progress,
+)
+from cca.scripts.id_map_utils import is_uuid
+
+
+def editor_grant(user_id: int, permission: str) -> dict[str, Any]:
+    """Build the access grant that makes a user an editor of a record.
+
+    Args:
+        user_id: The user's ID
+        permission: Permission level (view, preview, edit, manage)
+
+    Returns:
+        Grant dictionary for records.access.bulk_create_grants
+    """
+    return {
+        "subject": {"type": "user", "id": str(user_id)},
+        "permission": permission,
+        "origin": "cli:add-editor",
+    }
+
+
+def existing_records(record_ids: Iterable[str]) -> set[str]:
+    """Find which of some published records exist, with one query.
+
+    Args:
+        record_ids: Invenio record IDs
+
+    Returns:
+        The IDs of the records found
+    """
+    pids = PersistentIdentifier.query.filter(
+        PersistentIdentifier.pid_type == "recid",
+        PersistentIdentifier.pid_value.in_(list(record_ids)),
+        PersistentIdentifier.status == PIDStatus.REGISTERED,
+    )
+    return {pid.pid_value for pid in pids}
+
+
+def create_grants(
+    record_id: str, grants: list[dict[str, Any]], uow: UnitOfWork | None = None
+) -> None:
+    """Create access grants on a record.
+
+    Without a unit of work the grants are committed right away. With one, they
+    are created in a savepoint and committed along with the rest of the unit
+    of work; if creating them fails only the savepoint is rolled back.
+
+    Args:
+        record_id: The Invenio record ID
+        grants: Grants to create
+        uow: Unit of work of the current chunk of records
+
+    Raises:
+        Exception: If the grants couldn't be created
+    """
+    grant_data: dict[str, Any] = {"grants": grants}
+    if uow is None:
+        try:
+            records.access.bulk_create_grants(
+                system_identity, record_id, data=grant_data, expand=False
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return
 
-def add_single_editor(record_id: str, email: str, permission: str = "manage") -> bool:
+    with db.session.begin_nested():
+        records.access.bulk_create_grants(
+            system_identity, record_id, data=grant_data, expand=False, uow=uow
+        )
+
+
+def add_single_editor(
+    record_id: str,
+    email: str,
+    permission: str = "manage",
+    users: UserResolver | None = None,
+    uow: UnitOfWork | None = None,
+    found: bool = False,
+) -> bool:
     """Add a single user as an editor to a record.
 
     Args:
         record_id: The Invenio record ID
         email: Email address of the user
         permission: Permission level (view, preview, edit, manage)
+        users: Resolver to look the user up in, instead of the datastore
+        uow: Unit of work to add the grant in instead of committing it
+        found: Whether the record is already known to exist, skips reading it
 
     Returns:
         True if successful, False otherwise
     """
     # Get the user
-    user = accounts.datastore.get_user(email)
+    user = users.get_by_email(email) if users else accounts.datastore.get_user(email)
     if not user:
         click.echo(f"ERROR: no user found with email {email}", err=True)
         return False
 
     # Get the record
+    if not found:
+        try:
+            record_item = records.read(system_identity, id_=record_id)
+            assert record_item is not None
+        except Exception as e:
+            click.echo(f"ERROR: could not find record {record_id}: {e}", err=True)
+            return False
+
+    # Create the grant
     try:
-        record_item = records.read(system_identity, id_=record_id)
-        assert record_item is not None
+        create_grants(record_id, [editor_grant(user.id, permission)], uow)
+        return True
     except Exception as e:
-        click.echo(f"ERROR: could not find record {record_id}: {e}", err=True)
+        click.echo(f"ERROR: failed to add editor: {e}", err=True)
         return False
 
-    # Create the grant
-    grant_data: dict[str, Any] = {
-        "grants": [
-            {
-                "subject": {"type": "user", "id": str(user.id)},
-                "permission": permission,
-                "origin": "cli:add-editor",
-            }
-        ]
+
+def add_editors(
+    record_id: str,
+    editors: list[ResolvedUser],
+    permission: str,
+    users: UserResolver | None = None,
+    uow: UnitOfWork | None = None,
+    found: bool = False,
+) -> list[ResolvedUser]:
+    """Add several users as editors to a record with one grant request.
+
+    All the grants are created with one bulk_create_grants call. If that fails,
+    it's rolled back and each user is added on its own, so one bad user
+    doesn't keep the others from being added.
+
+    Args:
+        record_id: The Invenio record ID
+        editors: Users to add
+        permission: Permission level (view, preview, edit, manage)
+        users: Resolver to look users up in when adding them one at a time
+        uow: Unit of work to add the grants in instead of committing them
+        found: Whether the record is already known to exist
+
+    Returns:
+        The users that were added
+    """
+    if len(editors) > 1:
+        try:
+            create_grants(
+                record_id, [editor_grant(user.id, permission) for user in editors], uow
+            )
+            return editors
+        except Exception as e:
+            click.echo(
+                f"WARNING: failed to add editors to {record_id} together, adding them one at a time: {e}",
+                err=True,
+            )
+    return [
+        user
+        for user in editors
+        if add_single_editor(record_id, user.email, permission, users, uow, found)
+    ]
+
+
+def add_record_editors(
+    item: dict[str, Any],
+    permission: str,
+    host: str,
+    users: UserResolver,
+    uow: UnitOfWork | None = None,
+    found: bool | None = None,
+) -> dict[str, Any]:
+    """Add the pending collaborators of one id-map record as editors.
+
+    Output is collected rather than echoed and events are returned rather than
+    recorded so that records can be processed by parallel workers while the
+    id-map is only written, in order, by the calling thread.
+
+    Args:
+        item: Pending collaborators item from the id-map
+        permission: Permission level (view, preview, edit, manage)
+        host: Invenio hostname for display purposes
+        users: Resolver to look collaborators up in
+        uow: Unit of work to add the grants in instead of committing them
+        found: Whether the record exists, if already checked
+
+    Returns:
+        Dict with the item, output "lines" as (message, is_error) pairs,
+        "events" data for each added collaborator, the "failed" count of
+        collaborators a later run can retry, and the "skipped" count of ones
+        it can't
+    """
+    rec_id: str = item["record_id"]
+    url: str = f"https://{host}/records/{rec_id}" if host else rec_id
+    collabs: list[str] = item["collaborators"]
+    lines: list[tuple[str, bool]] = [
+        (f'Processing: {url} "{item["title"]}"', False),
+        (f"Collaborators: {', '.join(collabs)}", False),
+    ]
+    if found is False:
+        lines.append((f"ERROR: could not find record {rec_id}", True))
+        return {
+            "item": item,
+            "lines": lines,
+            "events": [],
+            "failed": 0,
+            "skipped": len(collabs),
+        }
+
+    editors: list[ResolvedUser] = []
+    skipped: int = 0
+
+    for collab in collabs:
+        if is_uuid(collab):
+            lines.append((f"WARNING: skipping UUID collaborator {collab}", True))
+            skipped += 1
+            continue
+
+        # Try to find user by email, username & {username}@cca.edu email
+        user = users.resolve(collab)
+
+        if not user:
+            lines.append((f"WARNING: user not found {collab}", True))
+            skipped += 1
+            continue
+
+        if user not in editors:
+            editors.append(user)
+
+    # Add all the editors of the record at once
+    added: list[ResolvedUser] = add_editors(
+        rec_id, editors, permission, users, uow, bool(found)
+    )
+    failed: int = len(editors) - len(added)
+    events: list[dict[str, str]] = []
+    for user in added:
+        lines.append(
+            (f"✓ Added {user.email} to {url} with {permission} permission", False)
+        )
+        events.append({"email": user.email, "permission": permission})
+
+    return {
+        "item": item,
+        "lines": lines,
+        "events": events,
+        "failed": failed,
+        "skipped": skipped,
     }
 
+
+def add_chunk_editors(
+    chunk: list[dict[str, Any]], permission: str, host: str, users: UserResolver
+) -> list[dict[str, Any]]:
+    """Add the pending collaborators of a chunk of records in one transaction.
+
+    Each record's grants are created in a savepoint, so a record that fails is
+    rolled back alone and the rest of the chunk is committed together. The
+    chunk's records are looked up with one query rather than read one by one.
+
+    Args:
+        chunk: Pending collaborators items from the id-map
+        permission: Permission level (view, preview, edit, manage)
+        host: Invenio hostname for display purposes
+        users: Resolver to look collaborators up in
+
+    Returns:
+        add_record_editors results for each item
+    """
+    found: set[str] = existing_records(item["record_id"] for item in chunk)
+    results: list[dict[str, Any]] = []
     try:
-        records.access.bulk_create_grants(
-            system_identity, record_id, data=grant_data, expand=False
-        )
-        db.session.commit()
-        return True
+        with UnitOfWork(db.session) as uow:
+            for item in chunk:
+                results.append(
+                    add_record_editors(
+                        item, permission, host, users, uow, item["record_id"] in found
+                    )
+                )
+            uow.commit()
     except Exception as e:
-        click.echo(f"ERROR: failed to add editor: {e}", err=True)
-        return False
+        # nothing in the chunk was saved
+        for result in results:
+            result["lines"].append((f"ERROR: failed to commit grants: {e}", True))
+            result["failed"] += len(result["events"])
+            result["events"] = []
+    return results
 
 
 @click.command()
@@ -79,6 +328,35 @@ def add_single_editor(record_id: str, email: str, permission: str = "manage") ->
     help="Invenio hostname for display purposes",
     type=str,
 )
+@click.option(
+    "--dry-run",
+    "-n",
+    is_flag=True,
+    help="Batch mode: list pending collaborators in the map without adding them",
+)
+@click.option(
+    "--workers",
+    "-w",
+    type=click.IntRange(min=1),
+    default=1,
+    help="Batch mode: number of chunks of records to process in parallel (default: 1)",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=CHUNK_SIZE,
+    help=f"Batch mode: records to update per transaction (default: {CHUNK_SIZE})",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Batch mode: continue after the last record of an interrupted run",
+)
+@click.option(
+    "--summary-file",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    help="Batch mode: write a JSON summary of the run's timing to this file (- for stdout)",
+)
 @with_appcontext
 def add_editor(
     record_id: str | None,
@@ -86,12 +364,17 @@ def add_editor(
     permission: str,
     map_file: str | None,
     host: str,
+    dry_run: bool,
+    workers: int,
+    chunk_size: int,
+    resume: bool,
+    summary_file: str | None,
 ) -> None:
     """Add user(s) as editor(s) to record(s). This has two modes of operation:
 
     1. Single record mode (record_id and email required): Adds one user to one record, optionally recording in id-map.
 
-    2. Batch mode (--map-file required, no id/email): Processes all records in the id-map that have collaborators listed but no corresponding add_collaborator event. Looks up user emails by username.
+    2. Batch mode (--map-file required, no id/email): Processes all records in the id-map that have collaborators listed but no corresponding add_collaborator event. Looks up user emails by username, loading the users for many records at once.
 
     Add single editor:
     invenio cca add-editor abc12-xyz34 user@example.com
@@ -101,76 +384,126 @@ def add_editor(
 
     Batch process collaborators from migration map:
     invenio cca add-editor --map-file migration/id-map.json
+
+    List pending collaborators (and a count of all pending work) without changes:
+    invenio cca add-editor --map-file migration/id-map.json --dry-run
+
+    Batch process with four chunks of records at a time:
+    invenio cca add-editor --map-file migration/id-map.json --workers 4
+
+    Continue an interrupted batch and save a summary of its timing:
+    invenio cca add-editor --map-file migration/id-map.json --resume --summary-file run.json
     """
     # Batch mode: process map file
     if map_file and not record_id and not email:
         from cca.scripts.id_map_utils import (
-            get_pending_collaborators,
-            is_uuid,
-            record_event,
+            format_plan_summary,
+            open_id_map,
+            plan_migration,
         )
 
-        pending: list[dict[str, Any]] = get_pending_collaborators(map_file)
-
-        if not pending:
-            click.echo("No pending collaborators found in id-map")
+        if dry_run:
+            plan = plan_migration(map_file)
+            for item in plan["collaborators"]:
+                url: str = (
+                    f"https://{host}/records/{item['record_id']}"
+                    if host
+                    else item["record_id"]
+                )
+                click.echo(
+                    f'{url} "{item["title"]}": {", ".join(item["collaborators"])}'
+                )
+            click.echo(f"Dry run: {format_plan_summary(plan)}")
             return
 
-        click.echo(f"Found {len(pending)} records with pending collaborators")
-
-        fail_count = 0
-        success_count = 0
+        id_map = open_id_map(map_file)
+        try:
+            progress: BatchProgress = start_progress(
+                map_file, "add-editor", "collaborators", resume
+            )
 
-        for item in pending:
-            rec_id: str = item["record_id"]
-            url: str = f"https://{host}/records/{rec_id}" if host else rec_id
-            collabs: list[str] = item["collaborators"]
-            title: str = item["title"]
+            fail_count = 0
+            skip_count = 0
+            record_count = 0
+            success_count = 0
+            # events recorded this run, so a collaborator listed twice (e.g. by
+            # username and by email) is only recorded once
+            recorded: set[tuple[str, str]] = set()
+            # users are loaded in bulk for each batch of pending records
+            users: UserResolver = UserResolver()
 
-            click.echo(f'Processing: {url} "{title}"')
-            click.echo(f"Collaborators: {', '.join(collabs)}")
+            def process(chunk: list[dict[str, Any]]) -> list[dict[str, Any]]:
+                return add_chunk_editors(chunk, permission, host, users)
 
-            for collab in collabs:
-                if is_uuid(collab):
-                    click.echo(
-                        f"WARNING: skipping UUID collaborator {collab}",
-                        err=True,
+            # stream pending work so records are updated while the map is still read
+            pending = users.iter_prefetched(
+                id_map.iter_pending_collaborators(after=progress.position),
+                lambda item: item["collaborators"],
+            )
+            try:
+                for results in run_ordered(
+                    process, batched(pending, chunk_size), workers
+                ):
+                    chunk_failed: int = 0
+                    chunk_skipped: int = 0
+                    chunk_succeeded: int = 0
+                    for result in results:
+                        echo_lines(result["lines"])
+                        chunk_failed += result["failed"]
+                        chunk_skipped += result["skipped"]
+                        item: dict[str, Any] = result["item"]
+                        for event in result["events"]:
+                            key: tuple[str, str] = (
+                                item["record_id"],
+                                event["email"].lower(),
+                            )
+                            if key in recorded:
+                                continue
+                            try:
+                                id_map.record_event(
+                                    item["record_id"],
+                                    "add_collaborator",
+                                    event,
+                                    vault_url=item["vault_url"],
+                                )
+                                recorded.add(key)
+                                chunk_succeeded += 1
+                            except Exception as e:
+                                click.echo(
+                                    f"WARNING: failed to record event: {e}", err=True
+                                )
+                    record_count += len(results)
+                    fail_count += chunk_failed
+                    skip_count += chunk_skipped
+                    success_count += chunk_succeeded
+                    progress.update(
+                        results[-1]["item"]["vault_url"],
+                        len(results),
+                        chunk_succeeded,
+                        chunk_failed,
+                        chunk_skipped,
                     )
-                    fail_count += 1
-                    continue
-
-                # Try to find user by username & {username}@cca.edu email
-                user = accounts.datastore.find_user(email=collab)
-                if not user and "@" not in collab:
-                    user = accounts.datastore.find_user(email=f"{collab}@cca.edu")
-
-                if not user:
-                    click.echo(f"WARNING: user not found {collab}", err=True)
-                    fail_count += 1
-                    continue
-
-                # Add the editor
-                if add_single_editor(rec_id, user.email, permission):
-                    click.echo(
-                        f"✓ Added {user.email} to {url} with {permission} permission"
-                    )
-                    try:
-                        record_event(
-                            map_file,
-                            rec_id,
-                            "add_collaborator",
-                            {"email": user.email, "permission": permission},
-                        )
-                        success_count += 1
-                    except Exception as e:
-                        click.echo(f"WARNING: failed to record event: {e}", err=True)
-                else:
-                    fail_count += 1
+            except ValueError as e:
+                # the checkpoint doesn't match the map
+                click.echo(f"ERROR: can't resume: {e}", err=True)
+                exit(1)
+            progress.finish()
 
-        click.echo(
-            f"Completed: {success_count} collaborators added, {fail_count} failed/skipped."
-        )
-        return
+            if not record_count:
+                click.echo("No pending collaborators found in id-map")
+                progress.write_summary(summary_file)
+                return
+
+            # fold the events journaled during this run back into the map file
+            id_map.compact()
+            click.echo(f"Processed {record_count} records with pending collaborators")
+            click.echo(
+                f"Completed: {success_count} collaborators added, {fail_count} failed, {skip_count} skipped."
+            )
+            progress.write_summary(summary_file)
+            return
+        finally:
+            id_map.close()
 
     # Single record mode
     if not record_id or not email:
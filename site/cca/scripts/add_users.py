@@ -10,8 +10,10 @@ from typing import Any
 
 import click
 from cca.models import User
+from cca.scripts.batch_utils import IndexQueue
 from flask.cli import with_appcontext
 from invenio_accounts import current_accounts as accounts
+from invenio_users_resources.proxies import current_users_service
 
 
 @click.command()
@@ -25,13 +27,19 @@ from invenio_accounts import current_accounts as accounts
 @click.option(
     "--reindex",
     is_flag=True,
-    help="Reindex afterwards (runs invenio rdm rebuild-all-indices -o users)",
+    help="Index the created users afterwards",
+)
+@click.option(
+    "--full-reindex",
+    is_flag=True,
+    help="Rebuild the whole users index afterwards (runs invenio rdm rebuild-all-indices -o users)",
 )
 @with_appcontext
-def add_users(file: Path, reindex: bool) -> None:
+def add_users(file: Path, reindex: bool, full_reindex: bool) -> None:
     """Add user accounts to Invenio. Automatically activates & confirms the accounts.
     To update the names vocabulary, see `invenio vocabularies update -v names`."""
     # TODO add roles?
+    created: list = []
     with open(file, "r") as fh:
         users: list[dict[str, Any]] = json.load(fh)
         if not isinstance(users, list):
@@ -49,11 +57,17 @@ def add_users(file: Path, reindex: bool) -> None:
                     err=True,
                 )
                 continue
-            accounts.datastore.create_user(**user)
+            created.append(accounts.datastore.create_user(**user))
         accounts.datastore.commit()
 
-    if reindex:
+    if full_reindex:
         subprocess.call(
             ["invenio", "rdm", "rebuild-all-indices", "-o", "users"],
             stderr=subprocess.DEVNULL,
         )
+    elif reindex:
+        # index only the new users, in this process
+        index_queue: IndexQueue = IndexQueue(current_users_service.indexer)
+        for account in created:
+            index_queue.add(account.id)
+        click.echo(f"Indexed {index_queue.process()} users")
@@ -0,0 +1,501 @@
+"""Helpers shared by the batch modes of the migration CLI commands."""
+
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import Any, TypeVar
+
+import click
+from flask import current_app
+from invenio_accounts.models import User
+from invenio_db import db
+from sqlalchemy import func
+
+from cca.scripts.id_map_utils import cached_plan, iter_id_map, skip_entries
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# identifiers per SQL "IN" list when looking up users
+USER_BATCH_SIZE: int = 500
+# record ids sent to the indexer queue at a time
+INDEX_BATCH_SIZE: int = 500
+# records updated in one transaction by batch commands
+CHUNK_SIZE: int = 100
+
+
+def echo_lines(lines: Iterable[tuple[str, bool]]) -> None:
+    """Echo (message, is_error) pairs collected by a batch worker.
+
+    Args:
+        lines: Messages in the order they were produced
+    """
+    for message, err in lines:
+        click.echo(message, err=err)
+
+
+def run_ordered(
+    func: Callable[[T], R], items: Iterable[T], workers: int = 1
+) -> Iterator[R]:
+    """Apply func to each item, in a pool of worker threads if workers > 1.
+
+    Each call runs in its own Flask app context so workers never share a
+    database session: Invenio scopes db.session to the app context, and the
+    context's teardown removes the session once the call returns. func must
+    commit or roll back its own work.
+
+    Results are yielded in the order of items, whatever order the workers finish
+    in, and only a few items per worker are submitted ahead of the results
+    being consumed, so streaming items (e.g. from an id-map) stay streaming.
+
+    Args:
+        func: Function called with each item
+        items: Items to process
+        workers: Number of worker threads; 1 runs func in the calling thread
+
+    Yields:
+        func(item) for each item, in order
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+
+    app: Any = current_app._get_current_object()  # type: ignore[attr-defined]
+
+    def call(item: T) -> R:
+        with app.app_context():
+            return func(item)
+
+    pending: deque[Future[R]] = deque()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for item in items:
+            pending.append(executor.submit(call, item))
+            if len(pending) >= workers * 2:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def batched(items: Iterable[T], size: int) -> Iterator[list[T]]:
+    """Split items into lists of at most size items.
+
+    Args:
+        items: Items to split
+        size: Maximum length of each list
+
+    Yields:
+        Lists of consecutive items
+    """
+    iterator: Iterator[T] = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+@dataclass(frozen=True)
+class ResolvedUser:
+    """The parts of a user the batch commands need.
+
+    Plain values rather than a User instance, so cached users aren't expired by
+    commits or tied to the session of the thread that loaded them.
+    """
+
+    id: int
+    email: str
+    username: str | None
+
+
+class UserResolver:
+    """Find users by email or username, loading them in bulk and caching them.
+
+    Batch commands look up the same collaborators and owners over and over.
+    prefetch() loads the users for many identifiers with a few queries and
+    every later lookup, including misses, is answered from memory. Emails and
+    usernames are matched case-insensitively.
+
+    Args:
+        batch_size: Maximum identifiers per query
+    """
+
+    def __init__(self, batch_size: int = USER_BATCH_SIZE):
+        self.batch_size: int = batch_size
+        self.by_email: dict[str, ResolvedUser | None] = {}
+        self.by_username: dict[str, ResolvedUser | None] = {}
+
+    def _add(self, row: Any) -> None:
+        user: ResolvedUser = ResolvedUser(row.id, row.email, row.username)
+        self.by_email[user.email.lower()] = user
+        if user.username:
+            self.by_username[user.username.lower()] = user
+
+    def prefetch(self, identifiers: Iterable[str]) -> None:
+        """Load the users any of the identifiers could resolve to.
+
+        Args:
+            identifiers: Emails or usernames, as listed in the id-map
+        """
+        emails: set[str] = set()
+        usernames: set[str] = set()
+        for identifier in identifiers:
+            identifier = identifier.lower()
+            emails.add(identifier)
+            if "@" not in identifier:
+                usernames.add(identifier)
+                emails.add(f"{identifier}@cca.edu")
+        emails -= self.by_email.keys()
+        usernames -= self.by_username.keys()
+
+        columns: tuple[Any, ...] = (User.id, User.email, User.username)
+        for batch in batched(sorted(emails), self.batch_size):
+            for row in db.session.query(*columns).filter(
+                func.lower(User.email).in_(batch)
+            ):
+                self._add(row)
+        for batch in batched(sorted(usernames), self.batch_size):
+            for row in db.session.query(*columns).filter(
+                func.lower(User.username).in_(batch)
+            ):
+                self._add(row)
+
+        # remember misses so they aren't looked up again
+        for email in emails:
+            self.by_email.setdefault(email, None)
+        for username in usernames:
+            self.by_username.setdefault(username, None)
+
+    def get_by_email(self, email: str) -> ResolvedUser | None:
+        """Get the user with an email address."""
+        if email.lower() not in self.by_email:
+            self.prefetch([email])
+        return self.by_email.get(email.lower())
+
+    def get_by_username(self, username: str) -> ResolvedUser | None:
+        """Get the user with a username."""
+        if username.lower() not in self.by_username:
+            self.prefetch([username])
+        return self.by_username.get(username.lower())
+
+    def resolve(self, identifier: str) -> ResolvedUser | None:
+        """Find the user an id-map collaborator or owner refers to.
+
+        Tries the identifier as an email and, if it has no "@", as a username
+        and as a {username}@cca.edu email.
+
+        Args:
+            identifier: Email or username
+
+        Returns:
+            The user, or None if none was found
+        """
+        user: ResolvedUser | None = self.get_by_email(identifier)
+        if not user and "@" not in identifier:
+            user = self.get_by_username(identifier) or self.get_by_email(
+                f"{identifier}@cca.edu"
+            )
+        return user
+
+    def iter_prefetched(
+        self, items: Iterable[T], identifiers: Callable[[T], Iterable[str]]
+    ) -> Iterator[T]:
+        """Pass items through, prefetching the users of each batch of items.
+
+        Args:
+            items: Pending work items, e.g. streamed from an id-map
+            identifiers: Function returning the emails or usernames of an item
+
+        Yields:
+            The items, unchanged
+        """
+        for batch in batched(items, self.batch_size):
+            self.prefetch(
+                identifier for item in batch for identifier in identifiers(item)
+            )
+            yield from batch
+
+
+class IndexQueue:
+    """Collect the ids of changed records and queue them for bulk indexing.
+
+    Rather than indexing each record as it's changed, ids are sent to the
+    indexer's queue with bulk_index every batch_size records and on flush().
+    The queue is consumed by the indexer's bulk queue task, which Invenio's
+    Celery beat schedule runs every few minutes.
+
+    Args:
+        indexer: A service indexer, e.g. the records, users or groups service's,
+            or None to not index at all
+        batch_size: Number of record ids to send at a time
+    """
+
+    def __init__(self, indexer: Any, batch_size: int = INDEX_BATCH_SIZE):
+        self.indexer: Any = indexer
+        self.batch_size: int = batch_size
+        self.ids: list[str] = []
+        self.queued: int = 0
+
+    def add(self, record_id: Any) -> None:
+        """Queue a changed record for indexing.
+
+        Args:
+            record_id: The record's UUID
+        """
+        if not self.indexer:
+            return
+        self.ids.append(str(record_id))
+        if len(self.ids) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> int:
+        """Send the collected record ids to the indexer queue.
+
+        Returns:
+            Total number of records queued so far
+        """
+        if self.indexer and self.ids:
+            self.indexer.bulk_index(self.ids)
+            self.queued += len(self.ids)
+            self.ids = []
+        return self.queued
+
+    def process(self) -> int:
+        """Flush, then index everything in the indexer's queue in this process
+        instead of waiting for the Celery beat task.
+
+        Returns:
+            Total number of records queued
+        """
+        queued: int = self.flush()
+        if self.indexer and queued:
+            self.indexer.process_bulk_queue()
+        return queued
+
+
+def checkpoint_path(map_file: str | Path, command: str) -> Path:
+    """Get the path of a batch command's checkpoint for an id-map.
+
+    Args:
+        map_file: Path to the id-map file
+        command: Name of the batch command, e.g. "set-owner"
+
+    Returns:
+        Path like id-map.json.set-owner.checkpoint.json in the same directory
+    """
+    path: Path = Path(map_file)
+    return path.with_name(f"{path.name}.{command}.checkpoint.json")
+
+
+def read_checkpoint(path: str | Path) -> dict[str, Any] | None:
+    """Read a batch checkpoint file.
+
+    Args:
+        path: Path to the checkpoint file
+
+    Returns:
+        The checkpoint, or None if there isn't one
+    """
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def format_duration(seconds: float) -> str:
+    """Format a number of seconds like "1h02m03s"."""
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h{minutes:02d}m{secs:02d}s"
+    if minutes:
+        return f"{minutes}m{secs:02d}s"
+    return f"{secs}s"
+
+
+class BatchProgress:
+    """Track, report, and checkpoint the progress of a batch command.
+
+    After each chunk of records, update() prints a progress line with the rate,
+    failures, and (if the total is known) an ETA, and saves a checkpoint with
+    the VAULT URL of the last record processed so an interrupted run can pick
+    up after it with --resume. Once a chunk has failures that a later run could
+    retry the checkpoint stops advancing and is kept when the run finishes, so
+    --resume retries the failed records; records that succeeded after them are
+    no longer pending and are skipped again. Records skipped for good, e.g.
+    because their user doesn't exist, don't hold the checkpoint back.
+
+    Args:
+        command: Name of the batch command, e.g. "set-owner"
+        total: Number of records expected, if known
+        checkpoint: Path of the checkpoint file, or None to not keep one
+        resumed: The checkpoint this run resumed from, if any
+    """
+
+    def __init__(
+        self,
+        command: str,
+        total: int | None = None,
+        checkpoint: Path | None = None,
+        resumed: dict[str, Any] | None = None,
+    ):
+        self.command: str = command
+        self.total: int | None = total
+        self.checkpoint: Path | None = checkpoint
+        self.resumed: dict[str, Any] | None = resumed
+        self.started: datetime = datetime.now(timezone.utc)
+        self.start_time: float = time.monotonic()
+        self.records: int = 0
+        self.succeeded: int = 0
+        self.failed: int = 0
+        self.skipped: int = 0
+        self.position: str | None = resumed["position"] if resumed else None
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the run started."""
+        return time.monotonic() - self.start_time
+
+    @property
+    def rate(self) -> float:
+        """Records processed per second."""
+        elapsed: float = self.elapsed
+        return self.records / elapsed if elapsed else 0.0
+
+    def line(self) -> str:
+        """Format the progress line.
+
+        Returns:
+            Line like "Progress: 200/1000 records, 12.3 records/s, ETA 1m05s,
+            2 failed, 1 skipped"
+        """
+        done: str = f"{self.records}/{self.total}" if self.total else str(self.records)
+        parts: list[str] = [f"Progress: {done} records", f"{self.rate:.1f} records/s"]
+        if self.total and self.rate:
+            remaining: int = max(self.total - self.records, 0)
+            parts.append(f"ETA {format_duration(remaining / self.rate)}")
+        parts.append(f"{self.failed} failed")
+        parts.append(f"{self.skipped} skipped")
+        return ", ".join(parts)
+
+    def update(
+        self,
+        position: str,
+        records: int,
+        succeeded: int,
+        failed: int,
+        skipped: int = 0,
+    ) -> None:
+        """Count a processed chunk, print progress, and save a checkpoint.
+
+        Args:
+            position: VAULT URL of the last record of the chunk
+            records: Number of records in the chunk
+            succeeded: Number of updates that succeeded
+            failed: Number of updates that failed and could be retried
+            skipped: Number of updates that were skipped and can't be retried
+        """
+        self.records += records
+        self.succeeded += succeeded
+        self.failed += failed
+        self.skipped += skipped
+        click.echo(self.line(), err=True)
+        # stay before the first failed record so --resume retries it
+        if self.failed:
+            return
+        self.position = position
+        if self.checkpoint:
+            tmp_path: Path = self.checkpoint.with_name(f"{self.checkpoint.name}.tmp")
+            with tmp_path.open("w") as f:
+                json.dump(
+                    {
+                        "command": self.command,
+                        "position": position,
+                        "updated": datetime.now(timezone.utc).isoformat(),
+                    },
+                    f,
+                )
+            os.replace(tmp_path, self.checkpoint)
+
+    def finish(self) -> None:
+        """Remove the checkpoint of a run that processed everything, unless
+        records failed and a resumed run should retry them."""
+        if self.checkpoint and (not self.failed or self.position is None):
+            self.checkpoint.unlink(missing_ok=True)
+
+    def summary(self) -> dict[str, Any]:
+        """Summarize the run for comparing runs.
+
+        Returns:
+            Dict of timing and counts, serializable as JSON
+        """
+        return {
+            "command": self.command,
+            "started": self.started.isoformat(),
+            "finished": datetime.now(timezone.utc).isoformat(),
+            "duration_seconds": round(self.elapsed, 3),
+            "records": self.records,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "records_per_second": round(self.rate, 3),
+            "resumed_from": self.resumed["position"] if self.resumed else None,
+        }
+
+    def write_summary(self, summary_file: str | None) -> None:
+        """Write the summary as JSON to a file, or to stdout for "-".
+
+        Args:
+            summary_file: Path of the file, "-", or None to not write one
+        """
+        if not summary_file:
+            return
+        summary: str = json.dumps(self.summary(), indent=2)
+        if summary_file == "-":
+            click.echo(summary)
+        else:
+            Path(summary_file).write_text(summary + "\n")
+
+
+def start_progress(
+    map_file: str | Path, command: str, kind: str, resume: bool
+) -> BatchProgress:
+    """Set up progress tracking for a batch command's run over an id-map.
+
+    The total for the ETA comes from the map's cached plan, which a dry run
+    creates; without a current plan, progress is reported without an ETA. When
+    resuming, pending records up to the checkpoint are not counted.
+
+    Args:
+        map_file: Path to the id-map file
+        command: Name of the batch command, e.g. "set-owner"
+        kind: Key of the pending work in the plan, e.g. "owners"
+        resume: Whether to pick up after the command's last checkpoint
+
+    Returns:
+        The progress tracker, with its resumed checkpoint if resuming
+    """
+    path: Path = checkpoint_path(map_file, command)
+    resumed: dict[str, Any] | None = read_checkpoint(path) if resume else None
+    if resume and not resumed:
+        click.echo("No checkpoint found, starting from the beginning")
+    elif resumed:
+        click.echo(f"Resuming after {resumed['position']}")
+    plan: dict[str, list[dict[str, Any]]] | None = cached_plan(map_file)
+    total: int | None = len(plan[kind]) if plan else None
+    if plan and resumed:
+        pending: set[str] = {item["vault_url"] for item in plan[kind]}
+        try:
+            total = sum(
+                1
+                for url, _ in skip_entries(iter_id_map(map_file), resumed["position"])
+                if url in pending
+            )
+        except ValueError:
+            total = None  # the run reports that the checkpoint doesn't match
+    return BatchProgress(command, total, path, resumed)
@@ -0,0 +1,196 @@
+"""Skip downloading and processing data blobs that have not changed.
+
+The version (GCS generation and MD5) of every blob a command finished processing
+is kept in a local JSON sidecar file, along with the target it was processed
+into. Before downloading, a command compares the blob's current version to the
+one recorded for the same target and skips the blob if it matches.
+Storage backends are pluggable: a bucket named "file:///some/dir" is served from
+the local filesystem, which lets the commands run and be tested without GCS.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import shutil
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Protocol, TextIO
+
+DEFAULT_CACHE_FILE: str = ".blob-cache.json"
+LOCAL_SCHEME: str = "file://"
+
+
+@dataclass(frozen=True)
+class BlobVersion:
+    """Identifies one version of a blob's content.
+
+    Args:
+        generation: GCS object generation, changes on every upload
+        md5: Base64 MD5 of the content, None if the backend does not provide one
+    """
+
+    generation: str
+    md5: str | None = None
+
+    def matches(self, other: "BlobVersion | None") -> bool:
+        """Whether other has the same content, also true for an identical
+        re-upload that only changed the generation."""
+        if other is None:
+            return False
+        if self.generation == other.generation:
+            return True
+        return self.md5 is not None and self.md5 == other.md5
+
+
+class BlobBackend(Protocol):
+    """Where blobs are read from."""
+
+    def url(self, name: str) -> str: ...
+
+    def version(self, name: str) -> BlobVersion | None: ...
+
+    def download(self, name: str, destination: str, version: BlobVersion) -> None: ...
+
+    def open(self, name: str, version: BlobVersion) -> TextIO: ...
+
+
+class GCSBackend:
+    """Reads blobs from a Google Cloud Storage bucket.
+
+    Downloads and reads are pinned to the generation that was checked, so the
+    content processed is the content that gets recorded.
+    """
+
+    def __init__(self, bucket_name: str):
+        # imported here so the cache and local backend work without GCS
+        from google.cloud import storage
+
+        self.bucket_name: str = bucket_name
+        self.bucket = storage.Client().bucket(bucket_name)
+
+    def url(self, name: str) -> str:
+        return f"gs://{self.bucket_name}/{name}"
+
+    def version(self, name: str) -> BlobVersion | None:
+        blob = self.bucket.get_blob(name)
+        if blob is None:
+            return None
+        return BlobVersion(str(blob.generation), blob.md5_hash)
+
+    def download(self, name: str, destination: str, version: BlobVersion) -> None:
+        blob = self.bucket.blob(name, generation=int(version.generation))
+        blob.download_to_filename(destination)
+
+    def open(self, name: str, version: BlobVersion) -> TextIO:
+        blob = self.bucket.blob(name, generation=int(version.generation))
+        return blob.open("r")
+
+
+class LocalBackend:
+    """Reads blobs from a local directory. The generation is the file's
+    modification time and the MD5 is computed like GCS does."""
+
+    def __init__(self, root: str | Path):
+        self.root: Path = Path(root)
+
+    def url(self, name: str) -> str:
+        return f"{LOCAL_SCHEME}{self.root / name}"
+
+    def version(self, name: str) -> BlobVersion | None:
+        path: Path = self.root / name
+        if not path.is_file():
+            return None
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                md5.update(chunk)
+        return BlobVersion(
+            str(path.stat().st_mtime_ns), base64.b64encode(md5.digest()).decode()
+        )
+
+    def download(self, name: str, destination: str, version: BlobVersion) -> None:
+        shutil.copyfile(self.root / name, destination)
+
+    def open(self, name: str, version: BlobVersion) -> TextIO:
+        return open(self.root / name, "r")
+
+
+def backend_for(bucket: str) -> BlobBackend:
+    """Get the backend for a bucket name, "file:///dir" for a local directory."""
+    if bucket.startswith(LOCAL_SCHEME):
+        return LocalBackend(bucket.removeprefix(LOCAL_SCHEME))
+    return GCSBackend(bucket)
+
+
+class BlobCache:
+    """Tracks which version of each blob was last processed.
+
+    Call changed() before doing any work, and record() then save() once the
+    blob has been processed successfully, so a failed run is retried.
+
+    Args:
+        backend: Where the blobs are read from
+        cache_file: JSON sidecar file of key() -> recorded version
+        force: Treat every blob as changed
+        target: What the blobs are processed into, e.g. an OpenSearch index, so
+            a version processed into one target isn't skipped for another
+    """
+
+    def __init__(
+        self,
+        backend: BlobBackend,
+        cache_file: str | Path = DEFAULT_CACHE_FILE,
+        force: bool = False,
+        target: str = "",
+    ):
+        self.backend: BlobBackend = backend
+        self.path: Path = Path(cache_file)
+        self.force: bool = force
+        self.target: str = target
+        self.versions: dict[str, dict[str, Any]] = {}
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.versions = json.load(f)
+
+    def key(self, name: str) -> str:
+        """The key of a blob's recorded version, its URL and the target."""
+        url: str = self.backend.url(name)
+        return f"{url} -> {self.target}" if self.target else url
+
+    def recorded(self, name: str) -> BlobVersion | None:
+        """The version of a blob that was last processed, if any."""
+        data: dict[str, Any] | None = self.versions.get(self.key(name))
+        return BlobVersion(**data) if data else None
+
+    def changed(self, name: str) -> BlobVersion | None:
+        """Check whether a blob changed since it was last processed.
+
+        Returns:
+            The blob's current version, or None if it is unchanged
+
+        Raises:
+            FileNotFoundError: If the blob does not exist
+        """
+        version: BlobVersion | None = self.backend.version(name)
+        if version is None:
+            raise FileNotFoundError(f"{self.backend.url(name)} does not exist")
+        if not self.force and version.matches(self.recorded(name)):
+            return None
+        return version
+
+    def download(self, name: str, destination: str, version: BlobVersion) -> None:
+        """Download a version of a blob to a local file."""
+        self.backend.download(name, destination, version)
+        print(f"Downloaded {self.backend.url(name)} to {destination}.")
+
+    def record(self, name: str, version: BlobVersion) -> None:
+        """Remember that a version of a blob was processed, see save()."""
+        self.versions[self.key(name)] = asdict(version)
+
+    def save(self) -> None:
+        """Write the recorded versions to the sidecar file atomically."""
+        tmp: Path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.versions, f, indent=2)
+        os.replace(tmp, self.path)
@@ -1,12 +1,31 @@
-import json
 import os
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date
+from itertools import islice
 from typing import Any
 
 import click
-from google.cloud import storage
 from opensearchpy import OpenSearch, helpers
 
+from cca.scripts.blob_cache import BlobCache, BlobVersion, backend_for
+from cca.scripts.json_stream import iter_array_items
+
+COURSES_INDEX: str = "courses"
+# versions of the course JSON indexed into each OpenSearch host
+CACHE_FILE: str = ".courses-index-cache.json"
+# documents per bulk request
+CHUNK_SIZE: int = 500
+# concurrent bulk requests
+THREAD_COUNT: int = 4
+# upper bound on the size of a bulk request, chunks are split to stay below it
+MAX_CHUNK_BYTES: int = 10 * 1024 * 1024
+# retries of documents the cluster rejects with 429 Too Many Requests
+MAX_RETRIES: int = 5
+INITIAL_BACKOFF: int = 2
+MAX_BACKOFF: int = 60
+
 
 def current_term() -> str:
     """Returns the current semester in the form it's used in the courses JSON
@@ -25,41 +44,98 @@ def current_term() -> str:
     return f"{season}_{year}"
 
 
-def download_courses(
-    bucket_name: str,
-    filename: str,
-    destination_filename: str,
-):
-    """Download courses JSON from a Google Cloud Storage bucket."""
-    # TODO authentication
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(filename)
-    blob.download_to_filename(destination_filename)
-    print(f"Downloaded {filename} to {destination_filename}.")
-
-
-def prepare_bulk_data(file_path):
-    """Prepare data for OpenSearch bulk indexing."""
+def prepare_bulk_data(file_path) -> Iterator[dict[str, Any]]:
+    """Yield OpenSearch bulk actions for the courses in a JSON file, parsing one
+    course at a time."""
     with open(file_path, "r") as f:
-        courses: list[dict[str, Any]] = json.load(f)
-
-    # TODO validate course data structure with cca.models.Course
-
-    bulk_data: list[dict[str, Any]] = []
-    for course in courses:
-        bulk_data.append(
-            {"_index": "courses", "_id": course["section_refid"], "_source": course}
-        )
-    return bulk_data
-
-
-def push_to_opensearch(os_host, bulk_data):
-    """Push bulk data to OpenSearch."""
+        # TODO validate course data structure with cca.models.Course
+        for course in iter_array_items(f):
+            yield {
+                "_index": COURSES_INDEX,
+                "_id": course["section_refid"],
+                "_source": course,
+            }
+
+
+def index_chunk(
+    os_client: OpenSearch,
+    chunk: list[dict[str, Any]],
+    max_chunk_bytes: int = MAX_CHUNK_BYTES,
+    max_retries: int = MAX_RETRIES,
+) -> tuple[int, list[dict[str, Any]]]:
+    """Index a chunk of bulk actions, retrying documents rejected with 429 with
+    exponential backoff.
+
+    Returns:
+        Tuple of (number of documents indexed, errors of the failed documents)
+    """
+    indexed: int = 0
+    errors: list[dict[str, Any]] = []
+    for ok, item in helpers.streaming_bulk(
+        os_client,
+        chunk,
+        chunk_size=len(chunk),
+        max_chunk_bytes=max_chunk_bytes,
+        max_retries=max_retries,
+        initial_backoff=INITIAL_BACKOFF,
+        max_backoff=MAX_BACKOFF,
+        raise_on_error=False,
+    ):
+        if ok:
+            indexed += 1
+        else:
+            errors.append(item)
+    return indexed, errors
+
+
+def push_to_opensearch(
+    os_host,
+    bulk_data: Iterable[dict[str, Any]],
+    chunk_size: int = CHUNK_SIZE,
+    thread_count: int = THREAD_COUNT,
+    max_chunk_bytes: int = MAX_CHUNK_BYTES,
+    max_retries: int = MAX_RETRIES,
+) -> int:
+    """Push bulk data to OpenSearch in chunks sent from a pool of threads.
+
+    Only a couple of chunks per thread are read ahead of the ones being sent,
+    so bulk_data can be a generator and memory stays flat however many
+    documents there are.
+
+    Returns:
+        Number of documents indexed
+
+    Raises:
+        click.ClickException: If any documents failed to index
+    """
     # TODO presumably will need to set up authentication
-    os_client = OpenSearch([os_host])
-    helpers.bulk(os_client, bulk_data)
-    print(f"Successfully indexed {len(bulk_data)} documents into OpenSearch.")
+    os_client = OpenSearch([os_host], maxsize=thread_count)
+    indexed: int = 0
+    errors: list[dict[str, Any]] = []
+    actions: Iterator[dict[str, Any]] = iter(bulk_data)
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        in_flight: deque[Future] = deque()
+        while chunk := list(islice(actions, chunk_size)):
+            in_flight.append(
+                executor.submit(
+                    index_chunk, os_client, chunk, max_chunk_bytes, max_retries
+                )
+            )
+            if len(in_flight) >= thread_count * 2:
+                chunk_indexed, chunk_errors = in_flight.popleft().result()
+                indexed += chunk_indexed
+                errors.extend(chunk_errors)
+        for future in in_flight:
+            chunk_indexed, chunk_errors = future.result()
+            indexed += chunk_indexed
+            errors.extend(chunk_errors)
+
+    print(f"Successfully indexed {indexed} documents into OpenSearch.")
+    if errors:
+        for error in errors[:10]:
+            print(f"Failed to index: {error}")
+        raise click.ClickException(f"{len(errors)} documents failed to index")
+    return indexed
 
 
 @click.command()
@@ -67,7 +143,7 @@ def push_to_opensearch(os_host, bulk_data):
 @click.option(
     "--bucket",
     default=lambda: os.getenv("COURSES_BUCKET_NAME", "int_files_source"),
-    help="The name of the Google Cloud Storage bucket.",
+    help="The name of the Google Cloud Storage bucket, or file:///dir for a local directory.",
     type=click.STRING,
 )
 @click.option(
@@ -91,13 +167,73 @@ def push_to_opensearch(os_host, bulk_data):
     type=click.STRING,
 )
 @click.option("--delete", help="Delete the local course file afterwards", is_flag=True)
+@click.option(
+    "--chunk-size",
+    default=CHUNK_SIZE,
+    show_default=True,
+    help="Number of documents per bulk request.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--threads",
+    default=THREAD_COUNT,
+    show_default=True,
+    help="Number of bulk requests to send at once.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-chunk-bytes",
+    default=MAX_CHUNK_BYTES,
+    show_default=True,
+    help="Maximum size of a bulk request in bytes.",
+    type=click.IntRange(min=1),
+)
+@click.option(
+    "--max-retries",
+    default=MAX_RETRIES,
+    show_default=True,
+    help="Times to retry documents rejected with 429 Too Many Requests, with exponential backoff.",
+    type=click.IntRange(min=0),
+)
+@click.option(
+    "--cache-file",
+    default=lambda: os.getenv("BLOB_CACHE_FILE", CACHE_FILE),
+    help="File recording the versions of the course JSON already indexed.",
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--force",
+    help="Index the courses even if the blob has not changed since the last run",
+    is_flag=True,
+)
 def courses_index(
-    bucket: str, filename: str, destination_filename: str, os_host: str, delete: bool
+    bucket: str,
+    filename: str,
+    destination_filename: str,
+    os_host: str,
+    delete: bool,
+    cache_file: str,
+    force: bool,
+    chunk_size: int,
+    threads: int,
+    max_chunk_bytes: int,
+    max_retries: int,
 ):
-    """Download course JSON from the Integrations bucket, format it for bulk addition to OpenSearch, and push it to the "courses" index. By default, the bucket name is "int_files_source", the blob name is "course_section_data_AP_<current_term>.json", and the OpenSearch host is "http://localhost:9200"."""
-    download_courses(bucket, filename, destination_filename)
-    bulk_data: list[dict[str, Any]] = prepare_bulk_data(destination_filename)
-    push_to_opensearch(os_host, bulk_data)
+    """Download course JSON from the Integrations bucket, format it for bulk addition to OpenSearch, and push it to the "courses" index. By default, the bucket name is "int_files_source", the blob name is "course_section_data_AP_<current_term>.json", and the OpenSearch host is "http://localhost:9200". Nothing is done if the blob has not changed since it was last indexed into the same host, unless --force is passed."""
+    cache: BlobCache = BlobCache(
+        backend_for(bucket), cache_file, force, f"{os_host}/{COURSES_INDEX}"
+    )
+    version: BlobVersion | None = cache.changed(filename)
+    if version is None:
+        print(f"{cache.backend.url(filename)} has not changed since it was indexed.")
+        return
+    cache.download(filename, destination_filename, version)
+    bulk_data: Iterator[dict[str, Any]] = prepare_bulk_data(destination_filename)
+    push_to_opensearch(
+        os_host, bulk_data, chunk_size, threads, max_chunk_bytes, max_retries
+    )
+    cache.record(filename, version)
+    cache.save()
     if delete:
         os.remove(destination_filename)
 
@@ -1,15 +1,64 @@
+import hashlib
 import json
 import os
 import re
+import resource
 import subprocess
-from typing import Any, Dict, List
+import sys
+import time
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any, Dict, TextIO
 
 import click
 from flask import current_app
 from flask.cli import with_appcontext
-from google.cloud import storage
+from invenio_accounts.models import Role, User, userrole
+from invenio_db import db
+from invenio_users_resources.proxies import current_groups_service
+from opensearchpy import OpenSearch, helpers
+from sqlalchemy import delete, func, insert, select, tuple_
 from werkzeug.local import LocalProxy
 
+from cca.scripts.batch_utils import IndexQueue
+from cca.scripts.blob_cache import (
+    BlobBackend,
+    BlobCache,
+    BlobVersion,
+    backend_for,
+)
+from cca.scripts.json_stream import DEFAULT_CHUNK_SIZE, iter_array_items
+
+# the sync manages the members of every role with these suffixes, removing
+# anyone who is not in the Workday data
+STUDENT_SUFFIX: str = "_majors"
+EMPLOYEE_SUFFIX: str = "_faculty"
+# membership changes per commit, bounds the session and statement size
+BATCH_SIZE: int = 1000
+# versions of the Workday reports already synced
+CACHE_FILE: str = ".groups-sync-cache.json"
+# property of the Workday reports that holds the rows
+REPORT_KEY: str = "Report_Entry"
+# course groups are built from the sections courses_index loaded, grouped by
+# one of these section fields. Their suffixes must not end with each other or
+# the suffixes above, or one sync would remove the members of the other's roles.
+COURSES_INDEX: str = "courses"
+COURSE_GROUP_FIELDS: dict[str, str] = {
+    "section": "section_code",
+    "department": "department_code",
+}
+# group by -> (instructor role suffix, student role suffix)
+COURSE_SUFFIXES: dict[str, tuple[str, str]] = {
+    "section": ("_section_instructors", "_section_students"),
+    "department": ("_dept_instructors", "_dept_students"),
+}
+# section fields with lists of people, objects with an email or username
+INSTRUCTORS_FIELD: str = "instructors"
+STUDENTS_FIELD: str = "students"
+
 
 class MockDatastore:
     def add_role_to_user(self, email: str, role: str) -> None:
@@ -25,13 +74,32 @@ class MockDatastore:
         pass
 
 
-def download_blob(bucket_name: str, filename: str, destination_filename: str) -> None:
-    """Download a blob from GCS to a local file."""
-    client = storage.Client()
-    bucket = client.bucket(bucket_name)
-    blob = bucket.blob(filename)
-    blob.download_to_filename(destination_filename)
-    print(f"Downloaded {filename} to {destination_filename}.")
+def report_entries(
+    f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of a Workday report one at a time without loading the
+    whole document, reading chunk_size characters at a time.
+
+    Raises:
+        json.JSONDecodeError: If the report is not valid JSON or its rows are not
+            an array
+    """
+    return iter_array_items(f, REPORT_KEY, chunk_size)
+
+
+def iter_report_file(filename: str) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of a local Workday report file."""
+    with open(filename, "r") as f:
+        yield from report_entries(f)
+
+
+def iter_report_blob(
+    backend: BlobBackend, filename: str, version: BlobVersion
+) -> Iterator[Dict[str, Any]]:
+    """Yield the rows of a version of a Workday report read straight from its
+    blob, without a local file."""
+    with backend.open(filename, version) as f:
+        yield from report_entries(f)
 
 
 def slugify(name: str) -> str:
@@ -77,16 +145,23 @@ def add_user_to_role(
         print(f"User does not exist: {email}")
 
 
-def process_students(
-    students: List[Dict[str, Any]], create_groups: bool, datastore=None
-) -> None:
-    """Create/populate groups for student data.
+@dataclass
+class Group:
+    """A role the sync manages and the emails of the people who belong in it."""
+
+    id: str
+    description: str
+    members: set[str] = field(default_factory=set)
+
+
+def student_groups(students: Iterable[Dict[str, Any]]) -> dict[str, Group]:
+    """Build the "<Program> Majors" groups students belong in.
 
     students is expected to be a list of objects with at least:
       - inst_email: student email
       - programs: array of program names (can be empty)
     """
-    groups: set[str] = set()  # program_name -> group_id
+    groups: dict[str, Group] = {}
 
     for s in students:
         email: str | None = s.get("inst_email")
@@ -100,30 +175,24 @@ def process_students(
 
         # filter to majors
         for prog in filter(lambda p: p.get("program_type") == "Major", programs):
-            group_id: str = f"{slugify(prog['program'])}_majors"
-            group_name: str = f"{prog['program']} Majors"
-
+            group_id: str = f"{slugify(prog['program'])}{STUDENT_SUFFIX}"
             if group_id not in groups:
-                groups.add(group_id)
-                if create_groups:
-                    create_role(group_id, group_name, datastore)
+                groups[group_id] = Group(group_id, f"{prog['program']} Majors")
+            groups[group_id].members.add(email.lower())
 
-            # add the user to the group
-            add_user_to_role(email, group_id, datastore)
+    return groups
 
 
 # ! this will not add program admins to faculty group e.g. pacenti
-def process_employees(
-    employees: List[Dict[str, Any]], create_groups: bool, datastore=None
-) -> None:
-    """Create/populate groups for employee (faculty) data. We don't do anything
-    with staff accounts yet.
+def employee_groups(employees: Iterable[Dict[str, Any]]) -> dict[str, Group]:
+    """Build the "<Program> Faculty" groups employees belong in. We don't do
+    anything with staff accounts yet.
 
     employees is expected to be a list of objects with at least:
       - work_email: employee email
       - program: program name (string, can be null)
     """
-    groups: set[str] = set()
+    groups: dict[str, Group] = {}
 
     for e in employees:
         email: str | None = e.get("work_email")
@@ -138,15 +207,557 @@ def process_employees(
             print(f"Skipping employee {email} without program")
             continue
 
-        group_id: str = f"{slugify(prog)}_faculty"
-        group_name: str = f"{prog} Faculty"
-
+        group_id: str = f"{slugify(prog)}{EMPLOYEE_SUFFIX}"
         if group_id not in groups:
-            groups.add(group_id)
-            if create_groups:
-                create_role(group_id, group_name, datastore)
+            groups[group_id] = Group(group_id, f"{prog} Faculty")
+        groups[group_id].members.add(email.lower())
+
+    return groups
+
+
+def person_email(person: Dict[str, Any] | str) -> str | None:
+    """Get the lowercase email of a person listed in a course section.
+
+    People are objects with an email or username, or bare usernames; usernames
+    are turned into @cca.edu addresses.
+    """
+    if isinstance(person, str):
+        username: str | None = person
+    else:
+        email: str | None = person.get("email") or person.get("inst_email")
+        if email:
+            return email.lower()
+        username = person.get("username")
+    return f"{username.lower()}@cca.edu" if username else None
+
+
+def course_groups(
+    sections: Iterable[Dict[str, Any]], group_by: str = "section"
+) -> tuple[dict[str, Group], dict[str, Group]]:
+    """Build instructor and student groups from course sections.
+
+    Args:
+        sections: Course section documents
+        group_by: "section" for a pair of groups per section or "department"
+            for a pair per department
+
+    Returns:
+        Tuple of (instructor groups, student groups) by role name
+    """
+    field_name: str = COURSE_GROUP_FIELDS[group_by]
+    instructor_suffix, student_suffix = COURSE_SUFFIXES[group_by]
+    instructors: dict[str, Group] = {}
+    students: dict[str, Group] = {}
+
+    for section in sections:
+        key: str | None = section.get(field_name)
+        if not key:
+            print(
+                f"Skipping section {section.get('section_refid')} without {field_name}"
+            )
+            continue
+        for groups, people_field, suffix, title in (
+            (instructors, INSTRUCTORS_FIELD, instructor_suffix, "Instructors"),
+            (students, STUDENTS_FIELD, student_suffix, "Students"),
+        ):
+            for person in section.get(people_field) or []:
+                email: str | None = person_email(person)
+                if not email:
+                    continue
+                group_id: str = f"{slugify(key)}{suffix}"
+                if group_id not in groups:
+                    groups[group_id] = Group(group_id, f"{key} {title}")
+                groups[group_id].members.add(email)
+
+    return instructors, students
+
+
+def scan_course_sections(
+    client: OpenSearch, group_by: str = "section"
+) -> Iterator[Dict[str, Any]]:
+    """Yield every section in the courses index with one scrolled query that
+    only returns the fields course_groups needs."""
+    query: dict[str, Any] = {
+        "query": {"match_all": {}},
+        "_source": [
+            "section_refid",
+            COURSE_GROUP_FIELDS[group_by],
+            INSTRUCTORS_FIELD,
+            STUDENTS_FIELD,
+        ],
+    }
+    for hit in helpers.scan(client, index=COURSES_INDEX, query=query, size=1000):
+        yield hit["_source"]
+
+
+def load_roles(
+    suffix: str, people: Iterable[str] | None = None
+) -> tuple[dict[str, str], dict[str, set[str]]]:
+    """Load every role whose name ends with suffix and its members in one query.
+
+    Args:
+        suffix: Role name suffix, e.g. "_majors"
+        people: Only load these members (lowercase emails), None for everyone
+
+    Returns:
+        Tuple of (role name -> role id, role name -> set of lowercase member
+        emails). Roles without (matching) members have an empty set.
+    """
+    member_q = select(userrole.c.role_id, User.email).join(
+        User, User.id == userrole.c.user_id
+    )
+    if people is not None:
+        member_q = member_q.where(func.lower(User.email).in_(set(people)))
+    member_q = member_q.subquery()
+    rows = (
+        db.session.query(Role.name, Role.id, member_q.c.email)
+        .outerjoin(member_q, member_q.c.role_id == Role.id)
+        .filter(Role.name.endswith(suffix, autoescape=True))
+    )
+    roles: dict[str, str] = {}
+    memberships: dict[str, set[str]] = {}
+    for role_name, role_id, email in rows:
+        roles[role_name] = role_id
+        members: set[str] = memberships.setdefault(role_name, set())
+        if email:
+            members.add(email.lower())
+    return roles, memberships
+
+
+def load_users(emails: Iterable[str]) -> dict[str, int]:
+    """Look up the accounts of a set of people in one query.
 
-        add_user_to_role(email, group_id, datastore)
+    Args:
+        emails: Lowercase emails
+
+    Returns:
+        Dict of lowercase email -> user id for the emails that have an account
+    """
+    emails = set(emails)
+    if not emails:
+        return {}
+    rows = db.session.query(User.email, User.id).filter(
+        func.lower(User.email).in_(emails)
+    )
+    return {email.lower(): user_id for email, user_id in rows}
+
+
+def diff_memberships(
+    desired: dict[str, set[str]], current: dict[str, set[str]]
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Work out the membership changes that turn current into desired.
+
+    Roles in current but not desired lose all their members.
+
+    Args:
+        desired: Dict of role name -> member emails there should be
+        current: Dict of role name -> member emails there are
+
+    Returns:
+        Tuple of (additions, removals), dicts of role name -> emails, without
+        roles that have nothing to add or remove
+    """
+    additions: dict[str, set[str]] = {}
+    removals: dict[str, set[str]] = {}
+    for role, members in desired.items():
+        added: set[str] = members - current.get(role, set())
+        if added:
+            additions[role] = added
+    for role, members in current.items():
+        removed: set[str] = members - desired.get(role, set())
+        if removed:
+            removals[role] = removed
+    return additions, removals
+
+
+def create_missing_roles(
+    groups: dict[str, Group], roles: dict[str, str], datastore
+) -> set[str]:
+    """Create the roles of groups that are not in roles and add their ids to it.
+
+    Args:
+        groups: Desired groups by role name
+        roles: Dict of existing role name -> role id, updated in place
+        datastore: Invenio accounts datastore
+
+    Returns:
+        Names of the created roles
+    """
+    created: list = []
+    for group in groups.values():
+        if group.id not in roles:
+            created.append(
+                datastore.create_role(name=group.id, description=group.description)
+            )
+            print(f"Created role {group.id}")
+    if created:
+        # assigns the new role ids
+        db.session.flush()
+        roles.update((role.name, role.id) for role in created)
+    return {role.name for role in created}
+
+
+def membership_rows(
+    changes: dict[str, set[str]], users: dict[str, int], roles: dict[str, str]
+) -> list[dict[str, Any]]:
+    """Turn role name -> emails changes into userrole rows.
+
+    Changes to roles that do not exist are skipped with a message; emails
+    without an account are expected to be filtered out beforehand.
+
+    Args:
+        changes: Dict of role name -> emails
+        users: Dict of lowercase email -> user id
+        roles: Dict of role name -> role id
+
+    Returns:
+        List of {"user_id", "role_id"} dicts
+    """
+    rows: list[dict[str, Any]] = []
+    for role, emails in sorted(changes.items()):
+        role_id: str | None = roles.get(role)
+        if role_id is None:
+            print(f"Role {role} does not exist, skipping {len(emails)} members")
+            continue
+        rows.extend(
+            {"user_id": users[email], "role_id": role_id} for email in sorted(emails)
+        )
+    return rows
+
+
+def apply_membership_changes(
+    additions: dict[str, set[str]],
+    removals: dict[str, set[str]],
+    users: dict[str, int],
+    roles: dict[str, str],
+    batch_size: int = BATCH_SIZE,
+) -> None:
+    """Add and remove role members with bulk statements, committing every
+    batch_size changes and clearing the session after each commit.
+
+    Args:
+        additions: Dict of role name -> emails to add
+        removals: Dict of role name -> emails to remove
+        users: Dict of lowercase email -> user id of everyone in the changes
+        roles: Dict of role name -> role id of every role in the changes
+        batch_size: Number of membership changes per statement and commit
+    """
+    added: list[dict[str, Any]] = membership_rows(additions, users, roles)
+    for i in range(0, len(added), batch_size):
+        db.session.execute(insert(userrole), added[i : i + batch_size])
+        commit_batch()
+    removed: list[dict[str, Any]] = membership_rows(removals, users, roles)
+    for i in range(0, len(removed), batch_size):
+        pairs = [
+            (row["user_id"], row["role_id"]) for row in removed[i : i + batch_size]
+        ]
+        db.session.execute(
+            delete(userrole).where(
+                tuple_(userrole.c.user_id, userrole.c.role_id).in_(pairs)
+            )
+        )
+        commit_batch()
+
+
+def commit_batch() -> None:
+    """Commit and drop all objects from the session so it does not grow."""
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def peak_rss_mb() -> float:
+    """Peak resident memory of this process in megabytes."""
+    rss: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def count_members(memberships: dict[str, set[str]]) -> int:
+    """Count the memberships in a dict of role name -> emails."""
+    return sum(len(emails) for emails in memberships.values())
+
+
+def sync_groups(
+    groups: dict[str, Group],
+    suffix: str,
+    create_groups: bool,
+    datastore=None,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+    changed_roles: set[str] | None = None,
+    people: set[str] | None = None,
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Make the members of every role ending with suffix match groups.
+
+    Loads the roles, their current members and the accounts of everyone
+    involved up front, then applies only the additions and removals needed in
+    bulk. People without an account are skipped. Without a datastore, nothing
+    is loaded and every membership is printed as an addition.
+
+    Args:
+        groups: Desired groups by role name
+        suffix: Role name suffix of the roles the sync manages, e.g. "_majors"
+        create_groups: Create the roles before adding members
+        datastore: Invenio accounts datastore, or None to only print
+        dry_run: Only print the size of the changes
+        batch_size: Number of membership changes per commit
+        changed_roles: Set the ids of created roles and roles whose members
+            changed are added to, e.g. to reindex them
+        people: Only sync the memberships of these people (lowercase emails),
+            leaving everyone else's alone; None syncs everyone
+
+    Returns:
+        Tuple of (additions, removals), dicts of role name -> emails
+    """
+    if not groups and people is None:
+        # an empty or truncated report must not remove everyone from the groups
+        print(f"No {suffix.strip('_')} groups in the data, not changing any groups")
+        return {}, {}
+    desired: dict[str, set[str]] = {g.id: g.members for g in groups.values()}
+    roles: dict[str, str] = {}
+    current: dict[str, set[str]] = {}
+    users: dict[str, int] = {}
+    if datastore is not None:
+        roles, current = load_roles(suffix, people)
+        # only people with an account can be members
+        users = load_users(set().union(*desired.values(), *current.values()))
+        desired = {
+            role: {email for email in members if email in users}
+            for role, members in desired.items()
+        }
+        missing: int = len(
+            set().union(*(g.members for g in groups.values())) - users.keys()
+        )
+        if missing:
+            print(f"Skipping {missing} people without an account")
+    additions, removals = diff_memberships(desired, current)
+    prefix: str = "Dry run: would make" if dry_run else "Applying"
+    print(
+        f"{prefix} {count_members(additions)} additions and {count_members(removals)} "
+        f"removals across {len(set(additions) | set(removals))} of {len(groups)} {suffix.strip('_')} groups"
+    )
+    if dry_run:
+        return additions, removals
+
+    if datastore is None:
+        if create_groups:
+            for group in groups.values():
+                create_role(group.id, group.description, datastore)
+        for role, emails in additions.items():
+            for email in sorted(emails):
+                add_user_to_role(email, role, datastore)
+    else:
+        created: set[str] = set()
+        if create_groups:
+            created = create_missing_roles(groups, roles, datastore)
+        apply_membership_changes(additions, removals, users, roles, batch_size)
+        if changed_roles is not None:
+            changed_roles.update(
+                roles[role]
+                for role in created | additions.keys() | removals.keys()
+                if role in roles
+            )
+    return additions, removals
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    """Hash the content of a report row, independent of key order."""
+    data: str = json.dumps(row, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def person_hash(row_hashes: Iterable[str]) -> str:
+    """Hash all of a person's report rows together, independent of row order."""
+    return hashlib.sha256("".join(sorted(row_hashes)).encode()).hexdigest()
+
+
+def read_sync_state(state_file: str | Path) -> dict[str, dict[str, Any]]:
+    """Read the state of incremental syncs, empty if there is none yet.
+
+    Returns:
+        Dict of report kind -> {"version", "people"}: the BlobVersion of the
+        report that was last synced, as a dict, and lowercase email ->
+        {"hash", "roles"} of each person's rows as they were last synced
+    """
+    path: Path = Path(state_file)
+    if not path.exists():
+        return {}
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def write_sync_state(state_file: str | Path, state: dict[str, dict[str, Any]]) -> None:
+    """Write the state of incremental syncs atomically."""
+    path: Path = Path(state_file)
+    tmp: Path = path.with_name(f"{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def sync_changed(
+    rows: Iterable[Dict[str, Any]],
+    build: Callable[[Iterable[Dict[str, Any]]], dict[str, Group]],
+    suffix: str,
+    email_key: str,
+    state: dict[str, Any],
+    create_groups: bool,
+    datastore,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+    changed_roles: set[str] | None = None,
+    full: bool = False,
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Sync only the people whose report rows changed since the last sync.
+
+    A person can have several rows, e.g. an employee on faculty in two
+    programs, so all of a person's rows are hashed together. Each row's groups
+    are worked out as it streams past and kept per person; once the report is
+    read, only the people whose combined hash differs from the state are
+    turned into groups, and only the memberships of those people and of people
+    who left the report are loaded and changed. Without any state (the first
+    run) or with full, every person is synced like sync_groups does.
+
+    Args:
+        rows: Report rows, consumed once
+        build: student_groups or employee_groups
+        suffix: Role name suffix of the roles the sync manages, e.g. "_majors"
+        email_key: Row property with the person's email, e.g. "inst_email"
+        state: Dict of lowercase email -> {"hash", "roles"} for this kind of
+            report, updated in place unless dry_run. People without an account
+            are not recorded so they are synced once they have one.
+        full: Sync every person and membership, not just the changed ones
+
+    See sync_groups for the other arguments and the return.
+    """
+    full = full or not state
+    row_hashes: dict[str, list[str]] = {}
+    person_roles: dict[str, set[str]] = {}
+    descriptions: dict[str, str] = {}
+    for row in rows:
+        # rows without an email or groups are skipped with a message by build
+        for group in build([row]).values():
+            descriptions[group.id] = group.description
+            for email in group.members:
+                person_roles.setdefault(email, set()).add(group.id)
+        email: str = (row.get(email_key) or "").lower()
+        if email:
+            row_hashes.setdefault(email, []).append(row_hash(row))
+
+    if not row_hashes:
+        print(f"No people in the {suffix.strip('_')} data, not changing any groups")
+        return {}, {}
+    hashes: dict[str, str] = {}
+    for email, digests in row_hashes.items():
+        digest: str = person_hash(digests)
+        if full or state.get(email, {}).get("hash") != digest:
+            hashes[email] = digest
+    gone: set[str] = set(state) - row_hashes.keys()
+    print(
+        f"{len(row_hashes)} people in the data, {len(hashes)} changed and "
+        f"{len(gone)} gone{' (full sync)' if full else ''}"
+    )
+    people: set[str] | None = None if full else hashes.keys() | gone
+    if people is not None and not people:
+        return {}, {}
+
+    groups: dict[str, Group] = {}
+    for email in hashes:
+        for role in person_roles.get(email, ()):
+            if role not in groups:
+                groups[role] = Group(role, descriptions[role])
+            groups[role].members.add(email)
+
+    additions, removals = sync_groups(
+        groups,
+        suffix,
+        create_groups,
+        datastore,
+        dry_run,
+        batch_size,
+        changed_roles,
+        people,
+    )
+    if dry_run:
+        return additions, removals
+
+    # without a datastore nothing is looked up, so record everyone
+    accounts: Iterable[str] = hashes if datastore is None else load_users(hashes)
+    for email in gone:
+        del state[email]
+    for email, digest in hashes.items():
+        if email in accounts:
+            state[email] = {
+                "hash": digest,
+                "roles": sorted(person_roles.get(email, ())),
+            }
+        else:
+            state.pop(email, None)
+    return additions, removals
+
+
+def process_students(
+    students: Iterable[Dict[str, Any]],
+    create_groups: bool,
+    datastore=None,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Create/populate "<Program> Majors" groups for student data.
+
+    students can be a generator, it is consumed once. See student_groups for
+    the expected data and sync_groups for the return.
+    """
+    groups: dict[str, Group] = student_groups(students)
+    return sync_groups(
+        groups, STUDENT_SUFFIX, create_groups, datastore, dry_run, batch_size
+    )
+
+
+def process_employees(
+    employees: Iterable[Dict[str, Any]],
+    create_groups: bool,
+    datastore=None,
+    dry_run: bool = False,
+    batch_size: int = BATCH_SIZE,
+) -> tuple[dict[str, set[str]], dict[str, set[str]]]:
+    """Create/populate "<Program> Faculty" groups for employee (faculty) data.
+
+    employees can be a generator, it is consumed once. See employee_groups for
+    the expected data and sync_groups for the return.
+    """
+    groups: dict[str, Group] = employee_groups(employees)
+    return sync_groups(
+        groups, EMPLOYEE_SUFFIX, create_groups, datastore, dry_run, batch_size
+    )
+
+
+def open_report(
+    kind: str,
+    cache: BlobCache,
+    blob_name: str,
+    dest: str,
+    version: BlobVersion,
+    stream: bool,
+) -> Iterator[Dict[str, Any]]:
+    """Get a generator over the rows of a version of a report, downloading it to
+    dest first unless it is streamed."""
+    url: str = cache.backend.url(blob_name)
+    if stream:
+        click.echo(f"Streaming {kind} from {url}")
+        return iter_report_blob(cache.backend, blob_name, version)
+    click.echo(f"Downloading {kind} from {url} -> {dest}")
+    cache.download(blob_name, dest, version)
+    return iter_report_file(dest)
+
+
+def report_groups(
+    build: Callable[[Iterable[Dict[str, Any]]], dict[str, Group]],
+    open_rows: Callable[[], Iterator[Dict[str, Any]]],
+) -> dict[str, Group]:
+    """Download (if needed) and parse a report into groups. Does not touch the
+    database so the reports can be read in worker threads."""
+    return build(open_rows())
 
 
 @click.command()
@@ -154,7 +765,7 @@ def process_employees(
 @click.option(
     "--bucket",
     default=lambda: os.getenv("USERS_BUCKET_NAME", "integration-success"),
-    help="GCS bucket name to download from",
+    help="GCS bucket name to download from, or file:///dir to read a local directory",
     type=click.STRING,
 )
 @click.option(
@@ -181,6 +792,41 @@ def process_employees(
     help="Local filename for student data (student_data.json)",
     type=click.Path(),
 )
+@click.option(
+    "--stream",
+    is_flag=True,
+    help="Parse the reports straight from GCS without writing the local files",
+)
+@click.option(
+    "--cache-file",
+    default=lambda: os.getenv("BLOB_CACHE_FILE", CACHE_FILE),
+    help="File recording the versions of the reports already synced",
+    type=click.Path(dir_okay=False),
+)
+@click.option(
+    "--force",
+    is_flag=True,
+    help="Sync the reports even if they have not changed since the last sync",
+)
+@click.option(
+    "--courses",
+    is_flag=True,
+    help="Sync instructors and students into course groups built from the courses index",
+)
+@click.option(
+    "--course-groups",
+    "group_by",
+    default="section",
+    show_default=True,
+    help="Make course groups per section or per department",
+    type=click.Choice(list(COURSE_GROUP_FIELDS)),
+)
+@click.option(
+    "--os-host",
+    default=lambda: os.getenv("COURSES_OS_HOST", "http://localhost:9200"),
+    help="OpenSearch host with the courses index",
+    type=click.STRING,
+)
 @click.option("--employees", is_flag=True, help="Process employees/faculty data")
 @click.option("--students", is_flag=True, help="Process students data")
 @click.option(
@@ -191,15 +837,27 @@ def process_employees(
 @click.option(
     "--reindex",
     is_flag=True,
-    help="Reindex groups after updating (runs invenio rdm rebuild-all-indices -o groups)",
+    help="Reindex the groups that changed after updating",
+)
+@click.option(
+    "--full-reindex",
+    is_flag=True,
+    help="Rebuild the whole groups index after updating (runs invenio rdm rebuild-all-indices -o groups)",
 )
 @click.option(
     "--dry-run",
     "-n",
     is_flag=True,
-    help="Print the Invenio commands instead of executing them",
+    help="Print how many memberships would be added and removed without changing them",
+)
+@click.option(
+    "--batch-size",
+    "-b",
+    default=BATCH_SIZE,
+    show_default=True,
+    help="Commit after this many membership changes",
+    type=click.IntRange(min=1),
 )
-# TODO sync faculty groups from a courses JSON file, too
 @with_appcontext
 def groups_sync(
     bucket: str,
@@ -207,91 +865,184 @@ def groups_sync(
     student_blob: str,
     employee_dest: str,
     student_dest: str,
+    stream: bool,
+    cache_file: str,
+    force: bool,
+    courses: bool,
+    group_by: str,
+    os_host: str,
     employees: bool,
     students: bool,
     create_groups: bool,
     reindex: bool,
+    full_reindex: bool,
     dry_run: bool,
+    batch_size: int,
 ):
     """Download employee and/or student JSON from GCS and add users to Invenio groups.
 
     Students are added to "<Program Name> Majors" groups (based on the "programs" array).
     Faculty/employees are added to "<Program Name> Faculty" groups (based on the "program" property).
 
-    Use --create-groups to run `invenio roles create GROUP_ID -d "Group Name"` before adding members.
-    Use -n or --dry-run to only print the commands that would be run.
+    Members are only added or removed where the groups differ from the data, and
+    people no longer in a group's data are removed from it.
+
+    Use --create-groups to create missing groups before adding members.
+    Use --reindex to reindex the groups that changed, or --full-reindex to
+    rebuild the whole groups index.
+    Use -n or --dry-run to only print the size of the changes.
+    Use --stream to read the reports from GCS without downloading them first.
+    Use --courses to also sync "<Section> Instructors" and "<Section> Students"
+    groups (or per department with --course-groups department) from the
+    courses index.
+    Both reports are downloaded and parsed at the same time.
+    Reports that have not changed since the last sync are skipped, and if none
+    changed nothing is done. Use --force to sync them anyway.
+    Changes are committed every --batch-size memberships to bound memory use.
     """
-    if not (employees or students):
+    if not (employees or students or courses):
         click.echo(
-            "Error: pass either --employees and/or --students flag(s).", err=True
+            "Error: pass any of the --employees, --students, and --courses flags.",
+            err=True,
         )
         return exit(1)
 
     datastore = LocalProxy(lambda: current_app.extensions["security"].datastore)
+    start: float = time.monotonic()
+    added: int = 0
+    removed: int = 0
 
+    reports: list = []
     if employees:
-        emp_data = None
-        if dry_run:
-            if os.path.exists(employee_dest):
-                click.echo(f"Dry run: no download, using local {employee_dest}")
-                with open(employee_dest, "r") as f:
-                    emp_data = json.load(f).get("Report_Entry")
-            else:
-                click.echo(
-                    f"Dry run: no local {employee_dest} found; skipping employees processing"
-                )
-        else:
-            click.echo(
-                f"Downloading employees from gs://{bucket}/{employee_blob} -> {employee_dest}"
+        reports.append(
+            (
+                "employees",
+                employee_blob,
+                employee_dest,
+                employee_groups,
+                EMPLOYEE_SUFFIX,
             )
-            download_blob(bucket, employee_blob, employee_dest)
-            with open(employee_dest, "r") as f:
-                emp_data = json.load(f).get("Report_Entry")
-
-        if not emp_data:
-            click.echo("No employee data to process", err=True)
-        elif not isinstance(emp_data, list):
-            click.echo(
-                "Employee data is not a list; aborting employees processing", err=True
-            )
-        else:
-            process_employees(emp_data, create_groups, datastore)
-
+        )
     if students:
-        stu_data = None
-        if dry_run:
-            if os.path.exists(student_dest):
-                click.echo(f"Dry run: no download, using local {student_dest}")
-                with open(student_dest, "r") as f:
-                    stu_data = json.load(f).get("Report_Entry")
-            else:
+        reports.append(
+            ("students", student_blob, student_dest, student_groups, STUDENT_SUFFIX)
+        )
+
+    # (kind, group builder, function that opens the rows, suffix, blob name, version)
+    pending: list[tuple] = []
+    cache: BlobCache | None = None
+    if dry_run:
+        for kind, blob_name, dest, build, suffix in reports:
+            if not os.path.exists(dest):
                 click.echo(
-                    f"Dry run: no local {student_dest} found; skipping students processing"
+                    f"Dry run: no local {dest} found; skipping {kind} processing"
                 )
-        else:
-            click.echo(
-                f"Downloading students from gs://{bucket}/{student_blob} -> {student_dest}"
+                continue
+            click.echo(f"Dry run: no download, using local {dest}")
+            open_rows = partial(iter_report_file, dest)
+            pending.append((kind, build, open_rows, suffix, blob_name, None))
+    else:
+        # a sync that skipped missing roles doesn't count for one creating them
+        target: str = "groups --create-groups" if create_groups else "groups"
+        cache = BlobCache(backend_for(bucket), cache_file, force, target)
+        for kind, blob_name, dest, build, suffix in reports:
+            try:
+                version: BlobVersion | None = cache.changed(blob_name)
+            except FileNotFoundError as e:
+                click.echo(f"Error: {e}", err=True)
+                return exit(1)
+            if version is None:
+                click.echo(
+                    f"{kind.capitalize()} report {cache.backend.url(blob_name)} has not "
+                    "changed since the last sync; skipping"
+                )
+                continue
+            open_rows = partial(
+                open_report, kind, cache, blob_name, dest, version, stream
             )
-            download_blob(bucket, student_blob, student_dest)
-            with open(student_dest, "r") as f:
-                stu_data = json.load(f).get("Report_Entry")
-
-        if not stu_data:
-            click.echo("No student data to process", err=True)
-        elif not isinstance(stu_data, list):
-            click.echo(
-                "Student data is not a list; aborting students processing", err=True
+            pending.append((kind, build, open_rows, suffix, blob_name, version))
+        if not pending and not courses:
+            click.echo("No report has changed since the last sync; nothing to do")
+            return
+
+    # download and parse the reports concurrently, then sync each one's groups
+    # as soon as it is ready; database work stays on this thread
+    synced: list[tuple[str, BlobVersion]] = []
+    changed_roles: set[str] = set()
+    with ThreadPoolExecutor(max_workers=len(pending) or 1) as executor:
+        futures = {
+            executor.submit(report_groups, build, open_rows): (
+                kind,
+                suffix,
+                blob_name,
+                version,
             )
-        else:
-            process_students(stu_data, create_groups, datastore)
+            for kind, build, open_rows, suffix, blob_name, version in pending
+        }
+        for future in as_completed(futures):
+            kind, suffix, blob_name, version = futures[future]
+            try:
+                groups: dict[str, Group] = future.result()
+            except json.JSONDecodeError as e:
+                click.echo(f"Unable to parse {kind} data, skipping: {e}", err=True)
+                continue
+            additions, removals = sync_groups(
+                groups,
+                suffix,
+                create_groups,
+                datastore,
+                dry_run,
+                batch_size,
+                changed_roles,
+            )
+            added += count_members(additions)
+            removed += count_members(removals)
+            synced.append((blob_name, version))
+
+    if courses:
+        # the course groups are one query on the index, not a downloaded report
+        click.echo(f"Reading course sections from {os_host}")
+        sections = scan_course_sections(OpenSearch([os_host]), group_by)
+        for groups, suffix in zip(
+            course_groups(sections, group_by), COURSE_SUFFIXES[group_by]
+        ):
+            additions, removals = sync_groups(
+                groups,
+                suffix,
+                create_groups,
+                datastore,
+                dry_run,
+                batch_size,
+                changed_roles,
+            )
+            added += count_members(additions)
+            removed += count_members(removals)
 
-    datastore.commit()
+    if cache is not None:
+        # roles created without any members to add
+        datastore.commit()
+        for blob_name, version in synced:
+            cache.record(blob_name, version)
+        cache.save()
+    verb: str = "would be " if dry_run else ""
+    click.echo(
+        f"{added} memberships {verb}added and {removed} {verb}removed in "
+        f"{time.monotonic() - start:.1f}s, peak memory {peak_rss_mb():.1f} MB"
+    )
+    if dry_run:
+        return
 
-    if reindex:
+    if full_reindex:
         subprocess.call(
             ["invenio", "rdm", "rebuild-all-indices", "-o", "groups"],
             stderr=subprocess.DEVNULL,
         )
+    elif reindex:
+        # index the changed groups in this process instead of waiting for the queue
+        index_queue: IndexQueue = IndexQueue(current_groups_service.indexer)
+        for role_id in changed_roles:
+            index_queue.add(role_id)
+        click.echo(f"Reindexed {index_queue.process()} groups")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+import sys
+from pathlib import Path
+
+import click
+from cca.scripts.id_map_utils import export_id_map, import_id_map
+
+
+@click.group()
+@click.help_option("-h", "--help")
+def main() -> None:
+    """Convert id-maps between the id-map.json format and a SQLite database.
+
+    The SQLite id-map can be passed anywhere an id-map.json is accepted, e.g.
+    `invenio cca add-editor --map-file id-map.db`.
+    """
+
+
+@main.command("import")
+@click.help_option("-h", "--help")
+@click.argument("json_file", type=click.Path(exists=True, path_type=Path))
+@click.argument("db_file", type=click.Path(path_type=Path))
+@click.option("--force", is_flag=True, help="Replace DB_FILE if it already exists")
+def import_command(json_file: Path, db_file: Path, force: bool) -> None:
+    """Import JSON_FILE (id-map.json) into a new SQLite database DB_FILE."""
+    if force:
+        db_file.unlink(missing_ok=True)
+    try:
+        count: int = import_id_map(json_file, db_file)
+        click.echo(f"✓ Imported {count} entries from {json_file} to {db_file}")
+    except FileExistsError:
+        click.echo(f"✗ Error: {db_file} exists, use --force to replace it", err=True)
+        sys.exit(1)
+    except Exception as e:
+        click.echo(f"✗ Error: {e}", err=True)
+        sys.exit(1)
+
+
+@main.command("export")
+@click.help_option("-h", "--help")
+@click.argument("db_file", type=click.Path(exists=True, path_type=Path))
+@click.argument("json_file", type=click.Path(path_type=Path))
+def export_command(db_file: Path, json_file: Path) -> None:
+    """Export the SQLite database DB_FILE to JSON_FILE in the id-map.json format."""
+    try:
+        count: int = export_id_map(db_file, json_file)
+        click.echo(f"✓ Exported {count} entries from {db_file} to {json_file}")
+    except Exception as e:
+        click.echo(f"✗ Error: {e}", err=True)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,7 @@ import sys
 from pathlib import Path
 
 import click
-from cca.scripts.id_map_utils import id_map_to_csv
+from cca.scripts.id_map_utils import EXPORT_FORMATS, export_id_map_rows
 
 
 @click.command()
@@ -13,17 +13,41 @@ from cca.scripts.id_map_utils import id_map_to_csv
     "--output",
     "output_file",
     type=click.Path(path_type=Path),
-    default="id-map.csv",
-    help="Output CSV file path (default: id-map.csv)",
+    default=None,
+    help="Output file path (default: id-map.<format>)",
 )
-def main(input_file: Path, output_file: Path) -> None:
-    """Convert an ID map JSON file to CSV format.
+@click.option(
+    "-f",
+    "--format",
+    "output_format",
+    type=click.Choice(EXPORT_FORMATS),
+    default="csv",
+    help="Output format (default: csv). Parquet requires the parquet extra (pyarrow).",
+)
+@click.option(
+    "-i",
+    "--incremental",
+    is_flag=True,
+    help="Skip the export if the map hasn't changed since the last one, otherwise "
+    "copy the rows of unchanged entries from it. Every entry is still read and "
+    "hashed, only their formatting is saved.",
+)
+def main(
+    input_file: Path, output_file: Path | None, output_format: str, incremental: bool
+) -> None:
+    """Convert an ID map JSON file to CSV, JSONL, or Parquet format.
 
     INPUT_FILE: Path to the id-map.json file to convert
     """
+    if output_file is None:
+        output_file = Path(f"id-map.{output_format}")
     try:
-        id_map_to_csv(input_file, output_file)
+        formatted, reused = export_id_map_rows(
+            input_file, output_file, output_format, incremental
+        )
         click.echo(f"✓ Converted {input_file} to {output_file}")
+        if incremental:
+            click.echo(f"  {formatted} rows updated, {reused} rows unchanged")
     except FileNotFoundError:
         click.echo(f"✗ Error: File {input_file} not found", err=True)
         sys.exit(1)
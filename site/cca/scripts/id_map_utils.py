@@ -16,18 +16,211 @@ Structure:
     ...
   }
 }
+
+Events are not written to id-map.json as they happen. They are appended to a
+sidecar journal (id-map.events.jsonl, one {"vault_url": ..., "event": ...} object
+per line) which load_id_map merges on read. compact_id_map folds the journal back
+into id-map.json.
+
+Writes to the map and journal hold an advisory lock (id-map.json.lock) and the map is
+written to a temporary file that replaces it, so batch commands can share a map
+and a crash mid-write leaves the previous map intact. A save merges in events
+other processes recorded since the map was loaded rather than overwriting them.
+
+A map can also be kept in a SQLite database (see SqliteIdMap) with indexed
+columns for the VAULT URL, record ID, owner, and event names. Any helper that
+takes a map_file accepts either; open_id_map picks the backend by looking at the
+file. import_id_map / export_id_map convert between the two formats.
 """
 
 import csv
+import fcntl
+import hashlib
 import json
+import os
 import re
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+from cca.scripts.json_stream import iter_object_items
+
+VAULT_ITEM_REGEX: re.Pattern[str] = re.compile(r"/items/([^/]+)/(\d+)/?")
+
+
+def journal_path(map_file: str | Path) -> Path:
+    """Get the path of the event journal that sits next to an id-map.
+
+    Args:
+        map_file: Path to the id-map.json file
+
+    Returns:
+        Path like id-map.events.jsonl in the same directory
+    """
+    return Path(map_file).with_suffix(".events.jsonl")
+
+
+def lock_path(map_file: str | Path) -> Path:
+    """Get the path of the lock file that sits next to an id-map.
+
+    Args:
+        map_file: Path to the id-map.json file
+
+    Returns:
+        Path like id-map.json.lock in the same directory, named after the whole
+        file name so a JSON and a SQLite map side by side have separate locks
+    """
+    path: Path = Path(map_file)
+    return path.with_name(f"{path.name}.lock")
+
+
+@contextmanager
+def id_map_lock(map_file: str | Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on an id-map and its journal.
+
+    The lock is on a separate file because the map itself is replaced, not
+    rewritten, when it is saved. Not reentrant, don't nest it.
+
+    Args:
+        map_file: Path to the id-map.json file
+    """
+    with lock_path(map_file).open("a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def map_version(map_file: str | Path) -> tuple[int, int, int] | None:
+    """Identify the current version of an id-map file.
+
+    Args:
+        map_file: Path to the id-map.json file
+
+    Returns:
+        Tuple of (inode, mtime_ns, size) or None if the file doesn't exist
+    """
+    try:
+        stat: os.stat_result = Path(map_file).stat()
+    except FileNotFoundError:
+        return None
+    return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+
+def merge_events(
+    data: dict[str, Any], items: Iterable[tuple[str, list[dict[str, Any]]]]
+) -> int:
+    """Merge events into loaded id-map data, skipping ones already present.
+
+    Args:
+        data: The id-map data to merge events into (modified in place)
+        items: (vault_url, events) tuples
+
+    Returns:
+        Number of events merged
+    """
+    merged: int = 0
+    for vault_url, new_events in items:
+        entry: dict[str, Any] | None = data.get(vault_url)
+        if entry is None:
+            continue
+        for event in new_events:
+            events: list[dict[str, Any]] = entry.setdefault("events", [])
+            if event not in events:
+                events.append(event)
+                merged += 1
+    return merged
+
+
+def read_journal(map_file: str | Path) -> list[tuple[str, dict[str, Any]]]:
+    """Read the events journaled for an id-map.
+
+    Args:
+        map_file: Path to the id-map.json file
+
+    Returns:
+        List of (vault_url, event) tuples in the order they were recorded
+    """
+    path: Path = journal_path(map_file)
+    journaled: list[tuple[str, dict[str, Any]]] = []
+    if not path.exists():
+        return journaled
+    with path.open("r") as f:
+        for line in f:
+            try:
+                item: dict[str, Any] = json.loads(line)
+            except json.JSONDecodeError:
+                # partial line left by a crash mid-append, the event is lost
+                continue
+            journaled.append((item["vault_url"], item["event"]))
+    return journaled
+
+
+def merge_journal(map_file: str | Path, data: dict[str, Any]) -> int:
+    """Merge journaled events into loaded id-map data.
+
+    Events already present in an entry are skipped so merging after an
+    interrupted compaction doesn't duplicate them.
+
+    Args:
+        map_file: Path to the id-map.json file
+        data: The id-map data to merge events into (modified in place)
+
+    Returns:
+        Number of events merged
+    """
+    return merge_events(
+        data, ((vault_url, [event]) for vault_url, event in read_journal(map_file))
+    )
+
+
+def append_event(map_file: str | Path, vault_url: str, event: dict[str, Any]) -> None:
+    """Append an event to an id-map's journal.
+
+    Costs one small write and fsync instead of rewriting the whole id-map.
+
+    Args:
+        map_file: Path to the id-map.json file
+        vault_url: The VAULT URL key of the entry the event belongs to
+        event: The event dictionary
+
+    Raises:
+        OSError: If the journal cannot be written
+    """
+    append_events(map_file, [(vault_url, event)])
+
+
+def append_events(
+    map_file: str | Path, items: Iterable[tuple[str, dict[str, Any]]]
+) -> None:
+    """Append many events to an id-map's journal with a single write and fsync.
+
+    Args:
+        map_file: Path to the id-map.json file
+        items: (vault_url, event) tuples
+
+    Raises:
+        OSError: If the journal cannot be written
+    """
+    lines: str = "".join(
+        json.dumps({"vault_url": vault_url, "event": event}) + "\n"
+        for vault_url, event in items
+    )
+    if not lines:
+        return
+    with id_map_lock(map_file), journal_path(map_file).open("a") as f:
+        f.write(lines)
+        f.flush()
+        os.fsync(f.fileno())
+
 
 def load_id_map(map_file: str | Path) -> dict[str, Any]:
-    """Load the id-map.json file.
+    """Load the id-map.json file, including events from its journal.
 
     Args:
         map_file: Path to the id-map.json file
@@ -41,22 +234,1026 @@ def load_id_map(map_file: str | Path) -> dict[str, Any]:
     """
     path: Path = Path(map_file)
     with path.open("r") as f:
-        return json.load(f)
+        data: dict[str, Any] = json.load(f)
+    merge_journal(path, data)
+    return data
 
 
-def save_id_map(map_file: str | Path, data: dict[str, Any]) -> None:
-    """Save the id-map.json file.
+def save_id_map(
+    map_file: str | Path,
+    data: dict[str, Any],
+    base_version: tuple[int, int, int] | None = None,
+) -> tuple[int, int, int] | None:
+    """Save the id-map.json file and clear its journal.
+
+    Holds the id-map lock and replaces the file atomically. Events journaled
+    since data was loaded are merged in first. If the map file itself changed
+    since base_version (or base_version is unknown), events that other
+    processes saved to it are merged in too, so concurrent runs don't lose each
+    other's work. Events are only ever added by merging, never removed.
 
     Args:
         map_file: Path to the id-map.json file
-        data: Dictionary to save
+        data: Dictionary to save (events are merged into it in place)
+        base_version: map_version of the file when data was loaded
+
+    Returns:
+        map_version of the saved file
+
+    Raises:
+        json.JSONDecodeError: If the map file on disk is not valid JSON
+        OSError: If the file cannot be written
+    """
+    path: Path = Path(map_file)
+    with id_map_lock(path):
+        current: tuple[int, int, int] | None = map_version(path)
+        if current is not None and current != base_version:
+            # iter_id_map includes the journal
+            merge_events(
+                data,
+                ((url, entry.get("events", [])) for url, entry in iter_id_map(path)),
+            )
+        else:
+            merge_journal(path, data)
+        write_id_map(path, data.items())
+        journal_path(path).unlink(missing_ok=True)
+        return map_version(path)
+
+
+def write_id_map(
+    map_file: str | Path, items: Iterable[tuple[str, dict[str, Any]]]
+) -> int:
+    """Write id-map entries one at a time in the same format as json.dump.
+
+    The entries are written and synced to a temporary file which then replaces
+    map_file, so a crash never leaves a partial map and items may be streamed
+    from map_file itself. Doesn't take the id-map lock, see save_id_map.
+
+    Args:
+        map_file: Path to the id-map.json file
+        items: (vault_url, entry) tuples to write
+
+    Returns:
+        Number of entries written
 
     Raises:
         OSError: If the file cannot be written
     """
     path: Path = Path(map_file)
-    with path.open("w") as f:
-        json.dump(data, f, indent=2)
+    tmp_path: Path = path.with_name(f"{path.name}.tmp")
+    count: int = 0
+    with tmp_path.open("w") as f:
+        f.write("{")
+        for vault_url, entry in items:
+            # match json.dump(data, f, indent=2) by indenting each entry a level
+            entry_json: str = json.dumps(entry, indent=2).replace("\n", "\n  ")
+            f.write(f"{',' if count else ''}\n  {json.dumps(vault_url)}: {entry_json}")
+            count += 1
+        f.write("\n}" if count else "}")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return count
+
+
+def compact_id_map(map_file: str | Path) -> int:
+    """Fold an id-map's journal back into id-map.json.
+
+    Streams the map so it is never loaded into memory all at once.
+
+    Args:
+        map_file: Path to the id-map.json file
+
+    Returns:
+        Number of journaled events that were folded into the map
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+        OSError: If the file cannot be written
+    """
+    journal: Path = journal_path(map_file)
+    if is_sqlite_file(map_file) or not journal.exists():
+        return 0
+    with id_map_lock(map_file):
+        folded: int = len(read_journal(map_file))
+        write_id_map(map_file, iter_id_map(map_file))
+        journal.unlink(missing_ok=True)
+    return folded
+
+
+def vault_uuid(vault_url: str) -> str | None:
+    """Extract the item UUID from a VAULT URL.
+
+    Args:
+        vault_url: URL like https://vault.cca.edu/items/UUID/VERSION/
+
+    Returns:
+        The item UUID or None if the URL is not a VAULT item URL
+    """
+    match: re.Match[str] | None = VAULT_ITEM_REGEX.search(vault_url)
+    return match.group(1) if match else None
+
+
+def iter_id_map(map_file: str | Path) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Iterate over the entries of an id-map without loading it all.
+
+    JSON maps are parsed incrementally and have their journaled events merged
+    in as each entry is read, so memory use is bounded by the largest entry
+    (plus the journal) rather than the size of the map.
+
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+
+    Yields:
+        (vault_url, entry) tuples in map order
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    if is_sqlite_file(map_file):
+        db: SqliteIdMap = SqliteIdMap(map_file)
+        try:
+            yield from db.items()
+        finally:
+            db.close()
+        return
+
+    journaled: dict[str, list[dict[str, Any]]] = {}
+    for vault_url, event in read_journal(map_file):
+        journaled.setdefault(vault_url, []).append(event)
+
+    with Path(map_file).open("r") as f:
+        for vault_url, entry in iter_object_items(f):
+            for event in journaled.get(vault_url, []):
+                events: list[dict[str, Any]] = entry.setdefault("events", [])
+                if event not in events:
+                    events.append(event)
+            yield vault_url, entry
+
+
+class EventIndex:
+    """The events of one map entry indexed by name and email.
+
+    Built once per entry so checking many collaborators or kinds of work
+    doesn't rescan the events each time. Emails are compared case-insensitively.
+
+    Args:
+        entry: The map entry dictionary
+    """
+
+    def __init__(self, entry: dict[str, Any]):
+        self.names: set[str] = set()
+        self.emails: dict[str, set[str]] = {}
+        # the part of each email before the "@", matched against usernames
+        self.usernames: dict[str, set[str]] = {}
+        for event in entry.get("events", []):
+            name: str = event.get("name", "")
+            self.names.add(name)
+            email: Any = (event.get("data") or {}).get("email")
+            if email and isinstance(email, str):
+                email = email.lower()
+                self.emails.setdefault(name, set()).add(email)
+                self.usernames.setdefault(name, set()).add(email.split("@")[0])
+
+    def has_email(self, event_name: str, user: str) -> bool:
+        """Check for an event with a user's email.
+
+        Args:
+            event_name: Name of the event
+            user: Email, or username which matches any email address with it
+                before the "@"
+
+        Returns:
+            True if an event_name event has the user's email
+        """
+        user = user.lower()
+        if "@" in user:
+            return user in self.emails.get(event_name, set())
+        return user in self.usernames.get(event_name, set())
+
+
+def pending_collaborators_item(
+    vault_url: str, entry: dict[str, Any], index: EventIndex | None = None
+) -> dict[str, Any] | None:
+    """Get an entry's collaborators that haven't been added yet.
+
+    Args:
+        vault_url: The VAULT URL key of the entry
+        entry: The map entry dictionary
+        index: The entry's EventIndex, built if not provided
+
+    Returns:
+        Dict with keys: record_id, vault_url, collaborators, title; or None if
+        there is nothing to do for the entry
+    """
+    record_id: str | None = entry.get("id")
+    collaborators: list[str] = entry.get("collaborators", [])
+
+    if not record_id or not collaborators:
+        return None
+
+    # Find collaborators without events
+    index = index or EventIndex(entry)
+    pending_collabs: list[str] = [
+        collab
+        for collab in collaborators
+        if not index.has_email("add_collaborator", collab)
+    ]
+    if not pending_collabs:
+        return None
+
+    return {
+        "record_id": record_id,
+        "vault_url": vault_url,
+        "collaborators": pending_collabs,
+        "title": entry.get("title", ""),
+    }
+
+
+def pending_owner_item(
+    vault_url: str, entry: dict[str, Any], index: EventIndex | None = None
+) -> dict[str, Any] | None:
+    """Get an entry's owner if it hasn't been set yet.
+
+    Args:
+        vault_url: The VAULT URL key of the entry
+        entry: The map entry dictionary
+        index: The entry's EventIndex, built if not provided
+
+    Returns:
+        Dict with keys: record_id, vault_url, owner, title; or None if there is
+        nothing to do for the entry
+    """
+    record_id: str | None = entry.get("id")
+    owner: str | None = entry.get("owner")
+
+    if not record_id or not owner:
+        return None
+    if "set_owner" in (index or EventIndex(entry)).names:
+        return None
+
+    return {
+        "record_id": record_id,
+        "vault_url": vault_url,
+        "owner": owner,
+        "title": entry.get("title", ""),
+    }
+
+
+PendingWork = Callable[[str, dict[str, Any], EventIndex], dict[str, Any] | None]
+# kinds of migration work, add a function here to plan a new kind of event
+PENDING_WORK: dict[str, PendingWork] = {
+    "collaborators": pending_collaborators_item,
+    "owners": pending_owner_item,
+}
+
+
+def iter_entries_work(
+    items: Iterable[tuple[str, dict[str, Any]]], kinds: Iterable[str] | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Find pending work of several kinds in a single pass over map entries.
+
+    Args:
+        items: (vault_url, entry) tuples
+        kinds: Keys of PENDING_WORK to look for, defaults to all of them
+
+    Yields:
+        (kind, item) tuples in map order
+    """
+    work: list[tuple[str, PendingWork]] = [
+        (kind, PENDING_WORK[kind]) for kind in (kinds or PENDING_WORK)
+    ]
+    for vault_url, entry in items:
+        index: EventIndex = EventIndex(entry)
+        for kind, pending in work:
+            item: dict[str, Any] | None = pending(vault_url, entry, index)
+            if item:
+                yield kind, item
+
+
+def skip_entries(
+    items: Iterable[tuple[str, dict[str, Any]]], after: str | None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Skip map entries up to and including the entry with a VAULT URL.
+
+    Args:
+        items: (vault_url, entry) tuples
+        after: VAULT URL of the last entry to skip, e.g. from a checkpoint; None
+            skips nothing
+
+    Yields:
+        The (vault_url, entry) tuples after it
+
+    Raises:
+        ValueError: If there is no entry with the VAULT URL
+    """
+    if after is None:
+        yield from items
+        return
+    found: bool = False
+    for vault_url, entry in items:
+        if found:
+            yield vault_url, entry
+        elif vault_url == after:
+            found = True
+    if not found:
+        raise ValueError(f"{after} is not in the id-map")
+
+
+class IdMap:
+    """An id-map indexed for lookups and loaded into memory at most once.
+
+    Keeps a reverse index of Invenio record ID -> VAULT URL and an index of
+    VAULT item UUID -> VAULT URLs (one per item version) so lookups don't have
+    to scan every entry. Use one instance for a whole batch run instead of the
+    module-level helpers, which each load the file. Recorded events go to the
+    journal; call compact() at the end of a run to fold them into the map.
+
+    The map is only loaded when a lookup needs it. Until then, iterating over
+    entries or pending work streams the file instead.
+
+    Args:
+        map_file: Path to the id-map.json file
+        data: Already loaded id-map data; loaded from map_file when needed if omitted
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+
+    def __init__(self, map_file: str | Path, data: dict[str, Any] | None = None):
+        self.path: Path = Path(map_file)
+        self._data: dict[str, Any] | None = None
+        self._version: tuple[int, int, int] | None = None
+        self._by_record_id: dict[str, str] = {}
+        self._by_uuid: dict[str, list[str]] = {}
+        if data is not None:
+            self._load(data)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def close(self) -> None:
+        """Nothing to release, for parity with SqliteIdMap."""
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the map has been loaded into memory."""
+        return self._data is not None
+
+    @property
+    def data(self) -> dict[str, Any]:
+        """The whole id-map, loaded from the file on first access."""
+        if self._data is None:
+            # stat first so a change during loading is merged when saving
+            version: tuple[int, int, int] | None = map_version(self.path)
+            self._load(load_id_map(self.path))
+            self._version = version
+        assert self._data is not None
+        return self._data
+
+    def _load(self, data: dict[str, Any]) -> None:
+        self._data = data
+        for url, entry in data.items():
+            self._index(url, entry)
+
+    def items(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Iterate over (vault_url, entry) pairs in map order."""
+        if self._data is None:
+            yield from iter_id_map(self.path)
+        else:
+            yield from self._data.items()
+
+    def _index(self, vault_url: str, entry: dict[str, Any]) -> None:
+        record_id: str | None = entry.get("id")
+        # first entry wins, same as the linear scan this replaces
+        if record_id and record_id not in self._by_record_id:
+            self._by_record_id[record_id] = vault_url
+        uuid: str | None = vault_uuid(vault_url)
+        if uuid:
+            self._by_uuid.setdefault(uuid, []).append(vault_url)
+
+    def get_entry_by_record_id(
+        self, record_id: str
+    ) -> tuple[str | None, dict[str, Any] | None]:
+        """Get the map entry for a specific Invenio record ID.
+
+        Args:
+            record_id: The new Invenio record ID
+
+        Returns:
+            Tuple of (vault_url, entry) or (None, None) if not found
+        """
+        data: dict[str, Any] = self.data  # loads the map and its indexes
+        vault_url: str | None = self._by_record_id.get(record_id)
+        if vault_url is None:
+            return (None, None)
+        return vault_url, data[vault_url]
+
+    def get_entries_by_vault_uuid(self, uuid: str) -> list[tuple[str, dict[str, Any]]]:
+        """Get the map entries for every version of a VAULT item.
+
+        Args:
+            uuid: The VAULT item UUID
+
+        Returns:
+            List of (vault_url, entry) tuples, empty if the item is not in the map
+        """
+        data: dict[str, Any] = self.data  # loads the map and its indexes
+        return [(url, data[url]) for url in self._by_uuid.get(uuid, [])]
+
+    def save(self) -> None:
+        """Write the id-map back to its file, merging concurrent changes."""
+        self._version = save_id_map(self.path, self.data, self._version)
+
+    def compact(self) -> int:
+        """Fold the journal into id-map.json.
+
+        Returns:
+            Number of journaled events folded into the map
+        """
+        if self._data is None:
+            return compact_id_map(self.path)
+        folded: int = len(read_journal(self.path))
+        # saving merges in the journal, including other processes' events
+        self.save()
+        return folded
+
+    def record_event(
+        self,
+        record_id: str,
+        event_name: str,
+        event_data: dict[str, Any],
+        vault_url: str | None = None,
+    ) -> None:
+        """Record an event for a record and append it to the journal.
+
+        Args:
+            record_id: The new Invenio record ID
+            event_name: Name of the event (e.g., "add_collaborator", "set_owner")
+            event_data: Dictionary of event-specific data
+            vault_url: The record's VAULT URL, if known, which saves loading the
+                map to look it up
+
+        Raises:
+            ValueError: If the record is not found in the map
+            OSError: If the file cannot be written
+        """
+        if vault_url is None:
+            vault_url, _ = self.get_entry_by_record_id(record_id)
+            if vault_url is None:
+                raise ValueError(f"Record {record_id} not found in id-map")
+
+        event: dict[str, Any] = {
+            "name": event_name,
+            "data": event_data,
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+        append_event(self.path, vault_url, event)
+        if self._data is not None and vault_url in self._data:
+            self._data[vault_url].setdefault("events", []).append(event)
+
+    def record_events(self, events: Iterable[tuple[str, str, dict[str, Any]]]) -> int:
+        """Record many events at once, e.g. the results of parallel workers.
+
+        The events are journaled with one write; compact() folds them into the
+        map.
+
+        Args:
+            events: (vault_url, event_name, event_data) tuples
+
+        Returns:
+            Number of events recorded
+        """
+        time: str = datetime.now(timezone.utc).isoformat()
+        items: list[tuple[str, dict[str, Any]]] = [
+            (vault_url, {"name": name, "data": data, "time": time})
+            for vault_url, name, data in events
+        ]
+        append_events(self.path, items)
+        if self._data is not None:
+            merge_events(self._data, ((url, [event]) for url, event in items))
+        return len(items)
+
+    def iter_pending_work(
+        self, kinds: Iterable[str] | None = None, after: str | None = None
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield every kind of pending work in one pass over the map.
+
+        Args:
+            kinds: Keys of PENDING_WORK to look for, defaults to all of them
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            (kind, item) tuples in map order
+        """
+        yield from iter_entries_work(skip_entries(self.items(), after), kinds)
+
+    def iter_pending_collaborators(
+        self, after: str | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Yield records with collaborators that haven't been added yet.
+
+        Args:
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            Dicts with keys: record_id, vault_url, collaborators, title
+        """
+        for _, item in self.iter_pending_work(["collaborators"], after):
+            yield item
+
+    def pending_collaborators(self) -> list[dict[str, Any]]:
+        """Get all records with collaborators that haven't been added yet.
+
+        Returns:
+            List of dicts with keys: record_id, vault_url, collaborators, title
+        """
+        return list(self.iter_pending_collaborators())
+
+    def iter_pending_owners(self, after: str | None = None) -> Iterator[dict[str, Any]]:
+        """Yield records with owners that haven't been set yet.
+
+        Args:
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            Dicts with keys: record_id, vault_url, owner, title
+        """
+        for _, item in self.iter_pending_work(["owners"], after):
+            yield item
+
+    def pending_owners(self) -> list[dict[str, Any]]:
+        """Get all records with owners that haven't been set yet.
+
+        Returns:
+            List of dicts with keys: record_id, vault_url, owner, title
+        """
+        return list(self.iter_pending_owners())
+
+
+SQLITE_HEADER: bytes = b"SQLite format 3\x00"
+SQLITE_SUFFIXES: tuple[str, ...] = (".db", ".sqlite", ".sqlite3")
+SQLITE_SCHEMA: str = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    vault_url TEXT NOT NULL UNIQUE,
+    record_id TEXT,
+    owner TEXT,
+    title TEXT,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_record_id ON entries (record_id);
+CREATE INDEX IF NOT EXISTS entries_owner ON entries (owner);
+CREATE TABLE IF NOT EXISTS collaborators (
+    entry_id INTEGER NOT NULL REFERENCES entries (id),
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS collaborators_entry_id ON collaborators (entry_id);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    entry_id INTEGER NOT NULL REFERENCES entries (id),
+    name TEXT NOT NULL,
+    email TEXT,
+    event TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_entry_id_name ON events (entry_id, name);
+CREATE INDEX IF NOT EXISTS events_name_email ON events (name, email);
+"""
+
+
+def is_sqlite_file(map_file: str | Path) -> bool:
+    """Check if an id-map is stored in SQLite rather than JSON.
+
+    Existing files are identified by their header, new ones by their suffix.
+
+    Args:
+        map_file: Path to the id-map file
+
+    Returns:
+        True if the map is (or should be created as) a SQLite database
+    """
+    path: Path = Path(map_file)
+    if not path.exists():
+        return path.suffix in SQLITE_SUFFIXES
+    with path.open("rb") as f:
+        return f.read(len(SQLITE_HEADER)) == SQLITE_HEADER
+
+
+class SqliteIdMap:
+    """An id-map stored in a SQLite database.
+
+    Entries keep their full JSON (minus events) in the entries table alongside
+    indexed vault_url, record_id, and owner columns. Collaborators and events
+    are rows of their own so pending work is found with indexed queries rather
+    than by loading the whole map. The database uses write-ahead logging so
+    several batch jobs can read and write the map at once.
+
+    Args:
+        map_file: Path to the SQLite database, created if it doesn't exist
+    """
+
+    def __init__(self, map_file: str | Path):
+        self.path: Path = Path(map_file)
+        # wait for other writers rather than failing with "database is locked"
+        self.conn: sqlite3.Connection = sqlite3.connect(self.path, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SQLITE_SCHEMA)
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT count(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def add_entry(self, vault_url: str, entry: dict[str, Any]) -> None:
+        """Insert an entry with its collaborators and events.
+
+        Args:
+            vault_url: The VAULT URL key of the entry
+            entry: The map entry dictionary
+
+        Raises:
+            sqlite3.IntegrityError: If the VAULT URL is already in the map
+        """
+        # keep an empty "events" placeholder so export preserves key order
+        stored: dict[str, Any] = {
+            k: ([] if k == "events" else v) for k, v in entry.items()
+        }
+        cursor: sqlite3.Cursor = self.conn.execute(
+            "INSERT INTO entries (vault_url, record_id, owner, title, entry)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                vault_url,
+                entry.get("id"),
+                entry.get("owner"),
+                entry.get("title", ""),
+                json.dumps(stored),
+            ),
+        )
+        entry_id: int | None = cursor.lastrowid
+        self.conn.executemany(
+            "INSERT INTO collaborators (entry_id, name) VALUES (?, ?)",
+            [(entry_id, c) for c in entry.get("collaborators", [])],
+        )
+        self.conn.executemany(
+            "INSERT INTO events (entry_id, name, email, event) VALUES (?, ?, ?, ?)",
+            [
+                (
+                    entry_id,
+                    e.get("name", ""),
+                    (e.get("data") or {}).get("email"),
+                    json.dumps(e),
+                )
+                for e in entry.get("events", [])
+            ],
+        )
+
+    def _events(self, entry_id: int) -> list[dict[str, Any]]:
+        rows = self.conn.execute(
+            "SELECT event FROM events WHERE entry_id = ? ORDER BY id", (entry_id,)
+        )
+        return [json.loads(event) for (event,) in rows]
+
+    @staticmethod
+    def _entry(entry_json: str, events: list[dict[str, Any]]) -> dict[str, Any]:
+        entry: dict[str, Any] = json.loads(entry_json)
+        if "events" in entry or events:
+            entry["events"] = events
+        return entry
+
+    def items(self) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Iterate over (vault_url, entry) pairs in map order.
+
+        Walks the entries and events tables side by side so each entry costs
+        no extra query.
+        """
+        entries = self.conn.execute(
+            "SELECT id, vault_url, entry FROM entries ORDER BY id"
+        )
+        events = self.conn.execute(
+            "SELECT entry_id, event FROM events ORDER BY entry_id, id"
+        )
+        event_row = events.fetchone()
+        for entry_id, vault_url, entry_json in entries:
+            entry_events: list[dict[str, Any]] = []
+            while event_row is not None and event_row[0] <= entry_id:
+                if event_row[0] == entry_id:
+                    entry_events.append(json.loads(event_row[1]))
+                event_row = events.fetchone()
+            yield vault_url, self._entry(entry_json, entry_events)
+
+    def get_entry_by_record_id(
+        self, record_id: str
+    ) -> tuple[str | None, dict[str, Any] | None]:
+        """Get the map entry for a specific Invenio record ID.
+
+        Args:
+            record_id: The new Invenio record ID
+
+        Returns:
+            Tuple of (vault_url, entry) or (None, None) if not found
+        """
+        row = self.conn.execute(
+            "SELECT id, vault_url, entry FROM entries WHERE record_id = ?"
+            " ORDER BY id LIMIT 1",
+            (record_id,),
+        ).fetchone()
+        if row is None:
+            return (None, None)
+        entry_id, vault_url, entry_json = row
+        return vault_url, self._entry(entry_json, self._events(entry_id))
+
+    def record_event(
+        self,
+        record_id: str,
+        event_name: str,
+        event_data: dict[str, Any],
+        vault_url: str | None = None,
+    ) -> None:
+        """Record an event for a record.
+
+        Args:
+            record_id: The new Invenio record ID
+            event_name: Name of the event (e.g., "add_collaborator", "set_owner")
+            event_data: Dictionary of event-specific data
+            vault_url: The record's VAULT URL, if known, used instead of the ID
+
+        Raises:
+            ValueError: If the record is not found in the map
+        """
+        if vault_url is None:
+            row = self.conn.execute(
+                "SELECT id FROM entries WHERE record_id = ? ORDER BY id LIMIT 1",
+                (record_id,),
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT id FROM entries WHERE vault_url = ?", (vault_url,)
+            ).fetchone()
+        if row is None:
+            raise ValueError(f"Record {record_id} not found in id-map")
+
+        event: dict[str, Any] = {
+            "name": event_name,
+            "data": event_data,
+            "time": datetime.now(timezone.utc).isoformat(),
+        }
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO events (entry_id, name, email, event) VALUES (?, ?, ?, ?)",
+                (row[0], event_name, event_data.get("email"), json.dumps(event)),
+            )
+
+    def record_events(self, events: Iterable[tuple[str, str, dict[str, Any]]]) -> int:
+        """Record many events in one transaction.
+
+        Args:
+            events: (vault_url, event_name, event_data) tuples
+
+        Returns:
+            Number of events recorded
+
+        Raises:
+            ValueError: If an entry is not found in the map
+        """
+        time: str = datetime.now(timezone.utc).isoformat()
+        rows: list[tuple[int, str, str | None, str]] = []
+        for vault_url, name, data in events:
+            row = self.conn.execute(
+                "SELECT id FROM entries WHERE vault_url = ?", (vault_url,)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Entry {vault_url} not found in id-map")
+            event: dict[str, Any] = {"name": name, "data": data, "time": time}
+            rows.append((row[0], name, data.get("email"), json.dumps(event)))
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO events (entry_id, name, email, event) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def compact(self) -> int:
+        """Nothing to fold, events are written to the database directly."""
+        return 0
+
+    def iter_pending_work(
+        self, kinds: Iterable[str] | None = None, after: str | None = None
+    ) -> Iterator[tuple[str, dict[str, Any]]]:
+        """Yield pending work using an indexed query for each kind.
+
+        Kinds without a query of their own are found with a scan of the map.
+
+        Args:
+            kinds: Keys of PENDING_WORK to look for, defaults to all of them
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            (kind, item) tuples grouped by kind
+        """
+        queries: dict[str, Callable[[str | None], Iterator[dict[str, Any]]]] = {
+            "collaborators": self.iter_pending_collaborators,
+            "owners": self.iter_pending_owners,
+        }
+        scanned: list[str] = []
+        for kind in kinds or PENDING_WORK:
+            if kind in queries:
+                for item in queries[kind](after):
+                    yield kind, item
+            else:
+                scanned.append(kind)
+        if scanned:
+            yield from iter_entries_work(skip_entries(self.items(), after), scanned)
+
+    def _after_id(self, after: str | None) -> int:
+        """Get the row id of the entry with a VAULT URL, 0 for None.
+
+        Raises:
+            ValueError: If there is no entry with the VAULT URL
+        """
+        if after is None:
+            return 0
+        row = self.conn.execute(
+            "SELECT id FROM entries WHERE vault_url = ?", (after,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"{after} is not in the id-map")
+        return row[0]
+
+    def iter_pending_collaborators(
+        self, after: str | None = None
+    ) -> Iterator[dict[str, Any]]:
+        """Yield records with collaborators that haven't been added yet.
+
+        Matches collaborators to add_collaborator events the same way as
+        EventIndex.has_email.
+
+        Args:
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            Dicts with keys: record_id, vault_url, collaborators, title
+        """
+        rows = self.conn.execute(
+            """
+            SELECT e.id, e.record_id, e.vault_url, e.title, c.name
+            FROM entries e JOIN collaborators c ON c.entry_id = e.id
+            WHERE e.id > ? AND e.record_id IS NOT NULL AND e.record_id != ''
+            AND NOT EXISTS (
+                SELECT 1 FROM events v
+                WHERE v.entry_id = e.id AND v.name = 'add_collaborator'
+                AND (
+                    lower(v.email) = lower(c.name)
+                    OR (
+                        instr(c.name, '@') = 0
+                        AND lower(substr(v.email, 1, instr(v.email, '@') - 1))
+                        = lower(c.name)
+                    )
+                )
+            )
+            ORDER BY e.id, c.rowid
+            """,
+            (self._after_id(after),),
+        )
+        item: dict[str, Any] | None = None
+        last_entry_id: int | None = None
+        for entry_id, record_id, vault_url, title, collaborator in rows:
+            if entry_id != last_entry_id:
+                if item:
+                    yield item
+                item = {
+                    "record_id": record_id,
+                    "vault_url": vault_url,
+                    "collaborators": [],
+                    "title": title,
+                }
+                last_entry_id = entry_id
+            assert item is not None
+            item["collaborators"].append(collaborator)
+        if item:
+            yield item
+
+    def pending_collaborators(self) -> list[dict[str, Any]]:
+        """Get all records with collaborators that haven't been added yet.
+
+        Returns:
+            List of dicts with keys: record_id, vault_url, collaborators, title
+        """
+        return list(self.iter_pending_collaborators())
+
+    def iter_pending_owners(self, after: str | None = None) -> Iterator[dict[str, Any]]:
+        """Yield records with owners that haven't been set yet.
+
+        Args:
+            after: Only look at entries after the one with this VAULT URL
+
+        Yields:
+            Dicts with keys: record_id, vault_url, owner, title
+        """
+        rows = self.conn.execute(
+            """
+            SELECT e.record_id, e.vault_url, e.owner, e.title FROM entries e
+            WHERE e.id > ? AND e.record_id IS NOT NULL AND e.record_id != ''
+            AND e.owner IS NOT NULL AND e.owner != ''
+            AND NOT EXISTS (
+                SELECT 1 FROM events v
+                WHERE v.entry_id = e.id AND v.name = 'set_owner'
+            )
+            ORDER BY e.id
+            """,
+            (self._after_id(after),),
+        )
+        for record_id, vault_url, owner, title in rows:
+            yield {
+                "record_id": record_id,
+                "vault_url": vault_url,
+                "owner": owner,
+                "title": title,
+            }
+
+    def pending_owners(self) -> list[dict[str, Any]]:
+        """Get all records with owners that haven't been set yet.
+
+        Returns:
+            List of dicts with keys: record_id, vault_url, owner, title
+        """
+        return list(self.iter_pending_owners())
+
+
+def open_id_map(map_file: str | Path) -> IdMap | SqliteIdMap:
+    """Open an id-map with the backend that matches its file.
+
+    Args:
+        map_file: Path to an id-map.json file or SQLite id-map database
+
+    Returns:
+        A SqliteIdMap for SQLite databases, otherwise an IdMap
+
+    Raises:
+        FileNotFoundError: If a JSON map file doesn't exist
+        json.JSONDecodeError: If a JSON map file is not valid JSON
+    """
+    if is_sqlite_file(map_file):
+        return SqliteIdMap(map_file)
+    return IdMap(map_file)
+
+
+def import_id_map(json_file: str | Path, db_file: str | Path) -> int:
+    """Import an id-map.json file (and its journal) into a new SQLite id-map.
+
+    Args:
+        json_file: Path to the id-map.json file
+        db_file: Path to the SQLite database to create
+
+    Returns:
+        Number of entries imported
+
+    Raises:
+        FileExistsError: If the database already exists
+        FileNotFoundError: If the JSON file doesn't exist
+        json.JSONDecodeError: If the JSON file is not valid JSON
+    """
+    if Path(db_file).exists():
+        raise FileExistsError(f"{db_file} already exists")
+    data: dict[str, Any] = load_id_map(json_file)
+    db: SqliteIdMap = SqliteIdMap(db_file)
+    try:
+        with db.conn:
+            for vault_url, entry in data.items():
+                db.add_entry(vault_url, entry)
+    finally:
+        db.close()
+    return len(data)
+
+
+def export_id_map(db_file: str | Path, json_file: str | Path) -> int:
+    """Export a SQLite id-map to the id-map.json format.
+
+    Args:
+        db_file: Path to the SQLite database
+        json_file: Path to the id-map.json file to write
+
+    Returns:
+        Number of entries exported
+
+    Raises:
+        FileNotFoundError: If the database doesn't exist
+        OSError: If the JSON file cannot be written
+    """
+    if not Path(db_file).exists():
+        raise FileNotFoundError(f"{db_file} not found")
+    db: SqliteIdMap = SqliteIdMap(db_file)
+    try:
+        # replaces rather than merges with an existing JSON file
+        with id_map_lock(json_file):
+            count: int = write_id_map(json_file, db.items())
+            journal_path(json_file).unlink(missing_ok=True)
+    finally:
+        db.close()
+    return count
 
 
 def get_entry_by_record_id(
@@ -64,18 +1261,20 @@ def get_entry_by_record_id(
 ) -> tuple[str | None, dict[str, Any] | None]:
     """Get the map entry for a specific Invenio record ID.
 
+    Opens the whole id-map; use an IdMap instance for repeated lookups.
+
     Args:
         map_file: Path to the id-map.json file
         record_id: The new Invenio record ID
 
     Returns:
-        The entry_dict or None if not found
+        Tuple of (vault_url, entry) or (None, None) if not found
     """
-    data: dict[str, Any] = load_id_map(map_file)
-    for url, entry in data.items():
-        if entry.get("id") == record_id:
-            return url, entry
-    return (None, None)
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        return id_map.get_entry_by_record_id(record_id)
+    finally:
+        id_map.close()
 
 
 def record_event(
@@ -101,27 +1300,11 @@ def record_event(
         json.JSONDecodeError: If the file is not valid JSON
         OSError: If the file cannot be written
     """
-    vault_url, entry = get_entry_by_record_id(map_file, record_id)
-    if entry is None or vault_url is None:
-        raise ValueError(f"Record {record_id} not found in id-map")
-
-    data: dict[str, Any] = load_id_map(map_file)
-
-    # Ensure events array exists
-    if "events" not in entry:
-        entry["events"] = []
-
-    # Add the event
-    event: dict[str, Any] = {
-        "name": event_name,
-        "data": event_data,
-        "time": datetime.now(timezone.utc).isoformat(),
-    }
-    entry["events"].append(event)
-
-    # Update the entry in the data
-    data[vault_url] = entry
-    save_id_map(map_file, data)
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        id_map.record_event(record_id, event_name, event_data)
+    finally:
+        id_map.close()
 
 
 def has_collaborator_event(entry: dict[str, Any], collaborator: str) -> bool:
@@ -132,16 +1315,32 @@ def has_collaborator_event(entry: dict[str, Any], collaborator: str) -> bool:
         collaborator: The collaborator username or email to check
 
     Returns:
-        True if an add_collaborator event exists for this collaborator
+        True if an add_collaborator event exists for this collaborator's email,
+        or for an email starting with "{collaborator}@" if it's a username
     """
-    events: list[dict[str, Any]] = entry.get("events", [])
-    for event in events:
-        if event.get("name") == "add_collaborator":
-            event_email = event.get("data", {}).get("email", "")
-            # Check if email matches or is contained in the collaborator string
-            if event_email == collaborator or collaborator in event_email:
-                return True
-    return False
+    return EventIndex(entry).has_email("add_collaborator", collaborator)
+
+
+def iter_pending_collaborators(map_file: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield records with collaborators that haven't been added yet.
+
+    Streams the map so work can start before the whole map has been read.
+
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+
+    Yields:
+        Dicts with keys: record_id, vault_url, collaborators, title
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        yield from id_map.iter_pending_collaborators()
+    finally:
+        id_map.close()
 
 
 def get_pending_collaborators(map_file: str | Path) -> list[dict[str, Any]]:
@@ -154,39 +1353,14 @@ def get_pending_collaborators(map_file: str | Path) -> list[dict[str, Any]]:
         map_file: Path to the id-map.json file
 
     Returns:
-        List of dicts with keys: record_id, collaborators (list of usernames)
+        List of dicts with keys: record_id, vault_url, collaborators (list of
+        usernames), title
 
     Raises:
         FileNotFoundError: If the file doesn't exist
         json.JSONDecodeError: If the file is not valid JSON
     """
-    data: dict[str, Any] = load_id_map(map_file)
-    pending: list[dict[str, Any]] = []
-
-    for entry in data.values():
-        record_id: str | None = entry.get("id")
-        collaborators: list[str] = entry.get("collaborators", [])
-
-        if not record_id or not collaborators:
-            continue
-
-        # Find collaborators without events
-        pending_collabs: list[str] = [
-            collab
-            for collab in collaborators
-            if not has_collaborator_event(entry, collab)
-        ]
-
-        if pending_collabs:
-            pending.append(
-                {
-                    "record_id": record_id,
-                    "collaborators": pending_collabs,
-                    "title": entry.get("title", ""),
-                }
-            )
-
-    return pending
+    return list(iter_pending_collaborators(map_file))
 
 
 def has_owner_event(entry: dict[str, Any]) -> bool:
@@ -198,11 +1372,29 @@ def has_owner_event(entry: dict[str, Any]) -> bool:
     Returns:
         True if a set_owner event exists for this record
     """
-    events: list[dict[str, Any]] = entry.get("events", [])
-    for event in events:
-        if event.get("name") == "set_owner":
-            return True
-    return False
+    return "set_owner" in EventIndex(entry).names
+
+
+def iter_pending_owners(map_file: str | Path) -> Iterator[dict[str, Any]]:
+    """Yield records with owners that haven't been set yet.
+
+    Streams the map so work can start before the whole map has been read.
+
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+
+    Yields:
+        Dicts with keys: record_id, vault_url, owner, title
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        yield from id_map.iter_pending_owners()
+    finally:
+        id_map.close()
 
 
 def get_pending_owners(map_file: str | Path) -> list[dict[str, Any]]:
@@ -215,33 +1407,147 @@ def get_pending_owners(map_file: str | Path) -> list[dict[str, Any]]:
         map_file: Path to the id-map.json file
 
     Returns:
-        List of dicts with keys: record_id, owner (email or username), title
+        List of dicts with keys: record_id, vault_url, owner (email or username),
+        title
 
     Raises:
         FileNotFoundError: If the file doesn't exist
         json.JSONDecodeError: If the file is not valid JSON
     """
-    data: dict[str, Any] = load_id_map(map_file)
-    pending: list[dict[str, Any]] = []
+    return list(iter_pending_owners(map_file))
 
-    for entry in data.values():
-        record_id: str | None = entry.get("id")
-        owner: str | None = entry.get("owner")
 
-        if not record_id or not owner:
-            continue
+def iter_pending_work(
+    map_file: str | Path, kinds: Iterable[str] | None = None
+) -> Iterator[tuple[str, dict[str, Any]]]:
+    """Yield every kind of pending migration work in one pass over the map.
 
-        # Check if owner has been set
-        if not has_owner_event(entry):
-            pending.append(
-                {
-                    "record_id": record_id,
-                    "owner": owner,
-                    "title": entry.get("title", ""),
-                }
-            )
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+        kinds: Keys of PENDING_WORK to look for, defaults to all of them
+
+    Yields:
+        (kind, item) tuples
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        yield from id_map.iter_pending_work(kinds)
+    finally:
+        id_map.close()
+
+
+def plan_cache_path(map_file: str | Path) -> Path:
+    """Get the path of the cached migration plan that sits next to an id-map.
+
+    Args:
+        map_file: Path to the id-map file
+
+    Returns:
+        Path like id-map.json.plan.json in the same directory
+    """
+    path: Path = Path(map_file)
+    return path.with_name(f"{path.name}.plan.json")
+
+
+def _plan_cache_key(map_file: str | Path, kinds: list[str]) -> list[Any]:
+    """Identify a version of an id-map by the mtime and size of its files."""
+    path: Path = Path(map_file)
+    key: list[Any] = [kinds]
+    # events may be in the journal or, for SQLite, the write-ahead log
+    for p in (path, journal_path(path), path.with_name(f"{path.name}-wal")):
+        try:
+            stat: os.stat_result = p.stat()
+            key.append([stat.st_mtime_ns, stat.st_size])
+        except FileNotFoundError:
+            key.append(None)
+    return key
+
+
+def cached_plan(
+    map_file: str | Path, kinds: Iterable[str] | None = None
+) -> dict[str, list[dict[str, Any]]] | None:
+    """Get the cached migration plan of an id-map, if it's still current.
+
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+        kinds: Keys of PENDING_WORK of the plan, defaults to all of them
+
+    Returns:
+        The plan from plan_migration, or None if there is no current plan
+    """
+    kinds = sorted(kinds or PENDING_WORK)
+    cache_path: Path = plan_cache_path(map_file)
+    try:
+        with cache_path.open("r") as f:
+            cached: dict[str, Any] = json.load(f)
+        if cached.get("key") == _plan_cache_key(map_file, kinds):
+            return cached["plan"]
+    except (FileNotFoundError, json.JSONDecodeError, KeyError):
+        pass  # no cache, or a corrupt one to rebuild
+    return None
 
-    return pending
+
+def plan_migration(
+    map_file: str | Path, kinds: Iterable[str] | None = None, use_cache: bool = True
+) -> dict[str, list[dict[str, Any]]]:
+    """Plan all pending migration work in one pass over the id-map.
+
+    The plan is cached next to the map and reused for as long as the map and
+    its journal are unchanged, so repeated dry runs don't rescan the map.
+
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+        kinds: Keys of PENDING_WORK to plan, defaults to all of them
+        use_cache: Read and write the cached plan
+
+    Returns:
+        Dictionary of kind -> list of pending work items
+
+    Raises:
+        FileNotFoundError: If the file doesn't exist
+        json.JSONDecodeError: If the file is not valid JSON
+    """
+    kinds = sorted(kinds or PENDING_WORK)
+    cache_path: Path = plan_cache_path(map_file)
+    key: list[Any] = _plan_cache_key(map_file, kinds)
+    if use_cache:
+        cached: dict[str, list[dict[str, Any]]] | None = cached_plan(map_file, kinds)
+        if cached is not None:
+            return cached
+
+    plan: dict[str, list[dict[str, Any]]] = {kind: [] for kind in kinds}
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        for kind, item in id_map.iter_pending_work(kinds):
+            plan[kind].append(item)
+    finally:
+        id_map.close()
+
+    # don't cache a plan of a map that changed while it was being read
+    if use_cache and _plan_cache_key(map_file, kinds) == key:
+        tmp_path: Path = cache_path.with_name(f"{cache_path.name}.tmp")
+        with tmp_path.open("w") as f:
+            json.dump({"key": key, "plan": plan}, f)
+        os.replace(tmp_path, cache_path)
+    return plan
+
+
+def format_plan_summary(plan: dict[str, list[dict[str, Any]]]) -> str:
+    """Summarize a migration plan as counts of each kind of pending work.
+
+    Args:
+        plan: Plan from plan_migration
+
+    Returns:
+        String like "3 records with pending collaborators, 1 records with pending owners"
+    """
+    return ", ".join(
+        f"{len(items)} records with pending {kind}" for kind, items in plan.items()
+    )
 
 
 def is_uuid(value: str) -> bool:
@@ -265,6 +1571,25 @@ def is_uuid(value: str) -> bool:
     return bool(uuid_regex.match(value))
 
 
+@lru_cache(maxsize=65536)
+def format_event_time(time_str: str) -> str:
+    """Format an ISO timestamp as "Mon DD YYYY HH:MMAM/PM".
+
+    Cached since many events share a timestamp string, e.g. a batch import.
+
+    Args:
+        time_str: ISO format timestamp
+
+    Returns:
+        Formatted time, or time_str unchanged if it can't be parsed
+    """
+    try:
+        dt: datetime = datetime.fromisoformat(time_str)
+        return dt.strftime("%b %-d %Y %-I:%M%p")
+    except (ValueError, TypeError):
+        return time_str
+
+
 def format_event(event: dict[str, Any]) -> str:
     """Format an event into a human-readable string.
 
@@ -278,11 +1603,7 @@ def format_event(event: dict[str, Any]) -> str:
     time_str: str = event.get("time", "")
 
     # Parse ISO format timestamp and format as "Mon DD YYYY, HH:MMam/pm"
-    try:
-        dt: datetime = datetime.fromisoformat(time_str)
-        formatted_time: str = dt.strftime("%b %-d %Y %-I:%M%p")
-    except (ValueError, AttributeError):
-        formatted_time = time_str
+    formatted_time: str = format_event_time(time_str)
 
     # Include relevant data from the event
     data: dict[str, Any] = event.get("data", {})
@@ -296,10 +1617,128 @@ def format_event(event: dict[str, Any]) -> str:
     return f"{formatted_time}: {name}{data_str}"
 
 
-def id_map_to_csv(map_file: str | Path, output_file: str | Path) -> None:
-    """Convert an ID map JSON file to CSV format.
+EXPORT_FIELDS: list[str] = [
+    "vault_url",
+    "record_id",
+    "title",
+    "owner",
+    "viewlevel",
+    "collaborators",
+    "events",
+]
+EXPORT_FORMATS: tuple[str, ...] = ("csv", "jsonl", "parquet")
+# rows per Parquet row group, bounds the memory used by the Parquet writer
+PARQUET_BATCH_SIZE: int = 10000
+
+
+def export_row(vault_url: str, entry: dict[str, Any]) -> dict[str, str]:
+    """Format a map entry as a row of an id-map export.
+
+    Args:
+        vault_url: The VAULT URL key of the entry
+        entry: The map entry dictionary
+
+    Returns:
+        Dictionary with a string value for each of EXPORT_FIELDS
+    """
+    # Format collaborators as comma-separated
+    collaborators: list[str] = entry.get("collaborators", [])
+    collaborators_str: str = ", ".join(collaborators)
+
+    # Format events as newline-separated
+    events: list[dict[str, Any]] = entry.get("events", [])
+    events_str: str = "\n".join(format_event(event) for event in events)
+
+    return {
+        "vault_url": vault_url,
+        "record_id": entry.get("id", ""),
+        "title": entry.get("title", ""),
+        "owner": entry.get("owner", ""),
+        "viewlevel": entry.get("viewlevel", ""),
+        "collaborators": collaborators_str,
+        "events": events_str,
+    }
+
+
+def entry_hash(vault_url: str, entry: dict[str, Any]) -> str:
+    """Hash a map entry's content to tell if it changed between exports.
+
+    Args:
+        vault_url: The VAULT URL key of the entry
+        entry: The map entry dictionary
+
+    Returns:
+        Hex digest of the entry
+    """
+    content: str = json.dumps([vault_url, entry], sort_keys=True)
+    return hashlib.sha1(content.encode()).hexdigest()
+
+
+def export_hashes_path(output_file: str | Path) -> Path:
+    """Get the path of the entry hashes kept for incremental exports.
+
+    Args:
+        output_file: Path to the export file
 
-    The CSV will have columns:
+    Returns:
+        Path like id-map.csv.hashes.json in the same directory
+    """
+    path: Path = Path(output_file)
+    return path.with_name(f"{path.name}.hashes.json")
+
+
+def _read_export(path: Path, output_format: str) -> Iterator[tuple[str, Any]]:
+    """Yield (vault_url, raw row) pairs of a previous CSV or JSONL export."""
+    with path.open("r", newline="") as f:
+        if output_format == "csv":
+            reader = csv.reader(f)
+            next(reader, None)  # header
+            for row in reader:
+                if row:
+                    yield row[0], row
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)["vault_url"], line
+
+
+def _write_parquet(
+    items: Iterable[tuple[str, dict[str, Any]]], output_path: Path
+) -> int:
+    """Write export rows to a Parquet file in row groups."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "Parquet export requires pyarrow, install the parquet extra"
+        ) from e
+
+    schema = pa.schema([(field, pa.string()) for field in EXPORT_FIELDS])
+    count: int = 0
+    batch: list[dict[str, str]] = []
+    with pq.ParquetWriter(output_path, schema) as writer:
+        for vault_url, entry in items:
+            batch.append(export_row(vault_url, entry))
+            count += 1
+            if len(batch) >= PARQUET_BATCH_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                batch = []
+        if batch or not count:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+    return count
+
+
+def export_id_map_rows(
+    map_file: str | Path,
+    output_file: str | Path,
+    output_format: str = "csv",
+    incremental: bool = False,
+) -> tuple[int, int]:
+    """Export an ID map (JSON or SQLite) as CSV, JSONL, or Parquet rows.
+
+    Entries are streamed from the map and rows streamed to the output, so memory
+    use doesn't grow with the size of the map. Every row has the columns:
     - vault_url: Original VAULT URL
     - record_id: New Invenio record ID
     - title: Record title
@@ -308,50 +1747,121 @@ def id_map_to_csv(map_file: str | Path, output_file: str | Path) -> None:
     - collaborators: Comma-separated list of collaborators
     - events: Newline-separated list of formatted events
 
+    With incremental, the version of the map (see _plan_cache_key) and a hash
+    of each entry are kept next to the output. If the map and its journal are
+    unchanged since the last export, the previous output is kept as is and the
+    map isn't read at all. Otherwise every entry is still read and hashed, and
+    only the formatting of unchanged entries is saved: their rows are copied
+    from the previous output. This works best while the map's order is stable
+    (entries are only appended), which it is for maps written by these
+    utilities; rows that move are simply formatted again.
+
     Args:
-        map_file: Path to the id-map.json file
-        output_file: Path to write the CSV file
+        map_file: Path to the id-map.json file or SQLite id-map
+        output_file: Path to write the export file
+        output_format: One of EXPORT_FORMATS
+        incremental: Reuse unchanged rows of the previous CSV or JSONL export
+
+    Returns:
+        Tuple of (rows formatted, rows reused from the previous export)
 
     Raises:
         FileNotFoundError: If the map file doesn't exist
+        ImportError: If Parquet is requested and pyarrow isn't installed
         json.JSONDecodeError: If the map file is not valid JSON
         OSError: If the output file cannot be written
+        ValueError: If the format is unknown or incremental Parquet is requested
     """
-    data: dict[str, Any] = load_id_map(map_file)
-    output_path: Path = Path(output_file)
+    if output_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format {output_format}")
+    if incremental and output_format == "parquet":
+        raise ValueError("Incremental export only supports csv and jsonl")
 
-    with output_path.open("w", newline="") as f:
-        writer = csv.DictWriter(
-            f,
-            fieldnames=[
-                "vault_url",
-                "record_id",
-                "title",
-                "owner",
-                "viewlevel",
-                "collaborators",
-                "events",
-            ],
-        )
-        writer.writeheader()
+    output_path: Path = Path(output_file)
+    # written beside the output and moved into place once complete, so the
+    # previous export can be read while the new one is written
+    tmp_path: Path = output_path.with_name(f"{output_path.name}.tmp")
+    hashes_path: Path = export_hashes_path(output_path)
+    key: list[Any] = _plan_cache_key(map_file, [output_format])
+
+    old_hashes: dict[str, str] = {}
+    old_rows: Iterator[tuple[str, Any]] = iter(())
+    if incremental and output_path.exists() and hashes_path.exists():
+        with hashes_path.open("r") as f:
+            previous: dict[str, Any] = json.load(f)
+        old_hashes = previous.get("hashes", {})
+        if previous.get("key") == key:
+            return (0, len(old_hashes))
+        old_rows = _read_export(output_path, output_format)
+
+    id_map: IdMap | SqliteIdMap = open_id_map(map_file)
+    try:
+        if output_format == "parquet":
+            count: int = _write_parquet(id_map.items(), tmp_path)
+            os.replace(tmp_path, output_path)
+            hashes_path.unlink(missing_ok=True)
+            return (count, 0)
+
+        new_hashes: dict[str, str] = {}
+        formatted: int = 0
+        reused: int = 0
+        with tmp_path.open("w", newline="") as f:
+            writer = csv.writer(f)
+            if output_format == "csv":
+                writer.writerow(EXPORT_FIELDS)
+
+            for vault_url, entry in id_map.items():
+                digest: str = entry_hash(vault_url, entry)
+                new_hashes[vault_url] = digest
+                old_row: Any = None
+                if old_hashes.get(vault_url) == digest:
+                    # skip rows of entries that were removed or moved
+                    for old_url, row in old_rows:
+                        if old_url == vault_url:
+                            old_row = row
+                            break
+
+                if old_row is not None:
+                    reused += 1
+                    if output_format == "csv":
+                        writer.writerow(old_row)
+                    else:
+                        f.write(old_row)
+                    continue
+
+                formatted += 1
+                row: dict[str, str] = export_row(vault_url, entry)
+                if output_format == "csv":
+                    writer.writerow([row[field] for field in EXPORT_FIELDS])
+                else:
+                    f.write(json.dumps(row) + "\n")
+    finally:
+        id_map.close()
+
+    os.replace(tmp_path, output_path)
+    # don't record the version of a map that changed while it was being read
+    if _plan_cache_key(map_file, [output_format]) != key:
+        key = []
+    with hashes_path.open("w") as f:
+        json.dump({"key": key, "hashes": new_hashes}, f)
+    return (formatted, reused)
+
+
+def id_map_to_csv(
+    map_file: str | Path, output_file: str | Path, incremental: bool = False
+) -> None:
+    """Convert an ID map (JSON or SQLite) to CSV format.
 
-        for vault_url, entry in data.items():
-            # Format collaborators as comma-separated
-            collaborators: list[str] = entry.get("collaborators", [])
-            collaborators_str: str = ", ".join(collaborators)
+    See export_id_map_rows for the columns and incremental exports.
 
-            # Format events as newline-separated
-            events: list[dict[str, Any]] = entry.get("events", [])
-            events_str: str = "\n".join(format_event(event) for event in events)
+    Args:
+        map_file: Path to the id-map.json file or SQLite id-map
+        output_file: Path to write the CSV file
+        incremental: Reuse unchanged rows of the previous export
 
-            writer.writerow(
-                {
-                    "vault_url": vault_url,
-                    "record_id": entry.get("id", ""),
-                    "title": entry.get("title", ""),
-                    "owner": entry.get("owner", ""),
-                    "viewlevel": entry.get("viewlevel", ""),
-                    "collaborators": collaborators_str,
-                    "events": events_str,
-                }
-            )
+    Raises:
+        FileNotFoundError: If the map file doesn't exist
+        json.JSONDecodeError: If the map file is not valid JSON
+        OSError: If the output file cannot be written
+    """
+    export_id_map_rows(map_file, output_file, "csv", incremental)
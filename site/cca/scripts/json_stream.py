@@ -0,0 +1,192 @@
+"""Incremental parsing of large JSON documents.
+
+Only one value of the document is held in memory at a time, so the peak memory
+use is bounded by the largest value rather than the size of the whole file.
+Uses the standard library's JSON decoder on a growing buffer instead of
+depending on a streaming JSON package.
+"""
+
+import json
+from collections.abc import Iterator
+from typing import Any, TextIO
+
+DEFAULT_CHUNK_SIZE: int = 64 * 1024
+WHITESPACE: str = " \t\n\r"
+# characters that can continue a number, e.g. a buffer ending in "1." or "12e"
+NUMBER_CHARS: frozenset[str] = frozenset("0123456789.eE+-")
+
+_decoder: json.JSONDecoder = json.JSONDecoder()
+
+
+class JSONStream:
+    """A buffered reader that decodes one JSON value at a time from a file.
+
+    Args:
+        f: File opened in text mode
+        chunk_size: Number of characters to read at a time
+    """
+
+    def __init__(self, f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.f: TextIO = f
+        self.chunk_size: int = chunk_size
+        self.buf: str = ""
+        self.pos: int = 0
+        self.eof: bool = False
+
+    def _fill(self) -> bool:
+        """Read more of the file into the buffer, dropping consumed text.
+
+        Reads at least as much as is already buffered so a value that spans
+        many chunks is re-decoded a logarithmic number of times, not linear.
+
+        Returns:
+            False if the end of the file was already reached
+        """
+        if self.eof:
+            return False
+        self.buf = self.buf[self.pos :]
+        self.pos = 0
+        chunk: str = self.f.read(max(self.chunk_size, len(self.buf)))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next non-whitespace character, which must be in chars.
+
+        Raises:
+            json.JSONDecodeError: If the next character is not one of chars
+        """
+        char: str = self.peek()
+        if not char or char not in chars:
+            raise json.JSONDecodeError(
+                f"Expecting one of {chars!r}", self.buf, self.pos
+            )
+        self.pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Decode the next complete JSON value.
+
+        Raises:
+            json.JSONDecodeError: If the value is not valid JSON
+        """
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number followed by nothing but number characters may continue
+            # in the next chunk, the decoder stops before a trailing "." or "e"
+            if (
+                isinstance(value, (int, float))
+                and not isinstance(value, bool)
+                and NUMBER_CHARS.issuperset(self.buf[end:])
+                and self._fill()
+            ):
+                continue
+            self.pos = end
+            return value
+
+
+def _iter_keys(stream: JSONStream) -> Iterator[str]:
+    """Yield the keys of the object at the stream's position.
+
+    After each key the stream is positioned at its value, which the caller must
+    consume before asking for the next key.
+    """
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.pos += 1
+        return
+    while True:
+        key: Any = stream.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError(
+                "Expecting property name", stream.buf, stream.pos
+            )
+        stream.expect(":")
+        yield key
+        if stream.expect(",}") == "}":
+            return
+
+
+def _iter_array(stream: JSONStream) -> Iterator[Any]:
+    """Yield the items of the array at the stream's position."""
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.pos += 1
+        return
+    while True:
+        yield stream.value()
+        if stream.expect(",]") == "]":
+            return
+
+
+def iter_object_items(
+    f: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[tuple[str, Any]]:
+    """Iterate over the key/value pairs of a JSON object one at a time.
+
+    Args:
+        f: File opened in text mode containing a JSON object
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        (key, value) tuples in document order
+
+    Raises:
+        json.JSONDecodeError: If the document is not a valid JSON object
+    """
+    stream: JSONStream = JSONStream(f, chunk_size)
+    for key in _iter_keys(stream):
+        yield key, stream.value()
+
+
+def iter_array_items(
+    f: TextIO, key: str | None = None, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[Any]:
+    """Iterate over the items of a JSON array one at a time.
+
+    With a key, the document is an object and the array is the value of its key
+    property, e.g. the rows of a {"Report_Entry": [...]} report. Properties
+    before the key are decoded one at a time and skipped, and nothing after the
+    array is read.
+
+    Args:
+        f: File opened in text mode containing a JSON array or object
+        key: Property of the object that holds the array, None if the document
+            is the array itself
+        chunk_size: Number of characters to read at a time
+
+    Yields:
+        Array items in document order, nothing if the object has no key property
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON or the value of
+            the key property is not an array
+    """
+    stream: JSONStream = JSONStream(f, chunk_size)
+    if key is None:
+        yield from _iter_array(stream)
+        return
+    for name in _iter_keys(stream):
+        if name == key:
+            yield from _iter_array(stream)
+            return
+        stream.value()
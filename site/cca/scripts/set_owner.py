@@ -1,50 +1,234 @@
+from collections.abc import Iterable
 from os import environ
 from typing import Any
 
 import click
 from flask.cli import with_appcontext
-from invenio_access.permissions import system_identity
 from invenio_accounts.proxies import current_accounts as accounts
 from invenio_db import db
+from invenio_pidstore.models import PersistentIdentifier, PIDStatus
 from invenio_rdm_records.proxies import current_rdm_records_service as records
+from invenio_rdm_records.records.api import RDMParent, RDMRecord
+
+from cca.scripts.batch_utils import (
+    CHUNK_SIZE,
+    INDEX_BATCH_SIZE,
+    BatchProgress,
+    IndexQueue,
+    ResolvedUser,
+    UserResolver,
+    batched,
+    echo_lines,
+    start_progress,
+)
+from cca.scripts.id_map_utils import is_uuid
 
 
 def set_record_owner(record, owner) -> None:
+    """Set the owner of a record's parent.
+
+    Args:
+        record: The API record
+        owner: User, or owner dict like {"user": id}
+    """
     parent = record.parent
     parent.access.owner = owner
     parent.commit()
 
 
-def set_single_owner(record_id: str, email: str) -> bool:
+def load_parents(record_ids: Iterable[str]) -> dict[str, tuple[Any, Any]]:
+    """Load the parents of published records directly, in bulk.
+
+    Skips the records service (permission checks, components, serialization),
+    loading the PIDs, records, and parents with one query each.
+
+    Args:
+        record_ids: Invenio record IDs
+
+    Returns:
+        Dict of record ID to (record UUID, parent record) for the records found
+    """
+    pids = PersistentIdentifier.query.filter(
+        PersistentIdentifier.pid_type == "recid",
+        PersistentIdentifier.pid_value.in_(list(record_ids)),
+        PersistentIdentifier.status == PIDStatus.REGISTERED,
+    )
+    uuids: dict[Any, str] = {pid.object_uuid: pid.pid_value for pid in pids}
+    if not uuids:
+        return {}
+
+    model = RDMRecord.model_cls
+    parent_ids: dict[Any, Any] = dict(
+        db.session.query(model.id, model.parent_id).filter(model.id.in_(list(uuids)))
+    )
+    parents: dict[Any, Any] = {
+        parent.id: parent for parent in RDMParent.get_records(set(parent_ids.values()))
+    }
+    return {
+        uuids[uuid]: (uuid, parents[parent_id])
+        for uuid, parent_id in parent_ids.items()
+        if parent_id in parents
+    }
+
+
+def set_owners(
+    owners: dict[str, Any], index_queue: IndexQueue
+) -> tuple[list[str], list[str]]:
+    """Set the owners of many records in one transaction.
+
+    Each record is updated in a savepoint, so a record that fails is rolled
+    back alone and the rest are committed together.
+
+    Args:
+        owners: Dict of record ID to the user to make its owner
+        index_queue: Queue to reindex the updated records with
+
+    Returns:
+        Tuple of (IDs of the records whose owner was set, IDs of the records
+        that don't exist)
+    """
+    if not owners:
+        return [], []
+    parents: dict[str, tuple[Any, Any]] = load_parents(owners)
+    updated: list[str] = []
+    missing: list[str] = []
+    for record_id in owners:
+        if record_id not in parents:
+            click.echo(f"ERROR: could not find record {record_id}", err=True)
+            missing.append(record_id)
+            continue
+        parent: Any = parents[record_id][1]
+        try:
+            with db.session.begin_nested():
+                parent.access.owner = {"user": owners[record_id].id}
+                parent.commit()
+            updated.append(record_id)
+        except Exception as e:
+            click.echo(f"ERROR: failed to set owner of {record_id}: {e}", err=True)
+
+    try:
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        click.echo(f"ERROR: failed to commit owners: {e}", err=True)
+        return [], missing
+
+    for record_id in updated:
+        index_queue.add(parents[record_id][0])
+    return updated, missing
+
+
+def set_chunk_owners(
+    chunk: list[dict[str, Any]],
+    users: UserResolver,
+    index_queue: IndexQueue,
+    host: str = "",
+) -> list[dict[str, Any]]:
+    """Set the pending owners of a chunk of id-map records in one transaction.
+
+    Output is collected rather than echoed and events are returned rather than
+    recorded so the id-map is only written by the caller.
+
+    Args:
+        chunk: Pending owner items from the id-map
+        users: Resolver to look owners up in
+        index_queue: Queue to reindex the updated records with
+        host: Invenio hostname for display purposes
+
+    Returns:
+        Dicts with the item, output "lines" as (message, is_error) pairs,
+        "events" data if its owner was set, the "failed" count of errors a
+        later run can retry, and the "skipped" count of ones it can't
+    """
+    users.prefetch(item["owner"] for item in chunk)
+    results: list[dict[str, Any]] = []
+    owners: dict[str, ResolvedUser] = {}
+    for item in chunk:
+        rec_id: str = item["record_id"]
+        owner: str = item["owner"]
+        url: str = f"https://{host}/records/{rec_id}" if host else rec_id
+        lines: list[tuple[str, bool]] = [
+            (f'Processing: {url} "{item["title"]}"', False),
+            (f"Owner: {owner}", False),
+        ]
+        results.append(
+            {"item": item, "lines": lines, "events": [], "failed": 0, "skipped": 0}
+        )
+
+        if is_uuid(owner):
+            lines.append((f"WARNING: skipping UUID owner {owner}", True))
+            results[-1]["skipped"] = 1
+            continue
+
+        # Try to find user by email & if no "@", username
+        user = users.resolve(owner)
+        if not user:
+            lines.append((f"WARNING: user not found {owner}", True))
+            results[-1]["skipped"] = 1
+            continue
+
+        owners[rec_id] = user
+
+    # Set the owners
+    updated_ids, missing_ids = set_owners(owners, index_queue)
+    updated: set[str] = set(updated_ids)
+    missing: set[str] = set(missing_ids)
+    for result in results:
+        rec_id = result["item"]["record_id"]
+        if rec_id not in owners:
+            continue
+        if rec_id in missing:
+            result["skipped"] = 1
+            continue
+        if rec_id not in updated:
+            result["failed"] = 1
+            continue
+        user = owners[rec_id]
+        url = f"https://{host}/records/{rec_id}" if host else rec_id
+        result["lines"].append((f"✓ Set {url} owner to {user.email}", False))
+        result["events"].append({"email": user.email})
+    return results
+
+
+def set_single_owner(
+    record_id: str,
+    email: str,
+    users: UserResolver | None = None,
+    record: Any = None,
+) -> bool:
     """Set the owner of a single record.
 
     Args:
         record_id: The Invenio record ID
         email: Email address of the owner
+        users: Resolver to look the user up in, instead of the datastore
+        record: The API record, if already loaded
 
     Returns:
         True if successful, False otherwise
     """
     # Get the user
-    user = accounts.datastore.get_user(email)
+    user = users.get_by_email(email) if users else accounts.datastore.get_user(email)
     if not user:
         click.echo(f"ERROR: no user found with email {email}", err=True)
         return False
 
     # Get the record
-    try:
-        record = records.read(system_identity, id_=record_id)._record
-    except Exception as e:
-        click.echo(f"ERROR: could not find record {record_id}: {e}", err=True)
-        return False
+    if record is None:
+        try:
+            record = RDMRecord.pid.resolve(record_id)
+        except Exception as e:
+            click.echo(f"ERROR: could not find record {record_id}: {e}", err=True)
+            return False
 
     try:
-        set_record_owner(record, user)
+        set_record_owner(record, {"user": user.id})
         db.session.commit()
         if records.indexer:
             records.indexer.index(record)
         return True
     except Exception as e:
+        db.session.rollback()
         click.echo(f"ERROR: failed to set owner: {e}", err=True)
         return False
 
@@ -64,9 +248,51 @@ def set_single_owner(record_id: str, email: str) -> bool:
     help="Invenio hostname for display purposes",
     type=str,
 )
+@click.option(
+    "--dry-run",
+    "-n",
+    is_flag=True,
+    help="Batch mode: list pending owners in the map without setting them",
+)
+@click.option(
+    "--chunk-size",
+    type=click.IntRange(min=1),
+    default=CHUNK_SIZE,
+    help=f"Batch mode: records to update per transaction (default: {CHUNK_SIZE})",
+)
+@click.option(
+    "--index-batch-size",
+    type=click.IntRange(min=1),
+    default=INDEX_BATCH_SIZE,
+    help=f"Batch mode: records to queue for indexing at a time (default: {INDEX_BATCH_SIZE})",
+)
+@click.option(
+    "--no-index",
+    is_flag=True,
+    help="Batch mode: don't reindex changed records, e.g. if a full rebuild follows",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Batch mode: continue after the last record of an interrupted run",
+)
+@click.option(
+    "--summary-file",
+    type=click.Path(dir_okay=False, writable=True, allow_dash=True),
+    help="Batch mode: write a JSON summary of the run's timing to this file (- for stdout)",
+)
 @with_appcontext
 def set_owner(
-    record_id: str | None, email: str | None, map_file: str | None, host: str
+    record_id: str | None,
+    email: str | None,
+    map_file: str | None,
+    host: str,
+    dry_run: bool,
+    chunk_size: int,
+    index_batch_size: int,
+    no_index: bool,
+    resume: bool,
+    summary_file: str | None,
 ) -> None:
     """Set the owner of record(s).
 
@@ -89,64 +315,115 @@ def set_owner(
 
         # Batch process owners from migration map
         invenio cca set-owner --map-file migration/id-map.json
+
+        # List pending owners (and a count of all pending work) without changes
+        invenio cca set-owner --map-file migration/id-map.json --dry-run
+
+        # Batch process without reindexing, e.g. before a full rebuild
+        invenio cca set-owner --map-file migration/id-map.json --no-index
+
+        # Continue an interrupted batch and save a summary of its timing
+        invenio cca set-owner --map-file migration/id-map.json --resume --summary-file run.json
     """
     # Batch mode: process map file
     if map_file and not record_id:
-        from cca.scripts.id_map_utils import get_pending_owners, is_uuid
-
-        pending: list[dict[str, Any]] = get_pending_owners(map_file)
+        from cca.scripts.id_map_utils import (
+            format_plan_summary,
+            open_id_map,
+            plan_migration,
+        )
 
-        if not pending:
-            click.echo("No pending owners found in id-map")
+        if dry_run:
+            plan = plan_migration(map_file)
+            for item in plan["owners"]:
+                url: str = (
+                    f"https://{host}/records/{item['record_id']}"
+                    if host
+                    else item["record_id"]
+                )
+                click.echo(f'{url} "{item["title"]}": {item["owner"]}')
+            click.echo(f"Dry run: {format_plan_summary(plan)}")
             return
 
-        click.echo(f"Found {len(pending)} records with pending owners")
-
-        fail_count = 0
-        success_count = 0
-
-        for item in pending:
-            rec_id = item["record_id"]
-            owner = item["owner"]
-            title = item["title"]
-
-            url: str = f"https://{host}/records/{rec_id}" if host else rec_id
-            click.echo(f'Processing: {url} "{title}"')
-            click.echo(f"Owner: {owner}")
-
-            if is_uuid(owner):
-                click.echo(f"WARNING: skipping UUID owner {owner}", err=True)
-                fail_count += 1
-                continue
-
-            # Try to find user by email & if no "@", username
-            user = accounts.datastore.find_user(email=owner)
-            if not user and "@" not in owner:
-                user = accounts.datastore.find_user(username=owner)
-
-            if not user:
-                click.echo(f"WARNING: user not found {owner}", err=True)
-                fail_count += 1
-                continue
-
-            # Set the owner
-            if set_single_owner(rec_id, user.email):
-                click.echo(f"✓ Set {url} owner to {user.email}")
-                # Record the event
-                try:
-                    from cca.scripts.id_map_utils import record_event
-
-                    record_event(map_file, rec_id, "set_owner", {"email": user.email})
-                    success_count += 1
-                except Exception as e:
-                    click.echo(f"WARNING: failed to record event: {e}", err=True)
-            else:
-                fail_count += 1
-
-        click.echo(
-            f"Completed: {success_count} owners set, {fail_count} failed/skipped."
-        )
-        return
+        id_map = open_id_map(map_file)
+        try:
+            # users are loaded in bulk for each batch of pending records
+            users: UserResolver = UserResolver()
+            # changed records are reindexed in bulk through the indexer queue
+            index_queue: IndexQueue = IndexQueue(
+                None if no_index else records.indexer, index_batch_size
+            )
+            progress: BatchProgress = start_progress(
+                map_file, "set-owner", "owners", resume
+            )
+
+            fail_count = 0
+            skip_count = 0
+            record_count = 0
+            success_count = 0
+
+            # stream pending work so records are updated while the map is still read
+            try:
+                for batch in batched(
+                    id_map.iter_pending_owners(after=progress.position), chunk_size
+                ):
+                    chunk_failed: int = 0
+                    chunk_skipped: int = 0
+                    chunk_succeeded: int = 0
+                    for result in set_chunk_owners(batch, users, index_queue, host):
+                        echo_lines(result["lines"])
+                        chunk_failed += result["failed"]
+                        chunk_skipped += result["skipped"]
+                        item: dict[str, Any] = result["item"]
+                        # Record the event
+                        for event in result["events"]:
+                            try:
+                                id_map.record_event(
+                                    item["record_id"],
+                                    "set_owner",
+                                    event,
+                                    vault_url=item["vault_url"],
+                                )
+                                chunk_succeeded += 1
+                            except Exception as e:
+                                click.echo(
+                                    f"WARNING: failed to record event: {e}", err=True
+                                )
+                    record_count += len(batch)
+                    fail_count += chunk_failed
+                    skip_count += chunk_skipped
+                    success_count += chunk_succeeded
+                    progress.update(
+                        batch[-1]["vault_url"],
+                        len(batch),
+                        chunk_succeeded,
+                        chunk_failed,
+                        chunk_skipped,
+                    )
+            except ValueError as e:
+                # the checkpoint doesn't match the map
+                click.echo(f"ERROR: can't resume: {e}", err=True)
+                exit(1)
+            progress.finish()
+
+            if not record_count:
+                click.echo("No pending owners found in id-map")
+                progress.write_summary(summary_file)
+                return
+
+            if index_queue.flush():
+                click.echo(f"Queued {index_queue.queued} records for indexing")
+
+            # fold the events journaled during this run back into the map file
+            id_map.compact()
+            click.echo(f"Processed {record_count} records with pending owners")
+            click.echo(
+                f"Completed: {success_count} owners set, {fail_count} failed, {skip_count} skipped."
+            )
+            progress.write_summary(summary_file)
+            return
+        finally:
+            id_map.close()
 
     # Single record mode
     if not record_id:
@@ -156,7 +433,11 @@ def set_owner(
         )
         exit(1)
 
-    record = records.read(system_identity, id_=record_id)._record
+    try:
+        record = RDMRecord.pid.resolve(record_id)
+    except Exception as e:
+        click.echo(f"ERROR: could not find record {record_id}: {e}", err=True)
+        exit(1)
 
     if not email:
         click.echo("No owner specified, looking at Creators metadata")
@@ -174,7 +455,7 @@ def set_owner(
         email = creator_emails[0]["identifier"]
 
     # Set single owner
-    if set_single_owner(record_id, email):
+    if set_single_owner(record_id, email, record=record):
         url: str = f"https://{host}/records/{record_id}" if host else record_id
         click.echo(f"✓ Set {url} owner to {email}")
     else:
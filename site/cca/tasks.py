@@ -1,7 +1,30 @@
+import os
+from dataclasses import asdict
 from datetime import datetime, timedelta, timezone
+from typing import Any
 
-from celery import shared_task
+from celery import chord, shared_task
 from flask import current_app as app
+from invenio_jobs.errors import TaskExecutionPartialError
+from invenio_rdm_records.proxies import current_rdm_records_service as records
+from invenio_users_resources.proxies import current_groups_service
+
+from cca.scripts.add_editor import add_chunk_editors
+from cca.scripts.batch_utils import IndexQueue, UserResolver, batched
+from cca.scripts.blob_cache import BlobVersion, backend_for
+from cca.scripts.groups_sync import (
+    EMPLOYEE_SUFFIX,
+    STUDENT_SUFFIX,
+    count_members,
+    employee_groups,
+    iter_report_blob,
+    read_sync_state,
+    student_groups,
+    sync_changed,
+    write_sync_state,
+)
+from cca.scripts.id_map_utils import format_plan_summary, open_id_map, plan_migration
+from cca.scripts.set_owner import set_chunk_owners
 
 
 @shared_task
@@ -28,3 +51,276 @@ def test_task(since: str | None = None, **kwargs):
     else:
         app.logger.info("no 'since' value, mayhaps this is the task's first iteration?")
     # raise invenio_jobs.errors.TaskExecutionPartialError if incomplete
+
+
+def chunk_summary(
+    index: int, results: list[dict[str, Any]], event_name: str
+) -> dict[str, Any]:
+    """Summarize the results of a migration chunk for the merge task.
+
+    Args:
+        index: Position of the chunk in the job
+        results: add_chunk_editors or set_chunk_owners results
+        event_name: Name of the id-map event to record for each success
+
+    Returns:
+        Dict of the chunk's "events" as [vault_url, name, data] lists, and the
+        number of "records" and "failed" or skipped updates
+    """
+    events: list[list[Any]] = []
+    failed: int = 0
+    for result in results:
+        for message, err in result["lines"]:
+            (app.logger.warning if err else app.logger.info)(message)
+        failed += result["failed"] + result["skipped"]
+        for data in result["events"]:
+            events.append([result["item"]["vault_url"], event_name, data])
+    return {"chunk": index, "records": len(results), "failed": failed, "events": events}
+
+
+@shared_task
+def add_editors_chunk(
+    index: int, items: list[dict[str, Any]], permission: str = "manage"
+) -> dict[str, Any]:
+    """Add the pending collaborators of a chunk of id-map records.
+
+    Errors are reported in the summary rather than raised so that one bad
+    chunk doesn't keep the others' results from being merged.
+    """
+    try:
+        users: UserResolver = UserResolver()
+        users.prefetch(c for item in items for c in item["collaborators"])
+        results = add_chunk_editors(items, permission, "", users)
+        return chunk_summary(index, results, "add_collaborator")
+    except Exception as e:
+        app.logger.exception(f"migration chunk {index} failed")
+        return {
+            "chunk": index,
+            "records": len(items),
+            "failed": len(items),
+            "events": [],
+            "error": str(e),
+        }
+
+
+@shared_task
+def set_owners_chunk(
+    index: int, items: list[dict[str, Any]], index_records: bool = True
+) -> dict[str, Any]:
+    """Set the pending owners of a chunk of id-map records.
+
+    Errors are reported in the summary rather than raised so that one bad
+    chunk doesn't keep the others' results from being merged.
+    """
+    try:
+        index_queue: IndexQueue = IndexQueue(records.indexer if index_records else None)
+        results = set_chunk_owners(items, UserResolver(), index_queue)
+        index_queue.flush()
+        return chunk_summary(index, results, "set_owner")
+    except Exception as e:
+        app.logger.exception(f"migration chunk {index} failed")
+        return {
+            "chunk": index,
+            "records": len(items),
+            "failed": len(items),
+            "events": [],
+            "error": str(e),
+        }
+
+
+@shared_task
+def merge_migration_results(
+    summaries: list[dict[str, Any]], map_file: str
+) -> dict[str, Any]:
+    """Record the events of every chunk of a migration job in the id-map at once.
+
+    Runs as the callback of the chord migrate_id_map starts, once every chunk
+    has finished, and reports the job's results.
+
+    Args:
+        summaries: Results of the chunk tasks
+        map_file: Path to the id-map
+
+    Returns:
+        Dict of the number of "records", "events" recorded, and the "failed"
+        count of each chunk that had failures
+
+    Raises:
+        TaskExecutionPartialError: If any records failed
+    """
+    id_map = open_id_map(map_file)
+    try:
+        recorded: int = id_map.record_events(
+            (vault_url, name, data)
+            for summary in summaries
+            for vault_url, name, data in summary["events"]
+        )
+        id_map.compact()
+    finally:
+        id_map.close()
+
+    records: int = sum(summary["records"] for summary in summaries)
+    failed: dict[str, int] = {
+        str(summary["chunk"]): summary["failed"]
+        for summary in summaries
+        if summary["failed"]
+    }
+    app.logger.info(f"processed {records} records, recorded {recorded} events")
+    if failed:
+        failures: str = ", ".join(f"chunk {chunk}: {n}" for chunk, n in failed.items())
+        raise TaskExecutionPartialError(
+            f"{sum(failed.values())} failures in {len(failed)} of {len(summaries)} chunks ({failures})"
+        )
+    return {"records": records, "events": recorded, "failed": failed}
+
+
+# pending work kind -> chunk task
+MIGRATION_CHUNK_TASKS: dict[str, Any] = {
+    "collaborators": add_editors_chunk,
+    "owners": set_owners_chunk,
+}
+
+
+@shared_task
+def migrate_id_map(
+    map_file: str,
+    kind: str,
+    chunk_size: int = 100,
+    dry_run: bool = False,
+    since: str | None = None,
+    **kwargs,
+):
+    """Split an id-map's pending work into chunks processed across workers.
+
+    The chunks run as a chord: a group of chunk tasks whose results are merged
+    into the id-map once, by merge_migration_results, after all of them finish.
+    This task returns once the chord is started rather than waiting on it, so
+    it doesn't hold a worker the chunks need; the callback logs the results
+    and raises if any records failed.
+
+    Args:
+        map_file: Path to the id-map, readable by every worker
+        kind: Pending work to process, "collaborators" or "owners"
+        chunk_size: Records per chunk task
+        dry_run: Only log the amount of pending work
+        since: Time of the last successful run, unused since all pending work
+            is processed every run
+        **kwargs: Arguments passed to the chunk tasks, e.g. permission
+    """
+    plan = plan_migration(map_file, [kind])
+    app.logger.info(format_plan_summary(plan))
+    if dry_run:
+        app.logger.info("dry run, nothing will be modified")
+        return
+    if not plan[kind]:
+        return
+
+    chunk_task = MIGRATION_CHUNK_TASKS[kind]
+    header = [
+        chunk_task.s(index, chunk, **kwargs)
+        for index, chunk in enumerate(batched(plan[kind], chunk_size))
+    ]
+    app.logger.info(f"processing {len(plan[kind])} records in {len(header)} chunks")
+    chord(header)(merge_migration_results.s(map_file))
+
+
+@shared_task
+def sync_groups_task(
+    state_file: str,
+    since: str | None = None,
+    employees: bool = True,
+    students: bool = True,
+    create_groups: bool = True,
+    full: bool = False,
+    dry_run: bool = False,
+    reindex: bool = True,
+    **kwargs,
+):
+    """Sync the Workday reports into the faculty and majors groups incrementally.
+
+    The version of each report's blob is recorded in the state once it has
+    been synced, and reports whose blob still matches it are skipped, so
+    identical re-uploads are skipped and reports from failed runs are retried.
+    Of the others, only the people whose rows changed since they were last
+    synced are processed, see groups_sync.sync_changed. The bucket and blob
+    names come from the same env vars as the groups-sync command.
+
+    Args:
+        state_file: Path to the sync state, readable and writable by the workers
+        since: Time of the last successful run, unused since the recorded
+            blob versions tell which reports changed
+        employees: Sync the employee report into the faculty groups
+        students: Sync the student report into the majors groups
+        create_groups: Create missing groups before adding members
+        full: Sync every report and row even if they have not changed
+        dry_run: Only log the size of the changes
+        reindex: Reindex the groups that changed
+    """
+    backend = backend_for(os.getenv("USERS_BUCKET_NAME", "integration-success"))
+    reports: list[tuple] = []
+    if employees:
+        blob_name: str = os.getenv("EMPLOYEE_BLOB_NAME", "employee_data.json")
+        reports.append(
+            ("employees", blob_name, employee_groups, EMPLOYEE_SUFFIX, "work_email")
+        )
+    if students:
+        blob_name = os.getenv("STUDENT_BLOB_NAME", "student_data.json")
+        reports.append(
+            ("students", blob_name, student_groups, STUDENT_SUFFIX, "inst_email")
+        )
+
+    datastore = app.extensions["security"].datastore
+    state: dict[str, dict[str, Any]] = read_sync_state(state_file)
+    changed_roles: set[str] = set()
+    # (state of the report kind, version of its blob that was synced)
+    synced: list[tuple[dict[str, Any], BlobVersion]] = []
+    for kind, blob_name, build, suffix, email_key in reports:
+        url: str = backend.url(blob_name)
+        version: BlobVersion | None = backend.version(blob_name)
+        if version is None:
+            raise FileNotFoundError(f"{url} does not exist")
+        kind_state: dict[str, Any] = state.setdefault(kind, {})
+        people: dict[str, Any] = kind_state.setdefault("people", {})
+        recorded: dict[str, Any] | None = kind_state.get("version")
+        # without people there is nothing to compare the rows to, so always sync
+        if (
+            not full
+            and people
+            and version.matches(BlobVersion(**recorded) if recorded else None)
+        ):
+            app.logger.info(f"{kind} report {url} unchanged since it was synced")
+            continue
+        app.logger.info(f"syncing {kind} report {url}")
+        additions, removals = sync_changed(
+            iter_report_blob(backend, blob_name, version),
+            build,
+            suffix,
+            email_key,
+            people,
+            create_groups,
+            datastore,
+            dry_run,
+            changed_roles=changed_roles,
+            full=full,
+        )
+        app.logger.info(
+            f"{kind}: {count_members(additions)} memberships added, "
+            f"{count_members(removals)} removed"
+        )
+        synced.append((kind_state, version))
+
+    if dry_run:
+        app.logger.info("dry run, nothing was modified")
+        return
+    if not synced:
+        return
+    datastore.commit()
+    for kind_state, version in synced:
+        kind_state["version"] = asdict(version)
+    write_sync_state(state_file, state)
+
+    if reindex and changed_roles:
+        index_queue: IndexQueue = IndexQueue(current_groups_service.indexer)
+        for role_id in changed_roles:
+            index_queue.add(role_id)
+        app.logger.info(f"reindexed {index_queue.process()} groups")
@@ -326,10 +326,40 @@ def test_add_editor_nonexistent_user(
         records_service.delete_record(identity, record_id, data=tombstone)
 
 
+@pytest.mark.integration
+def test_user_resolver(app):
+    """Test bulk user lookups by email, username, and {username}@cca.edu."""
+    from cca.scripts.batch_utils import UserResolver
+    from invenio_accounts import current_accounts as accounts
+
+    with app.app_context():
+        for email, username in [
+            ("resolver-test@example.com", "resolvertest"),
+            ("resolvertest2@cca.edu", "resolvertest2x"),
+        ]:
+            if not accounts.datastore.get_user(email):
+                accounts.datastore.create_user(
+                    email=email,
+                    username=username,
+                    password="ResolverPass123!",
+                    active=True,
+                )
+        accounts.datastore.commit()
+
+        users = UserResolver()
+        users.prefetch(["Resolver-Test@example.com", "resolvertest2", "nobody"])
+        assert users.resolve("RESOLVER-TEST@example.com").username == "resolvertest"
+        assert users.resolve("ResolverTest").email == "resolver-test@example.com"
+        assert users.resolve("resolvertest2").email == "resolvertest2@cca.edu"
+        # misses are cached too
+        assert "nobody" in users.by_username
+        assert users.resolve("nobody") is None
+
+
 @pytest.mark.unit
 def test_id_map_utils_load_save():
     """Test loading and saving id-map.json files."""
-    from cca.scripts.id_map_utils import load_id_map, save_id_map
+    from cca.scripts.id_map_utils import load_id_map, lock_path, save_id_map
 
     with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
         test_data = {
@@ -360,6 +390,7 @@ def test_id_map_utils_load_save():
         )
     finally:
         temp_file.unlink(missing_ok=True)
+        lock_path(temp_file).unlink(missing_ok=True)
 
 
 @pytest.mark.unit
@@ -367,6 +398,8 @@ def test_id_map_utils_record_collaborator_event():
     """Test recording collaborator events in id-map.json."""
     from cca.scripts.id_map_utils import (
         get_entry_by_record_id,
+        journal_path,
+        lock_path,
         record_event,
     )
 
@@ -400,6 +433,596 @@ def test_id_map_utils_record_collaborator_event():
         assert "time" in collab_event
     finally:
         temp_file.unlink(missing_ok=True)
+        journal_path(temp_file).unlink(missing_ok=True)
+        lock_path(temp_file).unlink(missing_ok=True)
+
+
+@pytest.mark.unit
+def test_id_map_indexes():
+    """Test IdMap record ID and VAULT UUID lookups."""
+    from cca.scripts.id_map_utils import IdMap, journal_path, lock_path, vault_uuid
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+        test_data = {
+            "https://vault.cca.edu/items/test-uuid/1/": {"id": "rec-1"},
+            "https://vault.cca.edu/items/test-uuid/2/": {"id": "rec-2"},
+            "https://vault.cca.edu/items/other-uuid/1/": {"id": "rec-3"},
+        }
+        json.dump(test_data, f)
+        temp_file = Path(f.name)
+
+    try:
+        assert vault_uuid("https://vault.cca.edu/items/test-uuid/2/") == "test-uuid"
+        assert vault_uuid("https://example.com/") is None
+
+        id_map = IdMap(temp_file)
+        assert len(id_map) == 3
+        url, entry = id_map.get_entry_by_record_id("rec-2")
+        assert url == "https://vault.cca.edu/items/test-uuid/2/"
+        assert entry == {"id": "rec-2"}
+        assert id_map.get_entry_by_record_id("missing") == (None, None)
+
+        versions = id_map.get_entries_by_vault_uuid("test-uuid")
+        assert [v[1]["id"] for v in versions] == ["rec-1", "rec-2"]
+        assert id_map.get_entries_by_vault_uuid("missing") == []
+
+        # events recorded through the instance are saved to the file
+        id_map.record_event("rec-3", "set_owner", {"email": "user@example.com"})
+        reloaded = IdMap(temp_file)
+        _, entry = reloaded.get_entry_by_record_id("rec-3")
+        assert entry is not None
+        assert entry["events"][0]["name"] == "set_owner"
+        with pytest.raises(ValueError):
+            id_map.record_event("missing", "set_owner", {})
+    finally:
+        temp_file.unlink(missing_ok=True)
+        journal_path(temp_file).unlink(missing_ok=True)
+        lock_path(temp_file).unlink(missing_ok=True)
+
+
+@pytest.mark.unit
+def test_id_map_journal_compact():
+    """Test events are journaled, merged on read, and compacted into the map."""
+    from cca.scripts.id_map_utils import (
+        compact_id_map,
+        journal_path,
+        load_id_map,
+        lock_path,
+        record_event,
+    )
+
+    with tempfile.NamedTemporaryFile(mode="w", suffix=".json", delete=False) as f:
+        test_data = {"https://vault.cca.edu/items/test-1/1/": {"id": "rec-1"}}
+        json.dump(test_data, f)
+        temp_file = Path(f.name)
+    journal = journal_path(temp_file)
+
+    try:
+        record_event(temp_file, "rec-1", "set_owner", {"email": "a@example.com"})
+        record_event(temp_file, "rec-1", "add_collaborator", {"email": "b@example.com"})
+
+        # the map file itself is untouched, events are in the journal
+        assert json.loads(temp_file.read_text()) == test_data
+        assert len(journal.read_text().splitlines()) == 2
+        events = load_id_map(temp_file)["https://vault.cca.edu/items/test-1/1/"][
+            "events"
+        ]
+        assert [e["name"] for e in events] == ["set_owner", "add_collaborator"]
+
+        # a partial trailing line from a crash is ignored
+        with journal.open("a") as fh:
+            fh.write('{"vault_url": "https://vault')
+
+        assert compact_id_map(temp_file) == 2
+        assert not journal.exists()
+        compacted = json.loads(temp_file.read_text())
+        assert len(compacted["https://vault.cca.edu/items/test-1/1/"]["events"]) == 2
+        assert compact_id_map(temp_file) == 0
+    finally:
+        temp_file.unlink(missing_ok=True)
+        journal.unlink(missing_ok=True)
+        lock_path(temp_file).unlink(missing_ok=True)
+
+
+@pytest.mark.unit
+def test_id_map_sqlite_round_trip():
+    """Test importing an id-map into SQLite, querying it, and exporting it."""
+    from cca.scripts.id_map_utils import (
+        SqliteIdMap,
+        export_id_map,
+        get_pending_collaborators,
+        get_pending_owners,
+        import_id_map,
+        load_id_map,
+        open_id_map,
+        record_event,
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        json_file = Path(tmpdir) / "id-map.json"
+        db_file = Path(tmpdir) / "id-map.db"
+        export_file = Path(tmpdir) / "export.json"
+        test_data = {
+            "https://vault.cca.edu/items/test-1/1/": {
+                "id": "rec-1",
+                "title": "Record 1",
+                "owner": "user1",
+                "events": [{"name": "import", "data": {"id": "rec-1"}}],
+                "collaborators": ["user2", "user3"],
+            },
+            "https://vault.cca.edu/items/test-2/1/": {
+                "id": "rec-2",
+                "title": "Record 2",
+                "owner": "user2",
+                "collaborators": [],
+                "events": [
+                    {"name": "set_owner", "data": {"email": "user2@example.com"}}
+                ],
+            },
+            "https://vault.cca.edu/items/test-3/1/": {"title": "Not imported"},
+        }
+        json_file.write_text(json.dumps(test_data))
+
+        assert import_id_map(json_file, db_file) == 3
+        with pytest.raises(FileExistsError):
+            import_id_map(json_file, db_file)
+        assert isinstance(open_id_map(db_file), SqliteIdMap)
+
+        # indexed queries match the JSON implementation
+        assert get_pending_owners(db_file) == get_pending_owners(json_file)
+        assert get_pending_collaborators(db_file) == get_pending_collaborators(
+            json_file
+        )
+
+        record_event(db_file, "rec-1", "set_owner", {"email": "user1@example.com"})
+        record_event(db_file, "rec-1", "add_collaborator", {"email": "user2@cca.edu"})
+        assert get_pending_owners(db_file) == []
+        pending = get_pending_collaborators(db_file)
+        assert pending == [
+            {
+                "record_id": "rec-1",
+                "vault_url": "https://vault.cca.edu/items/test-1/1/",
+                "collaborators": ["user3"],
+                "title": "Record 1",
+            }
+        ]
+
+        assert export_id_map(db_file, export_file) == 3
+        exported = load_id_map(export_file)
+        assert list(exported) == list(test_data)
+        entry = exported["https://vault.cca.edu/items/test-1/1/"]
+        # key order is preserved and new events follow the imported ones
+        assert list(entry) == list(test_data["https://vault.cca.edu/items/test-1/1/"])
+        assert [e["name"] for e in entry["events"]] == [
+            "import",
+            "set_owner",
+            "add_collaborator",
+        ]
+        assert (
+            exported["https://vault.cca.edu/items/test-3/1/"]
+            == test_data["https://vault.cca.edu/items/test-3/1/"]
+        )
+
+
+@pytest.mark.unit
+def test_json_stream_object_items():
+    """Test incremental parsing matches json.load across chunk boundaries."""
+    import io
+
+    from cca.scripts.json_stream import iter_object_items
+
+    data = {
+        "https://vault.cca.edu/items/a/1/": {
+            "id": "rec-1",
+            "count": 12345678,
+            "ratio": -1.5e3,
+            "flags": [True, False, None],
+            "title": 'A "quoted" title, with {braces} and \u00e9',
+        },
+        "b": [],
+        "c": 987654321,
+    }
+    text = json.dumps(data, indent=2)
+    for chunk_size in (1, 2, 7, 64):
+        items = list(iter_object_items(io.StringIO(text), chunk_size=chunk_size))
+        assert dict(items) == data
+        assert [k for k, _ in items] == list(data)
+
+    assert list(iter_object_items(io.StringIO(" { } "))) == []
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_object_items(io.StringIO('{"a": 1')))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_object_items(io.StringIO("[1, 2]")))
+
+
+@pytest.mark.unit
+def test_json_stream_split_numbers():
+    """Test numbers split across chunks at every possible boundary."""
+    import io
+
+    from cca.scripts.json_stream import iter_array_items, iter_object_items
+
+    text = '{"a": 1.5, "b": -12e3, "c": [1.25, 3, -0.5E-2, 1E+2], "d": 0}'
+    for chunk_size in range(1, len(text) + 1):
+        items = iter_object_items(io.StringIO(text), chunk_size=chunk_size)
+        assert dict(items) == json.loads(text)
+    text = "[1.25, 3, 12e3, -7.0]"
+    for chunk_size in range(1, len(text) + 1):
+        items = iter_array_items(io.StringIO(text), chunk_size=chunk_size)
+        assert list(items) == json.loads(text)
+
+
+@pytest.mark.unit
+def test_json_stream_array_items():
+    """Test iterating over a top-level array and an array inside an object."""
+    import io
+
+    from cca.scripts.json_stream import iter_array_items
+
+    rows = [{"inst_email": "a@cca.edu", "programs": [{"program": "Painting"}]}, 42]
+    report = {"Meta": {"rows": 2, "nested": [[1], {"x": None}]}, "Report_Entry": rows}
+    text = json.dumps(report, indent=2)
+    for chunk_size in (1, 3, 64):
+        items = iter_array_items(io.StringIO(text), "Report_Entry", chunk_size)
+        assert list(items) == rows
+        array = io.StringIO(json.dumps(rows))
+        assert list(iter_array_items(array, chunk_size=chunk_size)) == rows
+
+    assert (
+        list(iter_array_items(io.StringIO('{"Report_Entry": []}'), "Report_Entry"))
+        == []
+    )
+    assert list(iter_array_items(io.StringIO('{"other": [1]}'), "Report_Entry")) == []
+    # nothing after the array is read
+    assert list(iter_array_items(io.StringIO('{"a": [1], oops'), "a")) == [1]
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array_items(io.StringIO('{"Report_Entry": {}}'), "Report_Entry"))
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_array_items(io.StringIO("[1, 2"), chunk_size=1))
+
+
+@pytest.mark.unit
+def test_blob_cache_local_backend(tmp_path):
+    """Test unchanged blobs are skipped until a changed version is recorded."""
+    from cca.scripts.blob_cache import BlobCache, LocalBackend, backend_for
+
+    source = tmp_path / "bucket"
+    source.mkdir()
+    (source / "data.json").write_text('{"Report_Entry": []}')
+    backend = backend_for(f"file://{source}")
+    assert isinstance(backend, LocalBackend)
+    cache_file = tmp_path / "cache.json"
+
+    cache = BlobCache(backend, cache_file)
+    version = cache.changed("data.json")
+    assert version is not None
+    cache.download("data.json", str(tmp_path / "local.json"), version)
+    assert (tmp_path / "local.json").read_text() == '{"Report_Entry": []}'
+    # nothing is recorded until the caller saves
+    assert BlobCache(backend, cache_file).changed("data.json") == version
+    cache.record("data.json", version)
+    cache.save()
+
+    cache = BlobCache(backend, cache_file)
+    assert cache.changed("data.json") is None
+    assert BlobCache(backend, cache_file, force=True).changed("data.json") == version
+    # rewriting identical content is not a change, different content is
+    (source / "data.json").write_text('{"Report_Entry": []}')
+    assert cache.changed("data.json") is None
+    (source / "data.json").write_text('{"Report_Entry": [{}]}')
+    assert cache.changed("data.json") is not None
+    with pytest.raises(FileNotFoundError):
+        cache.changed("missing.json")
+
+    # versions are recorded per target
+    cache = BlobCache(backend, cache_file, target="http://os-a/courses")
+    version = cache.changed("data.json")
+    cache.record("data.json", version)
+    cache.save()
+    assert cache.changed("data.json") is None
+    other = BlobCache(backend, cache_file, target="http://os-b/courses")
+    assert other.changed("data.json") == version
+
+
+@pytest.mark.unit
+def test_courses_bulk_pipeline(tmp_path, monkeypatch):
+    """Test course actions stream from the file into chunked bulk requests."""
+    import click
+
+    from cca.scripts import courses_index as ci
+
+    courses = [{"section_refid": f"SEC-{i}", "title": f"Course {i}"} for i in range(7)]
+    courses_file = tmp_path / "courses.json"
+    courses_file.write_text(json.dumps(courses))
+
+    chunks: list[list[str]] = []
+
+    def fake_streaming_bulk(client, actions, **kwargs):
+        assert kwargs["max_retries"] == 3
+        chunks.append([action["_id"] for action in actions])
+        for action in actions:
+            ok = action["_id"] != "SEC-5"
+            yield ok, {"index": {"_id": action["_id"], "status": 200 if ok else 400}}
+
+    monkeypatch.setattr(ci, "OpenSearch", lambda hosts, **kwargs: object())
+    monkeypatch.setattr(ci.helpers, "streaming_bulk", fake_streaming_bulk)
+
+    actions = ci.prepare_bulk_data(courses_file)
+    assert next(actions) == {
+        "_index": "courses",
+        "_id": "SEC-0",
+        "_source": courses[0],
+    }
+    with pytest.raises(click.ClickException, match="1 documents failed"):
+        ci.push_to_opensearch(
+            "http://os", actions, chunk_size=2, thread_count=2, max_retries=3
+        )
+    assert sorted(chunks) == [
+        ["SEC-1", "SEC-2"],
+        ["SEC-3", "SEC-4"],
+        ["SEC-5", "SEC-6"],
+    ]
+
+    chunks.clear()
+    courses_file.write_text(json.dumps(courses[:5]))
+    indexed = ci.push_to_opensearch(
+        "http://os", ci.prepare_bulk_data(courses_file), chunk_size=3, max_retries=3
+    )
+    assert indexed == 5
+    assert sorted(chunks) == [["SEC-0", "SEC-1", "SEC-2"], ["SEC-3", "SEC-4"]]
+
+
+@pytest.mark.unit
+def test_id_map_streaming_pending_and_compact():
+    """Test streaming pending scans see journaled events and compaction output."""
+    from cca.scripts.id_map_utils import (
+        IdMap,
+        compact_id_map,
+        iter_pending_owners,
+        journal_path,
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        map_file = Path(tmpdir) / "id-map.json"
+        test_data = {
+            f"https://vault.cca.edu/items/test-{i}/1/": {
+                "id": f"rec-{i}",
+                "owner": f"user{i}",
+                "events": [{"name": "import"}],
+            }
+            for i in range(3)
+        }
+        map_file.write_text(json.dumps(test_data, indent=2))
+
+        id_map = IdMap(map_file)
+        pending = id_map.iter_pending_owners()
+        first = next(pending)
+        assert first["vault_url"] == "https://vault.cca.edu/items/test-0/1/"
+        # recording with the VAULT URL doesn't load the map
+        id_map.record_event(
+            first["record_id"], "set_owner", {}, vault_url=first["vault_url"]
+        )
+        assert not id_map.loaded
+        assert [p["record_id"] for p in pending] == ["rec-1", "rec-2"]
+        assert [p["record_id"] for p in iter_pending_owners(map_file)] == [
+            "rec-1",
+            "rec-2",
+        ]
+
+        assert compact_id_map(map_file) == 1
+        assert not journal_path(map_file).exists()
+        test_data["https://vault.cca.edu/items/test-0/1/"]["events"].append(
+            json.loads(map_file.read_text())["https://vault.cca.edu/items/test-0/1/"][
+                "events"
+            ][1]
+        )
+        # streamed compaction writes the same format as save_id_map
+        assert map_file.read_text() == json.dumps(test_data, indent=2)
+
+
+@pytest.mark.unit
+def test_id_map_plan_migration():
+    """Test the single-pass planner, exact collaborator matching, and its cache."""
+    from cca.scripts.id_map_utils import (
+        format_plan_summary,
+        plan_cache_path,
+        plan_migration,
+        record_event,
+    )
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        map_file = Path(tmpdir) / "id-map.json"
+        test_data = {
+            "https://vault.cca.edu/items/test-1/1/": {
+                "id": "rec-1",
+                "title": "Record 1",
+                "owner": "owner1",
+                "collaborators": ["ann", "Bob@cca.edu", "carol"],
+                "events": [
+                    # "ann" is not "joanne", a substring match would skip her
+                    {"name": "add_collaborator", "data": {"email": "joanne@cca.edu"}},
+                    {"name": "add_collaborator", "data": {"email": "bob@cca.edu"}},
+                    {"name": "add_collaborator", "data": {"email": "carol@cca.edu"}},
+                ],
+            },
+            "https://vault.cca.edu/items/test-2/1/": {
+                "id": "rec-2",
+                "title": "Record 2",
+                "owner": "owner2",
+                "events": [{"name": "set_owner", "data": {"email": "o2@cca.edu"}}],
+            },
+        }
+        map_file.write_text(json.dumps(test_data))
+
+        plan = plan_migration(map_file)
+        assert [p["collaborators"] for p in plan["collaborators"]] == [["ann"]]
+        assert [p["record_id"] for p in plan["owners"]] == ["rec-1"]
+        assert format_plan_summary(plan) == (
+            "1 records with pending collaborators, 1 records with pending owners"
+        )
+
+        # the cached plan is used while the map is unchanged
+        cache = json.loads(plan_cache_path(map_file).read_text())
+        cache["plan"]["owners"] = []
+        plan_cache_path(map_file).write_text(json.dumps(cache))
+        assert plan_migration(map_file)["owners"] == []
+
+        # and rebuilt once an event changes the map
+        record_event(map_file, "rec-1", "add_collaborator", {"email": "ann@cca.edu"})
+        plan = plan_migration(map_file)
+        assert plan["collaborators"] == []
+        assert len(plan["owners"]) == 1
+
+
+@pytest.mark.unit
+def test_id_map_concurrent_saves():
+    """Test two loaded maps saving in turn keep each other's events."""
+    from cca.scripts.id_map_utils import IdMap, load_id_map
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        map_file = Path(tmpdir) / "id-map.json"
+        test_data = {
+            "https://vault.cca.edu/items/test-1/1/": {"id": "rec-1"},
+            "https://vault.cca.edu/items/test-2/1/": {"id": "rec-2"},
+        }
+        map_file.write_text(json.dumps(test_data))
+
+        owners = IdMap(map_file)
+        editors = IdMap(map_file)
+        assert len(owners) == len(editors) == 2
+
+        owners.record_event("rec-1", "set_owner", {"email": "a@example.com"})
+        editors.record_event("rec-2", "add_collaborator", {"email": "b@example.com"})
+        assert owners.compact() == 2
+        # editors loaded before owners saved, but its save merges the new map
+        editors.record_event("rec-1", "add_collaborator", {"email": "c@example.com"})
+        editors.save()
+
+        data = load_id_map(map_file)
+        events = data["https://vault.cca.edu/items/test-1/1/"]["events"]
+        assert sorted(e["name"] for e in events) == ["add_collaborator", "set_owner"]
+        assert len(data["https://vault.cca.edu/items/test-2/1/"]["events"]) == 1
+        # nothing but the map and its lock file is left behind
+        assert sorted(p.name for p in Path(tmpdir).iterdir()) == [
+            "id-map.json",
+            "id-map.json.lock",
+        ]
+
+
+@pytest.mark.unit
+def test_id_map_pending_after():
+    """Test pending work resumes after a checkpointed entry in both backends."""
+    from cca.scripts.id_map_utils import import_id_map, open_id_map
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        map_file = Path(tmpdir) / "id-map.json"
+        test_data = {
+            f"https://vault.cca.edu/items/test-{i}/1/": {
+                "id": f"rec-{i}",
+                "owner": f"owner{i}",
+                "collaborators": [f"user{i}"],
+            }
+            for i in range(1, 5)
+        }
+        map_file.write_text(json.dumps(test_data))
+        db_file = Path(tmpdir) / "id-map.db"
+        import_id_map(map_file, db_file)
+
+        for path in (map_file, db_file):
+            id_map = open_id_map(path)
+            after = "https://vault.cca.edu/items/test-2/1/"
+            owners = [i["record_id"] for i in id_map.iter_pending_owners(after=after)]
+            assert owners == ["rec-3", "rec-4"]
+            collabs = id_map.iter_pending_collaborators(after=after)
+            assert [i["record_id"] for i in collabs] == ["rec-3", "rec-4"]
+            with pytest.raises(ValueError):
+                list(id_map.iter_pending_owners(after="https://example.com/"))
+            id_map.close()
+
+
+@pytest.mark.unit
+def test_batch_progress_checkpoint(tmp_path):
+    """Test the checkpoint stays before failures and the resumed total."""
+    from cca.scripts.batch_utils import checkpoint_path, start_progress
+    from cca.scripts.id_map_utils import lock_path, plan_cache_path, plan_migration
+
+    map_file = tmp_path / "id-map.json"
+    # a JSON and a SQLite map side by side don't share sidecars
+    db_file = tmp_path / "id-map.db"
+    for sidecar in (lock_path, plan_cache_path, lambda p: checkpoint_path(p, "x")):
+        assert sidecar(map_file) != sidecar(db_file)
+    urls = [f"https://vault.cca.edu/items/test-{i}/1/" for i in range(1, 5)]
+    map_file.write_text(
+        json.dumps(
+            {url: {"id": f"rec-{i}", "owner": "o"} for i, url in enumerate(urls)}
+        )
+    )
+    plan_migration(map_file)
+
+    progress = start_progress(map_file, "set-owner", "owners", False)
+    assert progress.total == 4
+    # records skipped for good don't hold the checkpoint back
+    progress.update(urls[0], 1, 0, 0, 1)
+    path = checkpoint_path(map_file, "set-owner")
+    assert json.loads(path.read_text())["position"] == urls[0]
+    progress.update(urls[1], 1, 0, 1)
+    progress.update(urls[2], 1, 1, 0)
+    progress.finish()
+    assert json.loads(path.read_text())["position"] == urls[0]
+    assert progress.summary()["skipped"] == 1
+
+    progress = start_progress(map_file, "set-owner", "owners", True)
+    assert progress.position == urls[0]
+    assert progress.total == 3
+
+
+@pytest.mark.unit
+def test_id_map_incremental_export():
+    """Test CSV and JSONL exports reuse the rows of unchanged entries."""
+    import csv
+
+    from cca.scripts.id_map_utils import export_id_map_rows, record_event
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        map_file = Path(tmpdir) / "id-map.json"
+        test_data = {
+            "https://vault.cca.edu/items/test-1/1/": {
+                "id": "rec-1",
+                "title": "Record, 1",
+                "collaborators": ["ann", "bob"],
+                "events": [
+                    {"name": "import", "time": "2025-12-02T12:25:00"},
+                    {"name": "add_collaborator", "data": {"email": "ann@cca.edu"}},
+                ],
+            },
+            "https://vault.cca.edu/items/test-2/1/": {"id": "rec-2"},
+        }
+        map_file.write_text(json.dumps(test_data))
+
+        csv_file = Path(tmpdir) / "id-map.csv"
+        assert export_id_map_rows(map_file, csv_file, incremental=True) == (2, 0)
+        with csv_file.open(newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert rows[0]["collaborators"] == "ann, bob"
+        assert rows[0]["events"] == (
+            "Dec 2 2025 12:25PM: import\n: add_collaborator - ann@cca.edu"
+        )
+        assert export_id_map_rows(map_file, csv_file, incremental=True) == (0, 2)
+        with csv_file.open(newline="") as f:
+            assert list(csv.DictReader(f)) == rows
+
+        record_event(map_file, "rec-2", "set_owner", {"email": "o@cca.edu"})
+        assert export_id_map_rows(map_file, csv_file, incremental=True) == (1, 1)
+
+        jsonl_file = Path(tmpdir) / "id-map.jsonl"
+        assert export_id_map_rows(map_file, jsonl_file, "jsonl", True) == (2, 0)
+        assert export_id_map_rows(map_file, jsonl_file, "jsonl", True) == (0, 2)
+        lines = [json.loads(line) for line in jsonl_file.read_text().splitlines()]
+        assert [line["record_id"] for line in lines] == ["rec-1", "rec-2"]
+        assert lines[1]["events"].endswith(": set_owner - o@cca.edu")
+
+        with pytest.raises(ValueError):
+            export_id_map_rows(map_file, jsonl_file, "parquet", True)
 
 
 @pytest.mark.unit
@@ -463,7 +1086,7 @@ def test_add_editor_with_map_file(
 ):
     """Test add_editor command with --map-file option."""
     from cca.scripts.add_editor import add_editor
-    from cca.scripts.id_map_utils import get_entry_by_record_id
+    from cca.scripts.id_map_utils import get_entry_by_record_id, lock_path
     from click.testing import CliRunner
     from invenio_accounts import current_accounts as accounts
 
@@ -521,6 +1144,7 @@ def test_add_editor_with_map_file(
             records_service.delete_record(identity, record_id, data=tombstone)
         finally:
             map_file.unlink(missing_ok=True)
+            lock_path(map_file).unlink(missing_ok=True)
 
 
 @pytest.mark.integration
@@ -529,7 +1153,7 @@ def test_add_editor_batch_mode(
 ):
     """Test add_editor command in batch mode with --map-file."""
     from cca.scripts.add_editor import add_editor
-    from cca.scripts.id_map_utils import get_pending_collaborators
+    from cca.scripts.id_map_utils import get_pending_collaborators, lock_path
     from click.testing import CliRunner
     from invenio_accounts import current_accounts as accounts
 
@@ -585,7 +1209,7 @@ def test_add_editor_batch_mode(
             result = runner.invoke(add_editor, ["--map-file", str(map_file)])
 
             assert result.exit_code == 0
-            assert "Found 2 records" in result.output
+            assert "Processed 2 records" in result.output
             assert "batchuser1@cca.edu" in result.output
             assert "batchuser2@cca.edu" in result.output
             assert "2 collaborators added" in result.output
@@ -599,6 +1223,7 @@ def test_add_editor_batch_mode(
             records_service.delete_record(identity, record2.id, data=tombstone)
         finally:
             map_file.unlink(missing_ok=True)
+            lock_path(map_file).unlink(missing_ok=True)
 
 
 @pytest.mark.unit
@@ -606,7 +1231,9 @@ def test_id_map_utils_record_owner_event():
     """Test recording owner events in id-map."""
     from cca.scripts.id_map_utils import (
         has_owner_event,
+        journal_path,
         load_id_map,
+        lock_path,
         record_event,
     )
 
@@ -636,6 +1263,8 @@ def test_id_map_utils_record_owner_event():
 
     finally:
         map_file.unlink(missing_ok=True)
+        lock_path(map_file).unlink(missing_ok=True)
+        journal_path(map_file).unlink(missing_ok=True)
 
 
 @pytest.mark.unit
@@ -699,7 +1328,7 @@ def test_set_owner_with_map_file(
     app, minimal_record, identity, records_service, tombstone
 ):
     """Test set_owner command with map file in single mode."""
-    from cca.scripts.id_map_utils import has_owner_event, load_id_map
+    from cca.scripts.id_map_utils import has_owner_event, load_id_map, lock_path
     from cca.scripts.set_owner import set_owner
     from click.testing import CliRunner
     from invenio_accounts import current_accounts as accounts
@@ -752,6 +1381,7 @@ def test_set_owner_with_map_file(
             records_service.delete_record(identity, record.id, data=tombstone)
         finally:
             map_file.unlink(missing_ok=True)
+            lock_path(map_file).unlink(missing_ok=True)
 
 
 @pytest.mark.integration
@@ -759,7 +1389,7 @@ def test_set_owner_batch_mode(
     app, minimal_record, identity, records_service, tombstone
 ):
     """Test set_owner command in batch mode with --map-file."""
-    from cca.scripts.id_map_utils import get_pending_owners
+    from cca.scripts.id_map_utils import get_pending_owners, lock_path
     from cca.scripts.set_owner import set_owner
     from click.testing import CliRunner
     from invenio_accounts import current_accounts as accounts
@@ -816,7 +1446,7 @@ def test_set_owner_batch_mode(
             result = runner.invoke(set_owner, ["--map-file", str(map_file)])
 
             assert result.exit_code == 0
-            assert "Found 2 records with pending owners" in result.output
+            assert "Processed 2 records with pending owners" in result.output
             assert "ownertest1@cca.edu" in result.output
             assert "ownertest2@cca.edu" in result.output
             assert "2 owners set" in result.output
@@ -830,3 +1460,4 @@ def test_set_owner_batch_mode(
             records_service.delete_record(identity, record2.id, data=tombstone)
         finally:
             map_file.unlink(missing_ok=True)
+            lock_path(map_file).unlink(missing_ok=True)
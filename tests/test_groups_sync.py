@@ -137,3 +137,238 @@ def test_process_students_and_employees(monkeypatch):
     assert ("create", "fine_arts_faculty", "Fine Arts Faculty") in calls
     assert ("add", "f1@cca.edu", "fine_arts_faculty") in calls
     assert ("add", "f2@cca.edu", "fine_arts_faculty") in calls
+
+
+@pytest.mark.unit
+def test_diff_memberships():
+    desired = {
+        "painting_majors": {"s1@cca.edu", "s2@cca.edu"},
+        "drawing_majors": {"s3@cca.edu"},
+    }
+    current = {
+        "painting_majors": {"s2@cca.edu", "old@cca.edu"},
+        "sculpture_majors": {"s4@cca.edu"},
+    }
+
+    additions, removals = gs.diff_memberships(desired, current)
+
+    assert additions == {
+        "painting_majors": {"s1@cca.edu"},
+        "drawing_majors": {"s3@cca.edu"},
+    }
+    # people who left a program, or programs no longer in the data, are removed
+    assert removals == {
+        "painting_majors": {"old@cca.edu"},
+        "sculpture_majors": {"s4@cca.edu"},
+    }
+    assert gs.diff_memberships(desired, desired) == ({}, {})
+
+
+@pytest.mark.unit
+def test_process_dry_run(monkeypatch):
+    calls: list[tuple] = []
+    monkeypatch.setattr(gs, "create_role", lambda *args: calls.append(args))
+    monkeypatch.setattr(gs, "add_user_to_role", lambda *args: calls.append(args))
+
+    employees: list[dict[str, Any]] = [
+        {"work_email": "F1@cca.edu", "program": "Fine Arts"},
+        {"work_email": "f2@cca.edu", "program": "Fine Arts"},
+    ]
+    additions, removals = gs.process_employees(
+        employees, create_groups=True, dry_run=True
+    )
+
+    assert additions == {"fine_arts_faculty": {"f1@cca.edu", "f2@cca.edu"}}
+    assert removals == {}
+    assert calls == []
+
+
+@pytest.mark.unit
+def test_membership_rows(capsys):
+    users = {"a@cca.edu": 1, "b@cca.edu": 2}
+    roles = {"painting_majors": "r1"}
+    changes = {
+        "painting_majors": {"b@cca.edu", "a@cca.edu"},
+        "drawing_majors": {"a@cca.edu"},
+    }
+
+    rows = gs.membership_rows(changes, users, roles)
+
+    assert rows == [
+        {"user_id": 1, "role_id": "r1"},
+        {"user_id": 2, "role_id": "r1"},
+    ]
+    assert "Role drawing_majors does not exist" in capsys.readouterr().out
+
+
+@pytest.mark.unit
+def test_report_entries(monkeypatch):
+    import io
+    import json
+
+    calls: list[tuple] = []
+    monkeypatch.setattr(gs, "create_role", lambda *args: calls.append(args))
+    monkeypatch.setattr(gs, "add_user_to_role", lambda *args: calls.append(args))
+    report = {
+        "Report_Entry": [
+            {"work_email": "f1@cca.edu", "program": "Fine Arts"},
+            {"work_email": "f2@cca.edu", "program": None},
+        ]
+    }
+
+    rows = gs.report_entries(io.StringIO(json.dumps(report)))
+    additions, _ = gs.process_employees(rows, create_groups=False)
+
+    assert additions == {"fine_arts_faculty": {"f1@cca.edu"}}
+    # an empty report changes nothing
+    empty = gs.report_entries(io.StringIO('{"Report_Entry": []}'))
+    assert gs.process_employees(empty, create_groups=False) == ({}, {})
+
+
+@pytest.mark.unit
+def test_sync_changed(monkeypatch):
+    calls: list[tuple] = []
+    monkeypatch.setattr(gs, "create_role", lambda *args: calls.append(args))
+    monkeypatch.setattr(gs, "add_user_to_role", lambda *args: calls.append(args))
+    employees: list[dict[str, Any]] = [
+        {"work_email": "f1@cca.edu", "program": "Fine Arts"},
+        {"work_email": "f2@cca.edu", "program": "Painting"},
+    ]
+    state: dict[str, Any] = {}
+
+    def sync(rows):
+        return gs.sync_changed(
+            rows,
+            gs.employee_groups,
+            gs.EMPLOYEE_SUFFIX,
+            "work_email",
+            state,
+            create_groups=False,
+            datastore=None,
+        )
+
+    # no state yet: everyone is synced and recorded
+    additions, _ = sync(employees)
+    assert additions == {
+        "fine_arts_faculty": {"f1@cca.edu"},
+        "painting_faculty": {"f2@cca.edu"},
+    }
+    assert state["f1@cca.edu"]["roles"] == ["fine_arts_faculty"]
+    assert state["f1@cca.edu"]["hash"] == gs.person_hash([gs.row_hash(employees[0])])
+
+    # unchanged rows are skipped
+    assert sync(employees) == ({}, {})
+
+    # only the changed person's groups are synced, people who left are forgotten
+    moved = {"program": "Drawing", "work_email": "F2@cca.edu"}
+    additions, _ = sync([moved])
+    assert additions == {"drawing_faculty": {"f2@cca.edu"}}
+    assert set(state) == {"f2@cca.edu"}
+    assert state["f2@cca.edu"]["roles"] == ["drawing_faculty"]
+
+
+@pytest.mark.unit
+def test_course_groups():
+    sections: list[dict[str, Any]] = [
+        {
+            "section_code": "ANIMA-1000-1",
+            "department_code": "ANIMA",
+            "instructors": [{"username": "Teacher1"}, {"email": "T2@cca.edu"}],
+            "students": ["stu1", {"inst_email": "stu2@cca.edu"}, {}],
+        },
+        {
+            "section_code": "ANIMA-2000-1",
+            "department_code": "ANIMA",
+            "instructors": [{"username": "teacher1"}],
+        },
+        {"department_code": "PAINT", "instructors": [{"username": "teacher3"}]},
+    ]
+
+    instructors, students = gs.course_groups(sections)
+    assert {g.id: g.members for g in instructors.values()} == {
+        "anima_1000_1_section_instructors": {"teacher1@cca.edu", "t2@cca.edu"},
+        "anima_2000_1_section_instructors": {"teacher1@cca.edu"},
+    }
+    assert students["anima_1000_1_section_students"].members == {
+        "stu1@cca.edu",
+        "stu2@cca.edu",
+    }
+
+    instructors, _ = gs.course_groups(sections, "department")
+    assert instructors["anima_dept_instructors"].members == {
+        "teacher1@cca.edu",
+        "t2@cca.edu",
+    }
+    assert instructors["paint_dept_instructors"].description == "PAINT Instructors"
+
+    # the suffixes managed by each sync must not overlap
+    suffixes = [gs.STUDENT_SUFFIX, gs.EMPLOYEE_SUFFIX] + [
+        s for pair in gs.COURSE_SUFFIXES.values() for s in pair
+    ]
+    for a in suffixes:
+        assert not any(a != b and a.endswith(b) for b in suffixes)
+
+
+@pytest.mark.unit
+def test_sync_changed_several_rows(monkeypatch):
+    """A person with a row per program keeps every program's group."""
+    calls: list[tuple] = []
+    monkeypatch.setattr(gs, "create_role", lambda *args: calls.append(args))
+    monkeypatch.setattr(gs, "add_user_to_role", lambda *args: calls.append(args))
+    fine_arts = {"work_email": "f1@cca.edu", "program": "Fine Arts"}
+    painting = {"work_email": "f1@cca.edu", "program": "Painting"}
+    state: dict[str, Any] = {}
+
+    def sync(rows):
+        return gs.sync_changed(
+            rows,
+            gs.employee_groups,
+            gs.EMPLOYEE_SUFFIX,
+            "work_email",
+            state,
+            create_groups=False,
+            datastore=None,
+        )
+
+    additions, _ = sync([fine_arts, painting])
+    assert additions == {
+        "fine_arts_faculty": {"f1@cca.edu"},
+        "painting_faculty": {"f1@cca.edu"},
+    }
+    assert state["f1@cca.edu"]["roles"] == ["fine_arts_faculty", "painting_faculty"]
+
+    # neither row changed, in any order: nothing to sync
+    assert sync([painting, fine_arts]) == ({}, {})
+    assert sync([fine_arts, painting]) == ({}, {})
+
+    # one row changed: the person is synced with the groups of all their rows
+    drawing = {"work_email": "f1@cca.edu", "program": "Drawing"}
+    additions, _ = sync([fine_arts, drawing])
+    assert additions == {
+        "fine_arts_faculty": {"f1@cca.edu"},
+        "drawing_faculty": {"f1@cca.edu"},
+    }
+    assert state["f1@cca.edu"]["roles"] == ["drawing_faculty", "fine_arts_faculty"]
+    assert sync([drawing, fine_arts]) == ({}, {})
+
+
+@pytest.mark.unit
+def test_report_entries_numbers(tmp_path):
+    import io
+    import json
+
+    # numbers cut off at a chunk boundary must not end the row early
+    report = {
+        "Report_Entry": [
+            {"work_email": "f1@cca.edu", "program": "Fine Arts", "fte": 0.75},
+            {"work_email": "f2@cca.edu", "program": "Design", "units": -1.5e1},
+            {"work_email": "f3@cca.edu", "program": "Design", "fte": 1e2},
+        ]
+    }
+    text = json.dumps(report)
+    for chunk_size in range(1, len(text) + 1):
+        rows = gs.report_entries(io.StringIO(text), chunk_size)
+        assert list(rows) == report["Report_Entry"]
+    report_file = tmp_path / "employees.json"
+    report_file.write_text(text)
+    assert list(gs.iter_report_file(str(report_file))) == report["Report_Entry"]